@@ -1,12 +1,15 @@
 import os
 from argparse import ArgumentParser, ArgumentTypeError, Namespace
 
+from zaphodvox.audio import DEFAULT_LOUDNESS
 from zaphodvox.encoder import Encoder
 from zaphodvox.http import (
     DEFAULT_READ_TIMEOUT,
+    WARM_READ_TIMEOUT,
     default_timeout,
     request_timeout,
 )
+from zaphodvox.llm import CHUNK_CHARS
 from zaphodvox.paths import expanded_path
 from zaphodvox.qwen.encoder import DEFAULT_URL, QwenEncoder
 
@@ -33,6 +36,48 @@ def timeout_seconds(value: str) -> float:
     return seconds
 
 
+def budget_seconds(value: str) -> float:
+    """Parses a time budget, such as `--spell-budget`.
+
+    Args:
+        value: The command-line value.
+
+    Returns:
+        The seconds.
+
+    Raises:
+        ArgumentTypeError: If `value` is not a non-negative number.
+    """
+    try:
+        seconds = float(value)
+    except ValueError as e:
+        raise ArgumentTypeError(f'{value!r} is not a number') from e
+    if seconds < 0:
+        raise ArgumentTypeError(f'{seconds:g} is negative')
+    return seconds
+
+
+def positive_count(value: str) -> int:
+    """Parses a count that must be at least one, such as `--workers`.
+
+    Args:
+        value: The command-line value.
+
+    Returns:
+        The count.
+
+    Raises:
+        ArgumentTypeError: If `value` is not a whole number of at least one.
+    """
+    try:
+        count = int(value)
+    except ValueError as e:
+        raise ArgumentTypeError(f'{value!r} is not a whole number') from e
+    if count < 1:
+        raise ArgumentTypeError(f'{count} is less than one')
+    return count
+
+
 def parse_args(args: list) -> Namespace:
     """Parses command-line arguments for `zaphodvox`.
 
@@ -58,6 +103,13 @@ def parse_args(args: list) -> Namespace:
             '(e.g. "gone_bananas.txt" or "gone_bananas-manifest.json")'
         )
     )
+    parser.add_argument(
+        'more_inputfiles',
+        type=expanded_path,
+        nargs='*',
+        metavar='inputfile',
+        help='More text files to --proof, each to its own report'
+    )
     parser.add_argument(
         '-v',
         '--version',
@@ -137,6 +189,15 @@ def parse_args(args: list) -> Namespace:
             '(default: no silence)'
         )
     )
+    parser.add_argument(
+        '--silence-files',
+        action='store_true',
+        default=False,
+        help=(
+            'Write an audio file for each silence fragment, rather than '
+            'making the silence up during concatenation'
+        )
+    )
     parser.add_argument(
         '-b',
         '--basename',
@@ -204,12 +265,86 @@ def parse_args(args: list) -> Namespace:
         default=False,
         help='Encode the text to audio file(s)'
     )
+    parser.add_argument(
+        '--report',
+        action='store_true',
+        default=False,
+        help='Write a report of how long each fragment took to encode'
+    )
+    parser.add_argument(
+        '--warmup',
+        action='store_true',
+        default=False,
+        help=(
+            'Load the server\'s models before encoding, then hold each '
+            f'fragment to a {WARM_READ_TIMEOUT:g}-second read timeout, unless '
+            '--timeout says otherwise'
+        )
+    )
+    parser.add_argument(
+        '--workers',
+        type=positive_count,
+        default=1,
+        metavar='N',
+        help=(
+            'The number of fragments to synthesize at once, longest first, '
+            'or of processes to --proof with (default: 1, in order)'
+        )
+    )
+    parser.add_argument(
+        '--batch-chars',
+        type=positive_count,
+        default=None,
+        metavar='N',
+        help=(
+            'Synthesize consecutive short fragments in the same voice together, '
+            'up to N characters a request, and split the audio back apart '
+            '(wav only; default: a request per fragment)'
+        )
+    )
+    parser.add_argument(
+        '--report-out',
+        type=expanded_path,
+        default=None,
+        help=(
+            'The encoding report output file, CSV if it ends in .csv '
+            '(implies --report; default: [out-dir]/[basename]-report.json)'
+        )
+    )
     parser.add_argument(
         '--concat',
         action='store_true',
         default=False,
         help='Concatenate the encoded segment audio files into one audio file'
     )
+    parser.add_argument(
+        '--normalize',
+        action='store_true',
+        default=False,
+        help=(
+            'Bring every fragment to the same --loudness while concatenating '
+            '(wav only)'
+        )
+    )
+    parser.add_argument(
+        '--loudness',
+        type=float,
+        default=DEFAULT_LOUDNESS,
+        metavar='DBFS',
+        help=(
+            'The loudness --normalize brings each fragment to '
+            f'(default: {DEFAULT_LOUDNESS:g})'
+        )
+    )
+    parser.add_argument(
+        '--trim',
+        action='store_true',
+        default=False,
+        help=(
+            'Leave out the dead air at the ends of each fragment while '
+            'concatenating, so pauses are exactly --silence-duration (wav only)'
+        )
+    )
     parser.add_argument(
         '--audition',
         default=None,
@@ -294,6 +429,16 @@ def parse_args(args: list) -> Namespace:
         default='en',
         help='The spell-check dictionary language (default: en)'
     )
+    proof_group.add_argument(
+        '--spell-budget',
+        type=budget_seconds,
+        default=None,
+        metavar='SECONDS',
+        help=(
+            'The most seconds to spend finding spelling suggestions not found '
+            'on an earlier run; 0 finds none (default: no limit)'
+        )
+    )
     proof_group.add_argument(
         '--llm-url',
         default=os.environ.get('ZAPHODVOX_LLM_URL'),
@@ -311,6 +456,44 @@ def parse_args(args: list) -> Namespace:
             "server's loaded model)"
         )
     )
+    proof_group.add_argument(
+        '--llm-context',
+        type=positive_count,
+        default=os.environ.get('ZAPHODVOX_LLM_CONTEXT'),
+        metavar='TOKENS',
+        help=(
+            "The LLM model's context window, to size each chunk to "
+            '(default: $ZAPHODVOX_LLM_CONTEXT, else chunks of about '
+            f'{CHUNK_CHARS} characters)'
+        )
+    )
+    proof_group.add_argument(
+        '--llm-workers',
+        type=positive_count,
+        default=1,
+        metavar='N',
+        help=(
+            'The number of chunks to send the LLM server at once (default: 1)'
+        )
+    )
+    proof_group.add_argument(
+        '--llm-stream',
+        action='store_true',
+        help=(
+            'Have the LLM server stream its answers, so a malformed one is '
+            'noticed and asked for again without waiting for it to finish'
+        )
+    )
+    proof_group.add_argument(
+        '--no-llm-cache',
+        action='store_false',
+        dest='llm_cache',
+        help=(
+            'Send every chunk to the LLM server, rather than reusing the '
+            'answers for chunks unchanged since the last report or an earlier '
+            'pass (kept in $ZAPHODVOX_CACHE_DIR, else ~/.cache/zaphodvox)'
+        )
+    )
     parser.add_argument(
         '--concat-out',
         type=expanded_path,
@@ -414,5 +597,14 @@ def parse_args(args: list) -> Namespace:
         default='wav',
         help='The audio output format (default: wav)'
     )
+    qwen_group.add_argument(
+        '--qwen-stream',
+        action='store_true',
+        default=False,
+        help=(
+            'Have the server stream each fragment\'s audio as it is '
+            'generated, writing it as it arrives (wav only)'
+        )
+    )
 
-    return parser.parse_args(args)
+    return parser.parse_intermixed_args(args)
@@ -1,9 +1,12 @@
 import subprocess
 import wave
+from functools import lru_cache
+from io import BytesIO
 from pathlib import Path
 from tempfile import TemporaryDirectory
 from typing import NamedTuple, Optional
 
+import numpy as np
 from pydub import AudioSegment
 
 from zaphodvox.manifest import Manifest
@@ -28,6 +31,47 @@ _CHUNK_FRAMES = 1 << 14
 """How many frames to move at a time when copying audio, so that a long book is
 never held in memory all at once."""
 
+DEFAULT_LOUDNESS = -20.0
+"""The loudness (dBFS) `--normalize` brings every fragment to by default: the
+middle of the range audiobook platforms ask for (ACX wants -23 to -18 dB RMS)."""
+
+MAX_GAIN_DB = 12.0
+"""The most a fragment's level is ever changed by, either way. A fragment that
+measures far off the rest is more likely a mismeasured one (a single word, a
+breath) than one that wants a 30 dB boost of its noise floor."""
+
+_SAMPLE_DTYPES: dict[int, np.dtype] = {
+    1: np.dtype('<u1'), 2: np.dtype('<i2'), 4: np.dtype('<i4'),
+}
+"""The NumPy type of a PCM sample, by sample width. 8-bit `wav` is unsigned."""
+
+TRIM_THRESHOLD_DB = -50.0
+"""How quiet the ends of a fragment have to be to count as dead air, in dBFS.
+Well under the quietest consonant, well over a server's noise floor."""
+
+TRIM_PADDING_MS = 100
+"""How much of the dead air at each end trimming leaves in place, so the attack
+of the first word and the tail of the last are never clipped."""
+
+_TRIM_WINDOW_MS = 10
+"""The resolution, in milliseconds, that dead air is found at."""
+
+SPLIT_MIN_GAP_MS = 150
+"""How long a stretch of dead air has to be for `split_wav()` to cut at it.
+Longer than the gaps between words, shorter than the stops a batch's text puts
+between its fragments."""
+
+_LOUDNESS_BLOCK_MS = 100
+"""The length of the blocks loudness is gated over."""
+
+_ABSOLUTE_GATE_DB = -70.0
+"""Blocks quieter than this are silence, and do not count towards loudness."""
+
+_RELATIVE_GATE_DB = -10.0
+"""Blocks this far below the ungated loudness are pauses between words, and do
+not count either -- otherwise a fragment's level would depend on how much of it
+is gaps."""
+
 
 def audio_params(filepath: Path) -> Optional[AudioParams]:
     """Reads the sample format of an audio file.
@@ -58,6 +102,253 @@ def audio_params(filepath: Path) -> Optional[AudioParams]:
     )
 
 
+def audio_duration(data: bytes) -> Optional[float]:
+    """The duration of `wav` audio, from its header.
+
+    Only the header is read -- the audio is wherever the bytes came from, and
+    there is no call to decode it to count its samples.
+
+    Args:
+        data: The bytes of the `wav` file.
+
+    Returns:
+        The duration in seconds, or `None` if `data` is not a readable `wav`.
+    """
+    try:
+        with wave.open(BytesIO(data), 'rb') as w:
+            return w.getnframes() / w.getframerate()
+    except (EOFError, wave.Error, ZeroDivisionError):
+        return None
+
+
+def _samples(frames: bytes, sample_width: int) -> np.ndarray:
+    """Decodes raw PCM frames into floating-point samples.
+
+    Args:
+        frames: The raw PCM frames.
+        sample_width: The width of a sample, in bytes.
+
+    Returns:
+        The samples, scaled to `[-1.0, 1.0)`, interleaved as they were.
+
+    Raises:
+        ValueError: If the sample width is not one NumPy can read directly.
+    """
+    dtype = _SAMPLE_DTYPES.get(sample_width)
+    if dtype is None:
+        raise ValueError(f'Unsupported sample width: {sample_width}.')
+    samples = np.frombuffer(frames, dtype=dtype).astype(np.float64)
+    if sample_width == 1:
+        samples -= 128
+    return samples / (1 << (8 * sample_width - 1))
+
+
+def _frames(samples: np.ndarray, sample_width: int) -> bytes:
+    """Encodes floating-point samples back into raw PCM frames, clipping
+    anything pushed past full scale.
+
+    Args:
+        samples: The samples, scaled to `[-1.0, 1.0)`.
+        sample_width: The width of a sample, in bytes.
+
+    Returns:
+        The raw PCM frames.
+    """
+    dtype = _SAMPLE_DTYPES[sample_width]
+    scale = 1 << (8 * sample_width - 1)
+    ints = np.clip(np.rint(samples * scale), -scale, scale - 1)
+    if sample_width == 1:
+        ints += 128
+    return ints.astype(dtype).tobytes()
+
+
+def read_samples(filepath: Path) -> Optional[tuple[np.ndarray, int]]:
+    """Reads a `wav` file's samples.
+
+    Args:
+        filepath: The `Path` of the `wav` file.
+
+    Returns:
+        The samples, scaled to `[-1.0, 1.0)`, one row per frame and one column
+            per channel, and the frame rate -- or `None` if the file cannot be
+            read.
+    """
+    try:
+        with wave.open(str(filepath), 'rb') as w:
+            channels = w.getnchannels()
+            frame_rate = w.getframerate()
+            samples = _samples(w.readframes(w.getnframes()), w.getsampwidth())
+    except (OSError, EOFError, ValueError, wave.Error):
+        return None
+    return samples.reshape(-1, channels), frame_rate
+
+
+def _read_power(filepath: Path) -> Optional[tuple[np.ndarray, int]]:
+    """Reads a `wav` file's instantaneous power, frame by frame.
+
+    Args:
+        filepath: The `Path` of the `wav` file.
+
+    Returns:
+        The power of each frame (averaged over the channels) and the frame
+            rate, or `None` if the file cannot be read.
+    """
+    if (read := read_samples(filepath)) is None:
+        return None
+    samples, frame_rate = read
+    return np.square(samples).mean(axis=1), frame_rate
+
+
+def _block_power(power: np.ndarray, block: int) -> np.ndarray:
+    """Averages per-frame power over consecutive blocks of frames.
+
+    Args:
+        power: The power of each frame.
+        block: The number of frames in a block.
+
+    Returns:
+        The mean power of each whole block (a clip shorter than one block is
+            one block of its own).
+    """
+    if (count := len(power) // max(1, block)) == 0:
+        return power.mean(keepdims=True) if len(power) else power
+    return power[:count * block].reshape(count, block).mean(axis=1)
+
+
+def measure_loudness(filepath: Path) -> Optional[float]:
+    """Measures how loud a `wav` file's speech is.
+
+    The measure is gated RMS, after ITU-R BS.1770 without the K-weighting:
+    blocks of silence are ignored outright, and so are blocks far below the
+    level of the rest, so the pauses between words do not drag it down. What is
+    left is how loud the speaking itself is, which is what has to match from one
+    fragment to the next.
+
+    Args:
+        filepath: The `Path` of the `wav` file.
+
+    Returns:
+        The loudness in dBFS, or `None` if the file cannot be read or holds
+            nothing but silence.
+    """
+    if (read := _read_power(filepath)) is None:
+        return None
+    power, frame_rate = read
+    blocks = _block_power(power, frame_rate * _LOUDNESS_BLOCK_MS // 1000)
+    blocks = blocks[blocks > 10 ** (_ABSOLUTE_GATE_DB / 10)]
+    if not len(blocks):
+        return None
+    blocks = blocks[blocks > blocks.mean() * 10 ** (_RELATIVE_GATE_DB / 10)]
+    return float(10 * np.log10(blocks.mean()))
+
+
+def silence_bounds(filepath: Path) -> Optional[tuple[int, int]]:
+    """Finds the dead air at each end of a `wav` file.
+
+    The server pads its responses with a variable amount of near-silence.
+    Across a book that adds up to minutes, and it makes the pauses that
+    `--silence-duration` asks for anything but consistent: each one is the
+    configured length plus whatever the takes either side of it happened to
+    trail off with.
+
+    Args:
+        filepath: The `Path` of the `wav` file.
+
+    Returns:
+        The milliseconds of dead air to skip at the start and at the end
+            (less `TRIM_PADDING_MS` each), or `None` if the file cannot be read.
+            A file that is silent throughout is left alone, as `(0, 0)`.
+    """
+    if (read := _read_power(filepath)) is None:
+        return None
+    power, frame_rate = read
+    windows = _block_power(power, frame_rate * _TRIM_WINDOW_MS // 1000)
+    loud = np.flatnonzero(windows > 10 ** (TRIM_THRESHOLD_DB / 10))
+    if not len(loud):
+        return (0, 0)
+    total_ms = len(power) * 1000 // frame_rate
+    start = int(loud[0]) * _TRIM_WINDOW_MS - TRIM_PADDING_MS
+    end = total_ms - (int(loud[-1]) + 1) * _TRIM_WINDOW_MS - TRIM_PADDING_MS
+    return (max(0, start), max(0, end))
+
+
+def split_wav(
+    filepath: Path, filepaths: list[Path]
+) -> Optional[list[float]]:
+    """Splits a `wav` take of several fragments back into one file each.
+
+    The fragments were read with a long stop between each, so the cuts go in
+    the middle of the longest stretches of dead air -- leaving each piece
+    trailing off the way a take of its own would, for `silence_bounds()` to
+    find. Only the gaps inside the take count: the dead air the server pads
+    either end with is not between anything.
+
+    Args:
+        filepath: The `Path` of the `wav` take.
+        filepaths: The `Path`s to write the pieces to, in order.
+
+    Returns:
+        The seconds of audio in each piece, or `None` if the take cannot be
+            read or has fewer gaps than it needs cuts (nothing is written).
+    """
+    try:
+        with wave.open(str(filepath), 'rb') as w:
+            params = AudioParams(
+                channels=w.getnchannels(),
+                sample_width=w.getsampwidth(),
+                frame_rate=w.getframerate(),
+            )
+            frames = w.readframes(w.getnframes())
+            samples = _samples(frames, params.sample_width)
+    except (OSError, EOFError, ValueError, wave.Error):
+        return None
+    power = np.square(samples).reshape(-1, params.channels).mean(axis=1)
+    window = params.frame_rate * _TRIM_WINDOW_MS // 1000
+    quiet = _block_power(power, window) <= 10 ** (TRIM_THRESHOLD_DB / 10)
+    edges = np.diff(np.concatenate(([0], quiet.astype(np.int8), [0])))
+    gaps = [
+        (int(end - start), int(start), int(end))
+        for start, end in zip(
+            np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+        )
+        if 0 < start and end < len(quiet)
+        and (end - start) * _TRIM_WINDOW_MS >= SPLIT_MIN_GAP_MS
+    ]
+    if len(gaps) < len(filepaths) - 1:
+        return None
+    longest = sorted(gaps, reverse=True)[:len(filepaths) - 1]
+    cuts = sorted((start + end) // 2 * window for _, start, end in longest)
+    bounds = [0, *cuts, len(power)]
+    width = params.sample_width * params.channels
+    durations = []
+    for path, start, end in zip(filepaths, bounds, bounds[1:]):
+        with wave.open(str(path), 'wb') as out:
+            out.setnchannels(params.channels)
+            out.setsampwidth(params.sample_width)
+            out.setframerate(params.frame_rate)
+            out.writeframes(frames[start * width:end * width])
+        durations.append((end - start) / params.frame_rate)
+    return durations
+
+
+def loudness_gain(loudness: Optional[float], target: float) -> float:
+    """The factor to scale a fragment's samples by to bring it to a target
+    loudness.
+
+    Args:
+        loudness: The fragment's measured loudness in dBFS (`None` for silence,
+            which has no level to correct).
+        target: The loudness to bring it to, in dBFS.
+
+    Returns:
+        The linear gain (`1.0` to leave the fragment alone).
+    """
+    if loudness is None:
+        return 1.0
+    gain_db = min(max(target - loudness, -MAX_GAIN_DB), MAX_GAIN_DB)
+    return float(10 ** (gain_db / 20))
+
+
 def create_silence(
     duration: int, filepath: Path, format: str,
     params: Optional[AudioParams] = None
@@ -70,7 +361,10 @@ def create_silence(
     would force the whole book to be decoded and resampled.
 
     A silent `wav` is written directly, without `pydub` or `ffmpeg` -- silence is
-    just zeroed samples, and there is nothing to encode.
+    just zeroed samples, and there is nothing to encode -- from one shared block
+    of zeros rather than a buffer the length of the pause. Any other format is
+    encoded once per duration and sample format, and every later silence like
+    it is a copy of those bytes.
 
     Args:
         duration: The duration of the silent audio in milliseconds.
@@ -81,28 +375,77 @@ def create_silence(
     """
     params = params or DEFAULT_PARAMS
     if format == 'wav':
-        frames = int(params.frame_rate * duration / 1000)
         with wave.open(str(filepath), 'wb') as w:
             w.setnchannels(params.channels)
             w.setsampwidth(params.sample_width)
             w.setframerate(params.frame_rate)
-            w.writeframes(
-                bytes(frames * params.sample_width * params.channels)
-            )
+            _write_zeros(w, params, int(params.frame_rate * duration / 1000))
         return
+    filepath.write_bytes(_encoded_silence(duration, params, format))
+
+
+@lru_cache(maxsize=None)
+def _zero_block(params: AudioParams) -> memoryview:
+    """A block of `_CHUNK_FRAMES` zeroed frames in the given sample format.
+
+    Args:
+        params: The `AudioParams` of the frames.
+
+    Returns:
+        A read-only `memoryview` of the block, to be sliced without copying.
+    """
+    return memoryview(
+        bytes(_CHUNK_FRAMES * params.sample_width * params.channels)
+    )
+
+
+def _write_zeros(out: wave.Wave_write, params: AudioParams, frames: int) -> None:
+    """Writes zeroed frames to an open `wav` file, a block at a time.
+
+    Args:
+        out: The open `wave.Wave_write` to write to.
+        params: The `AudioParams` the file is being written in.
+        frames: How many frames to write.
+    """
+    block = _zero_block(params)
+    frame_size = params.sample_width * params.channels
+    while frames > 0:
+        count = min(_CHUNK_FRAMES, frames)
+        out.writeframes(block[:count * frame_size])
+        frames -= count
+
+
+@lru_cache(maxsize=32)
+def _encoded_silence(duration: int, params: AudioParams, format: str) -> bytes:
+    """A silence encoded in the given format, made once per set of arguments.
+
+    A book pauses for the same few lengths over and over, and every one of
+    them would otherwise be another `ffmpeg` process.
+
+    Args:
+        duration: The duration of the silence in milliseconds.
+        params: The `AudioParams` to encode the silence in.
+        format: The format to encode the silence in.
+
+    Returns:
+        The encoded file's bytes.
+    """
     silence = AudioSegment.silent(
         duration=duration, frame_rate=params.frame_rate
     )
     silence = silence.set_channels(params.channels)
     silence = silence.set_sample_width(params.sample_width)
-    silence.export(str(filepath), format=format)
+    with silence.export(format=format) as encoded:
+        return encoded.read()
 
 
 def concat_files(
     audio_dir: Path,
     manifest: Manifest,
     format: str,
-    output_filepath: Path
+    output_filepath: Path,
+    loudness: Optional[float] = None,
+    trim: bool = False
 ) -> None:
     """Concatenates fragment audio files together and exports the result
     to a specified output file.
@@ -114,14 +457,16 @@ def concat_files(
         format: The format of the fragment audio files.
         output_filepath: The `Path` to the output file where the
             concatenated audio will be saved.
+        loudness: The loudness in dBFS to bring every speech fragment to as it
+            is copied. Defaults to `None` (leave the levels as they are).
+        trim: Whether to leave out the dead air at the ends of each speech
+            fragment. Defaults to `False`.
 
     Raises:
         FileNotFoundError: If any fragment's audio file is missing.
+        ValueError: If `loudness` or `trim` is asked of fragments that are not
+            `wav`.
     """
-    filepaths = [
-        audio_dir / fragment.filename
-        for fragment in manifest.fragments if fragment.filename
-    ]
     speech = [
         audio_dir / fragment.filename
         for fragment in manifest.fragments
@@ -131,7 +476,9 @@ def concat_files(
     # hole in the book, not something to work around. Concatenating what is
     # there would hand back a finished-looking audiobook with the missing
     # fragments silently dropped out of it.
-    if missing := [f for f in filepaths if not f.is_file()]:
+    # A silence has no file unless `--silence-files` wrote one; it is made up
+    # from its duration as it is copied in.
+    if missing := [f for f in speech if not f.is_file()]:
         listed = ', '.join(f.name for f in missing[:5])
         if len(missing) > 5:
             listed += f', and {len(missing) - 5} more'
@@ -139,28 +486,104 @@ def concat_files(
             f'{len(missing)} fragment(s) have no audio file: {listed}. '
             'Re-encode them (--encode --indexes ...) before concatenating.'
         )
+    if format != 'wav' and (loudness is not None or trim):
+        # Levelling and trimming happen in the copy loop, and an encoded
+        # fragment is never in hand as samples -- `ffmpeg` reads it itself.
+        raise ValueError(
+            f'Normalizing and trimming need wav fragments, not {format}.'
+        )
+    parts = _parts(audio_dir, manifest, loudness, trim)
     if format == 'wav':
-        _concat_wav(filepaths, speech, output_filepath)
+        _concat_wav(parts, speech, output_filepath)
     else:
-        _concat_encoded(filepaths, output_filepath, format)
+        _concat_encoded(parts, speech, output_filepath, format)
+
+
+class _Part(NamedTuple):
+    """One fragment audio file, and how it is to be copied into a `wav`."""
+
+    filepath: Path
+    """The `Path` of the audio file."""
+    gain: float = 1.0
+    """The linear gain to scale its samples by."""
+    trim_start: int = 0
+    """The milliseconds to leave out at its start."""
+    trim_end: int = 0
+    """The milliseconds to leave out at its end."""
+    silence: Optional[int] = None
+    """The milliseconds of silence to make up in its place, when it is a
+    silence that has no file."""
+
+
+def _parts(
+    audio_dir: Path, manifest: Manifest, loudness: Optional[float], trim: bool
+) -> list[_Part]:
+    """How each fragment is to be copied into the concatenated book.
+
+    A fragment's loudness and dead air are measured when it is encoded and kept
+    in the manifest, so levelling and trimming a book cost nothing beyond the
+    copy it was getting anyway. Only a fragment encoded before there was a
+    measurement is read here to take one, and the manifest is filled in with it.
+
+    Args:
+        audio_dir: The directory `Path` containing the fragment audio files.
+        manifest: The `Manifest` of the fragments being concatenated.
+        loudness: The loudness to bring speech to, in dBFS, or `None`.
+        trim: Whether to leave out the dead air at the ends of speech.
+
+    Returns:
+        The `_Part`s, one per fragment that has a filename, in order.
+    """
+    parts: list[_Part] = []
+    for fragment in manifest.fragments:
+        if not fragment.filename:
+            continue
+        filepath = audio_dir / fragment.filename
+        if not fragment.text:
+            if filepath.is_file():
+                parts.append(_Part(filepath))
+            else:
+                parts.append(
+                    _Part(filepath, silence=fragment.silence_duration or 0)
+                )
+            continue
+        gain = 1.0
+        if loudness is not None:
+            if fragment.loudness is None:
+                fragment.loudness = measure_loudness(filepath)
+            gain = loudness_gain(fragment.loudness, loudness)
+        trim_start = trim_end = 0
+        if trim:
+            if fragment.trim_start is None or fragment.trim_end is None:
+                fragment.trim_start, fragment.trim_end = (
+                    silence_bounds(filepath) or (None, None)
+                )
+            trim_start = fragment.trim_start or 0
+            trim_end = fragment.trim_end or 0
+        parts.append(_Part(filepath, gain, trim_start, trim_end))
+    return parts
 
 
 def _concat_wav(
-    filepaths: list[Path], speech: list[Path], output_filepath: Path
+    parts: list[_Part], speech: list[Path], output_filepath: Path
 ) -> None:
     """Concatenates `wav` files by copying their samples straight through.
 
     Nothing is decoded, re-encoded or held in memory: the frames of each
     fragment are appended to the output as they are read. A fragment whose
     sample format differs from the rest (an older silence file, say) is the one
-    case that has to be converted, and only that fragment is.
+    case that has to be converted, and only that fragment is. A fragment being
+    levelled is scaled chunk by chunk on its way through, and a trimmed one has
+    its dead air skipped rather than copied, so both are part of the one copy
+    rather than a second pass over the finished book.
 
     Args:
-        filepaths: The `Path`s of the audio files to concatenate, in order.
+        parts: The `_Part`s to concatenate, in order.
         speech: The `Path`s of the fragments that are speech rather than
             silence, whose sample format the output takes.
         output_filepath: The `Path` of the concatenated output file.
     """
+    filepaths = [part.filepath for part in parts]
     # Take the output format from the *speech*, never from a silent fragment: a
     # book encoded before silence matched the speech has 11 kHz silence in it,
     # and a book that opens with a blank line would otherwise be downsampled to
@@ -177,31 +600,49 @@ def _concat_wav(
             out.setnchannels(target.channels)
             out.setsampwidth(target.sample_width)
             out.setframerate(target.frame_rate)
-            for filepath in filepaths:
+            for part in parts:
                 try:
-                    _append_wav(filepath, out, target)
+                    _append_wav(part, out, target)
                 except Exception as e:
-                    bar.console.print(f'Skipping {filepath.name}: {e}')
+                    bar.console.print(f'Skipping {part.filepath.name}: {e}')
                 bar.next()
 
 
 def _append_wav(
-    filepath: Path, out: wave.Wave_write, target: AudioParams
+    part: _Part, out: wave.Wave_write, target: AudioParams
 ) -> None:
     """Appends one audio file's samples to an open `wav` file.
 
     Args:
-        filepath: The `Path` of the audio file to append.
+        part: The `_Part` to append.
         out: The open `wave.Wave_write` to append to.
         target: The `AudioParams` the output is being written in.
 
     Raises:
         Exception: If the file cannot be read.
     """
+    if part.silence is not None:
+        _write_zeros(out, target, target.frame_rate * part.silence // 1000)
+        return
+    filepath = part.filepath
+    width = target.sample_width
+    levelled = part.gain != 1.0 and width in _SAMPLE_DTYPES
     try:
         with wave.open(str(filepath), 'rb') as w:
             if audio_params(filepath) == target:
-                while frames := w.readframes(_CHUNK_FRAMES):
+                rate = target.frame_rate
+                start = min(rate * part.trim_start // 1000, w.getnframes())
+                end = rate * part.trim_end // 1000
+                remaining = max(0, w.getnframes() - start - end)
+                w.setpos(start)
+                while remaining and (
+                    frames := w.readframes(min(_CHUNK_FRAMES, remaining))
+                ):
+                    remaining -= len(frames) // (width * target.channels)
+                    if levelled:
+                        frames = _frames(
+                            _samples(frames, width) * part.gain, width
+                        )
                     out.writeframes(frames)
                 return
     except wave.Error:
@@ -209,12 +650,18 @@ def _append_wav(
     segment = AudioSegment.from_file(str(filepath))
     segment = segment.set_frame_rate(target.frame_rate)
     segment = segment.set_channels(target.channels)
-    segment = segment.set_sample_width(target.sample_width)
-    out.writeframes(segment.raw_data)
+    segment = segment.set_sample_width(width)
+    if part.trim_start or part.trim_end:
+        segment = segment[part.trim_start:len(segment) - part.trim_end]
+    frames = segment.raw_data
+    if levelled:
+        frames = _frames(_samples(frames, width) * part.gain, width)
+    out.writeframes(frames)
 
 
 def _concat_encoded(
-    filepaths: list[Path], output_filepath: Path, format: str
+    parts: list[_Part], speech: list[Path], output_filepath: Path,
+    format: str
 ) -> None:
     """Concatenates encoded (e.g. `mp3`) files in a single `ffmpeg` pass.
 
@@ -224,13 +671,38 @@ def _concat_encoded(
     `mp3` carries its own encoder padding, which would add a small gap of
     silence at every fragment boundary.
 
+    A silence that has no file of its own is written once per duration to a
+    scratch directory, in the speech's sample format, and listed as many times
+    as the book pauses for that long.
+
     Args:
-        filepaths: The `Path`s of the audio files to concatenate, in order.
+        parts: The `_Part`s to concatenate, in order.
+        speech: The `Path`s of the fragments that are speech rather than
+            silence, whose sample format the silence takes.
         output_filepath: The `Path` of the concatenated output file.
         format: The format of the audio files.
     """
     with ProgressBar('Concatinating', total=None) as bar:
         with TemporaryDirectory() as tmp:
+            params: Optional[AudioParams] = None
+            silences: dict[int, Path] = {}
+            filepaths: list[Path] = []
+            for part in parts:
+                if part.silence is None:
+                    filepaths.append(part.filepath)
+                elif part.silence:
+                    if part.silence not in silences:
+                        params = params or next(
+                            (p for p in map(audio_params, speech) if p), None
+                        )
+                        silences[part.silence] = (
+                            Path(tmp) / f'silence-{part.silence}.{format}'
+                        )
+                        create_silence(
+                            part.silence, silences[part.silence], format,
+                            params
+                        )
+                    filepaths.append(silences[part.silence])
             listfile = Path(tmp) / 'concat.txt'
             listfile.write_text(
                 ''.join(
@@ -1,8 +1,18 @@
+import hashlib
+import json
+import os
+from importlib.metadata import PackageNotFoundError, version
 from pathlib import Path
 from typing import Optional
 
 from spellchecker import SpellChecker
 
+from zaphodvox.paths import atomic_write
+
+SPELLER_CACHE_SIZE = 8
+"""How many built dictionaries to keep: one per language and project wordlist
+in use, and each a couple of megabytes."""
+
 
 def _read_words(path: Optional[Path]) -> list[str]:
     """Reads the words from a wordlist file (one word per line, `#` comments).
@@ -66,18 +76,92 @@ def add_words(path: Path, new_words: list[str]) -> list[str]:
 
 
 def build_speller(
-    language: str = 'en', custom_words: Optional[set[str]] = None
+    language: str = 'en', custom_words: Optional[set[str]] = None,
+    cache: Optional[Path] = None
 ) -> SpellChecker:
     """Builds a `SpellChecker` for the given language, seeded with custom words.
 
+    Building one means decompressing and parsing the language's whole word
+    list, which takes longer than the proofing of a short text. With a
+    `cache`, the built dictionary's word frequencies are kept, as plain JSON,
+    under its `dictionary_version()` -- so a change to the wordlist builds a
+    new one -- and read back in less time. Plain data, rather than a pickle:
+    reading a cache that someone else can write to must not run their code.
+
     Args:
         language: The dictionary language (e.g. `en`).
         custom_words: Extra known words to accept (e.g. a project wordlist).
+        cache: The directory `Path` to keep built dictionaries in, if any.
 
     Returns:
         The configured `SpellChecker`.
     """
+    path = None
+    if cache is not None:
+        path = cache / f'{dictionary_version(language, custom_words)}.json'
+        try:
+            with open(str(path), 'r', encoding='utf-8') as file:
+                frequencies = json.load(file)
+            if not isinstance(frequencies, dict):
+                raise ValueError('Not a word list.')
+            speller = SpellChecker(language=None)
+            speller.word_frequency.load_json(frequencies)
+            # Kept in use, so not among the first to go.
+            os.utime(path)
+            return speller
+        except (OSError, ValueError, TypeError):
+            # Missing, truncated, or not word frequencies: it is rebuilt.
+            pass
     speller = SpellChecker(language=language)
     if custom_words:
         speller.word_frequency.load_words(custom_words)
+    if path is not None:
+        _keep_speller(path, speller)
     return speller
+
+
+def _keep_speller(path: Path, speller: SpellChecker) -> None:
+    """Keeps a built dictionary's word frequencies in the cache, and the
+        `SPELLER_CACHE_SIZE` most recently used, if the cache can be
+        written.
+
+    Args:
+        path: The `Path` to keep the dictionary at.
+        speller: The `SpellChecker`.
+    """
+    try:
+        atomic_write(path, json.dumps(
+            dict(speller.word_frequency.dictionary), separators=(',', ':')
+        ))
+        kept = sorted(
+            path.parent.glob('*.json'), key=lambda p: p.stat().st_mtime,
+            reverse=True
+        )
+        for stale in kept[SPELLER_CACHE_SIZE:]:
+            stale.unlink()
+    except OSError:
+        pass
+
+
+def dictionary_version(
+    language: str = 'en', custom_words: Optional[set[str]] = None
+) -> str:
+    """Identifies a dictionary, for the caches of what it has said.
+
+    A spelling suggestion depends on every word the `SpellChecker` knows: its
+    language, the word list `pyspellchecker` ships (which changes between its
+    releases), and the project's own words.
+
+    Args:
+        language: The dictionary language (e.g. `en`).
+        custom_words: The extra known words, if any.
+
+    Returns:
+        A hex digest.
+    """
+    try:
+        release = version('pyspellchecker')
+    except PackageNotFoundError:
+        release = ''
+    payload = json.dumps([language, release, sorted(custom_words or ())])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
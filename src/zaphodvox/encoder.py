@@ -1,15 +1,68 @@
 import re
+import shutil
 from abc import ABC, abstractmethod
 from argparse import Namespace
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Callable, NamedTuple, Optional
-
-from zaphodvox.audio import AudioParams, audio_params, create_silence
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Callable, NamedTuple, Optional, Sequence
+
+from zaphodvox.audio import (
+    AudioParams,
+    audio_params,
+    create_silence,
+    measure_loudness,
+    silence_bounds,
+    split_wav,
+)
 from zaphodvox.manifest import Fragment, Manifest
 from zaphodvox.progress import ProgressBar
+from zaphodvox.timing import EncodeReport, Transfer
 from zaphodvox.voice import Voice
 
+BATCH_BREAK = '\n' * 4
+"""What is put between the fragments of a batched request: a run of blank lines,
+for `break_tag()` to render as a pause long enough to be told from a comma."""
+
+BATCH_PAUSE_MS = 1000
+"""The pause asked of `break_tag()` between the fragments of a batched
+request."""
+
+SPLIT_TOLERANCE = 0.35
+"""How far, as a share of it, a piece of a split take may be from the length
+its text should take up before the split is distrusted."""
+
+
+class _Job(NamedTuple):
+    """A fragment to be synthesized."""
+
+    position: int
+    """The fragment's index in the manifest."""
+    fragment: Fragment
+    """The `Fragment`, with its voice resolved."""
+    filepath: Path
+    """The `Path` to write its audio to."""
+    duration: Optional[int]
+    """Its silence duration in milliseconds, if any."""
+    chars: int
+    """The characters of text it was planned with."""
+
+
+class _Take(NamedTuple):
+    """A synthesized fragment."""
+
+    job: _Job
+    """The `_Job` that was synthesized."""
+    transfer: Optional[Transfer]
+    """How its audio came back, if the encoder measures it."""
+    seconds: float
+    """The wall-clock seconds it took."""
+    batch: Optional[int] = None
+    """The manifest index of the first fragment of the request it shared, if
+    it was batched."""
+
 
 class PresetVoice(NamedTuple):
     """A built-in speaker offered by a server."""
@@ -96,7 +149,9 @@ class Encoder(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def t2s(self, text: str, voice: Voice, filepath: Path) -> None:
+    def t2s(
+        self, text: str, voice: Voice, filepath: Path
+    ) -> Optional[Transfer]:
         """Convert text to speech using the specified voice and save it to the
         given filepath.
 
@@ -104,9 +159,35 @@ class Encoder(ABC):
             text: The text to be converted to speech.
             voice: The `Voice` to be used for the speech conversion.
             filepath: The `Path` of the generated audio file.
+
+        Returns:
+            How the audio came back, for the run report, or `None` if the
+                encoder does not measure it.
         """
         raise NotImplementedError
 
+    def t2s_batch(
+        self, texts: list[str], voice: Voice, filepaths: list[Path]
+    ) -> Optional[list[Transfer]]:
+        """Convert several texts to speech in a single request, where the
+        engine can, saving each to its own file.
+
+        The default cannot: the caller then reads the texts together in one
+        `t2s()` request and splits the take itself, or failing that makes a
+        request of each. Subclasses override this for a server with a batch
+        endpoint.
+
+        Args:
+            texts: The texts to convert to speech.
+            voice: The `Voice` to use for all of them.
+            filepaths: The `Path`s of the generated audio files.
+
+        Returns:
+            A `Transfer` per text (each carrying the whole request's timings),
+                or `None` if the texts cannot be synthesized together.
+        """
+        return None
+
     @staticmethod
     def fragment_voice(
         fragment: Fragment, voices: dict[str, Optional[Voice]]
@@ -131,6 +212,30 @@ class Encoder(ABC):
             raise ValueError('No voice specified.')
         return voice
 
+    def synthesis_key(self, text: str, voice: Voice) -> Optional[str]:
+        """The key two fragments share when they would come back as the same
+        audio, so one synthesis can serve both.
+
+        Books repeat themselves -- chapter headings, `* * *` dividers, refrains
+        -- but only a voice with a fixed `seed` says the same thing the same
+        way twice. Without one, each take is a fresh draw, and quietly reusing
+        it would be a change in what `--encode` produces.
+
+        Args:
+            text: The text to be synthesized, break tags and all.
+            voice: The `Voice` it is to be synthesized with.
+
+        Returns:
+            The key, or `None` if the fragment must be synthesized on its own.
+        """
+        if voice.seed is None:
+            return None
+        ref_audio = voice.resolved_ref_audio
+        return '\n'.join([
+            type(self).__name__, text, voice.model_dump_json(),
+            ref_audio.as_posix() if ref_audio else ''
+        ])
+
     def validate_voice(self, voice: Voice) -> None:
         """Check that a `Voice` can actually be synthesized, before any encoding
         begins. The default accepts every voice; subclasses override to verify
@@ -144,11 +249,29 @@ class Encoder(ABC):
         """
         return None
 
+    def warmup(self, voices: list[Voice]) -> None:
+        """Get the server ready to synthesize the given voices, before the
+        first fragment is asked of it. The default does nothing; subclasses
+        whose server is slow to start override it.
+
+        Args:
+            voices: The distinct `Voice`s the encode will use.
+        """
+        return None
+
     def encode_manifest(
         self, manifest: Manifest, encode_dir: Optional[Path] = None,
         indexes: Optional[list[int]] = None,
         voices: Optional[dict[str, Optional[Voice]]] = None,
-        silence_duration: Optional[int] = None
+        silence_duration: Optional[int] = None,
+        normalize: bool = False,
+        trim: bool = False,
+        silence_files: bool = False,
+        report: Optional[EncodeReport] = None,
+        warmup: bool = False,
+        workers: int = 1,
+        batch_chars: Optional[int] = None,
+        on_encoded: Optional[Callable[[int, Fragment], None]] = None
     ) -> Manifest:
         """Encodes the given `Manifest` into audio files and saves them to the
         specified directory.
@@ -161,23 +284,120 @@ class Encoder(ABC):
                 to encode. Defaults to `None` which indicates all objects.
             voices: A dictionary of name/`Voice` pairs.
             silence_duration: The duration of silence in milliseconds.
+            normalize: Whether to measure each fragment's loudness as it is
+                encoded, for `--normalize` to level it by. Defaults to `False`.
+            trim: Whether to find the dead air at the ends of each fragment as
+                it is encoded, for `--trim` to leave out. Defaults to `False`.
+            silence_files: Whether to write an audio file for each silence
+                fragment. Defaults to `False`: a silence is only its duration
+                in the manifest, and is synthesized when the book is
+                concatenated.
+            report: The `EncodeReport` to record each synthesized fragment's
+                timing in. Defaults to `None` (not timed).
+            warmup: Whether to `warmup()` the server for the voices to be
+                synthesized first. Defaults to `False`.
+            workers: How many fragments to synthesize at once. Defaults to `1`
+                (one after another, in order).
+            batch_chars: The most characters of consecutive short fragments
+                in the same voice to synthesize in one request, and split back
+                apart (`wav` only). Defaults to `None` (a request each).
+            on_encoded: Called with each fragment's manifest index and the
+                `Fragment` as soon as it is encoded, in the order they finish.
+                Defaults to `None`.
 
         Returns:
             The `Manifest` with the encoded fragments info.
         """
         voices = voices or {}
         indexes = indexes or list(range(manifest.length))
-        fragments = [manifest.fragments[i] for i in indexes]
+        fragments = [(i, manifest.fragments[i]) for i in indexes]
         # Resolve and check every voice up front: a bad reference should fail
         # on the command line, not two hundred fragments into a long encode.
-        for fragment in fragments:
+        used: list[Voice] = []
+        for _, fragment in fragments:
             if fragment.filename is not None and fragment.text:
-                self.validate_voice(self.fragment_voice(fragment, voices))
-        total_chars = sum([len(s.text) for s in fragments])
+                voice = self.fragment_voice(fragment, voices)
+                self.validate_voice(voice)
+                if voice not in used:
+                    used.append(voice)
+        if warmup and used:
+            self.warmup(used)
+        total_chars = sum([len(s.text) for _, s in fragments])
         silences: list[tuple[int, Path]] = []
         params: Optional[AudioParams] = None
+        pending: list[list[_Job]] = []
+        sources: dict[str, _Job] = {}
+        copies: list[tuple[_Job, _Job]] = []
+        batch: list[_Job] = []
+        limit = (batch_chars or 0) if self.audio_format == 'wav' else 0
+        if report is not None:
+            # Timed from here, not from the warmup, and by the wall clock:
+            # with several workers the fragments' own times overlap.
+            report.started = datetime.now(timezone.utc)
         with ProgressBar('Encoding', total=total_chars) as bar:
-            for fragment in fragments:
+
+            def finish(take: _Take) -> None:
+                job = take.job
+                fragment = job.fragment
+                if report is not None:
+                    report.add(
+                        job.position, job.filepath.name, job.chars,
+                        take.seconds, take.transfer, take.batch
+                    )
+                    report.finished = datetime.now(timezone.utc)
+                    if (rtf := report.real_time_factor) is not None:
+                        bar.status(f'{rtf:.2f}× real time')
+                # A new take invalidates the old measurement. Taking the new
+                # one now, while the file is fresh in the page cache, means
+                # `--normalize` never reads the book twice.
+                fragment.loudness = (
+                    measure_loudness(job.filepath) if normalize else None
+                )
+                bounds = silence_bounds(job.filepath) if trim else None
+                fragment.trim_start, fragment.trim_end = bounds or (None, None)
+                bar.next(n=job.chars)
+                self._stamp(fragment, job.filepath, job.duration)
+                if on_encoded is not None:
+                    on_encoded(job.position, fragment)
+
+            def copy(job: _Job, source: _Job) -> None:
+                shutil.copyfile(source.filepath, job.filepath)
+                if report is not None:
+                    report.coalesced += 1
+                fragment = job.fragment
+                fragment.loudness = source.fragment.loudness
+                fragment.trim_start = source.fragment.trim_start
+                fragment.trim_end = source.fragment.trim_end
+                bar.next(n=job.chars)
+                self._stamp(fragment, job.filepath, job.duration)
+                if on_encoded is not None:
+                    on_encoded(job.position, fragment)
+
+            def submit(jobs: list[_Job]) -> None:
+                if workers > 1:
+                    pending.append(jobs)
+                else:
+                    for take in self._synthesize(jobs):
+                        finish(take)
+
+            def flush() -> None:
+                if batch:
+                    submit(list(batch))
+                    batch.clear()
+
+            def queue(job: _Job) -> None:
+                if job.chars > limit:
+                    flush()
+                    submit([job])
+                    return
+                if batch and (
+                    job.fragment.voice != batch[0].fragment.voice
+                    or sum(j.chars for j in batch) + job.chars > limit
+                ):
+                    flush()
+                batch.append(job)
+
+            for index, fragment in fragments:
                 if fragment.filename is not None:
                     filepath = self.fragment_path(fragment.filename, encode_dir)
                     if (duration := silence_duration) is None:
@@ -190,8 +410,29 @@ class Encoder(ABC):
                                 fragment.text
                             )
                         fragment.voice = self.fragment_voice(fragment, voices)
-                        self.t2s(fragment.text, fragment.voice, filepath)
-                        bar.next(n=num_chars)
+                        job = _Job(
+                            index, fragment, filepath, duration, num_chars
+                        )
+                        key = self.synthesis_key(fragment.text, fragment.voice)
+                        if key is not None and key in sources:
+                            source = sources[key]
+                            if workers > 1:
+                                copies.append((job, source))
+                            else:
+                                if source in batch:
+                                    flush()
+                                copy(job, source)
+                            continue
+                        if key is not None:
+                            sources[key] = job
+                        queue(job)
+                        continue
+                    if duration and not silence_files:
+                        # Nothing to write -- `concat_files()` makes the pause
+                        # up as zeroed frames. A file left by an earlier run
+                        # would be copied in its place, at whatever length that
+                        # run asked for, so it goes.
+                        filepath.unlink(missing_ok=True)
                     elif duration:
                         # Written as soon as there is speech to copy the sample
                         # format from -- see `silence_params()` -- and no later:
@@ -209,11 +450,14 @@ class Encoder(ABC):
                             # No speech on disk yet: a book that opens with a
                             # blank line has nothing to copy a format from.
                             silences.append((duration, filepath))
-                    fragment.encoded = datetime.now(timezone.utc)
-                    fragment.filename = filepath.name
-                    fragment.encoder = self.name
-                    fragment.silence_duration = duration
-                    fragment.audio_format = self.audio_format
+                    self._stamp(fragment, filepath, duration)
+                    if on_encoded is not None:
+                        on_encoded(index, fragment)
+            flush()
+            if pending:
+                self._synthesize_all(pending, workers, finish)
+            for job, source in copies:
+                copy(job, source)
         if silences:
             params = self.silence_params(manifest, encode_dir)
             for duration, filepath in silences:
@@ -222,6 +466,197 @@ class Encoder(ABC):
                 )
         return manifest
 
+    def _synthesize(self, jobs: list['_Job']) -> list['_Take']:
+        """Synthesizes fragments, timing them: in one request if there are
+        several and they can be split apart again, else one request each.
+
+        Args:
+            jobs: The `_Job`s to synthesize, in the same voice.
+
+        Returns:
+            A `_Take` per job.
+        """
+        if len(jobs) > 1:
+            voice = jobs[0].fragment.voice
+            assert voice is not None
+            start = perf_counter()
+            transfers = self.t2s_batch(
+                [job.fragment.text for job in jobs], voice,
+                [job.filepath for job in jobs]
+            )
+            if transfers is not None:
+                return self._shared(jobs, transfers, perf_counter() - start)
+            if takes := self._synthesize_batch(jobs):
+                return takes
+        takes = []
+        for job in jobs:
+            start = perf_counter()
+            assert job.fragment.voice is not None
+            transfer = self.t2s(
+                job.fragment.text, job.fragment.voice, job.filepath
+            )
+            takes.append(_Take(job, transfer, perf_counter() - start))
+        return takes
+
+    def _synthesize_batch(self, jobs: list['_Job']) -> Optional[list['_Take']]:
+        """Synthesizes several short fragments in one request, and splits the
+        take back into a file for each.
+
+        A one-line fragment pays the whole of a request's overhead -- the model
+        dispatch, the upload of a clone's reference clip -- for a second of
+        audio. Read together, with a long stop between each, they pay it once,
+        and the stops are where `split_wav()` cuts. The request's time is
+        shared out between the fragments by their length.
+
+        A fragment with a long pause of its own can be cut there instead, and
+        its end read as the start of the next. So each piece is checked
+        against its share of the take, by length of text (`_split_fits()`),
+        and a take whose pieces do not fit is thrown away.
+
+        Args:
+            jobs: The `_Job`s to synthesize, in the same voice.
+
+        Returns:
+            A `_Take` per job, or `None` if the take could not be split into as
+                many pieces that fit them (nothing is kept, and the caller
+                synthesizes them one at a time instead).
+        """
+        voice = jobs[0].fragment.voice
+        assert voice is not None
+        stop = re.sub(
+            r'(\n{2,})', self.break_tag(BATCH_PAUSE_MS), BATCH_BREAK
+        )
+        text = stop.join(job.fragment.text for job in jobs)
+        with TemporaryDirectory(dir=jobs[0].filepath.parent) as tmp:
+            filepath = Path(tmp) / f'batch.{self.file_extension}'
+            start = perf_counter()
+            transfer = self.t2s(text, voice, filepath)
+            seconds = perf_counter() - start
+            durations = split_wav(filepath, [job.filepath for job in jobs])
+        if durations is None:
+            return None
+        if not self._split_fits(jobs, durations):
+            for job in jobs:
+                job.filepath.unlink(missing_ok=True)
+            return None
+        chars = sum(job.chars for job in jobs)
+        return self._shared(jobs, [
+            transfer._replace(
+                received=int(transfer.received * job.chars / chars),
+                duration=duration
+            ) if transfer is not None else None
+            for job, duration in zip(jobs, durations)
+        ], seconds)
+
+    @staticmethod
+    def _split_fits(jobs: list['_Job'], durations: list[float]) -> bool:
+        """Whether the pieces of a split take are about as long as their texts.
+
+        The stops between the fragments are taken to be as long as asked
+        (`BATCH_PAUSE_MS`), and shared evenly between the pieces; the rest of
+        the take, the speech, is shared by length of text.
+
+        Args:
+            jobs: The `_Job`s synthesized together.
+            durations: The seconds of audio in each piece.
+
+        Returns:
+            `True` if no piece is more than `SPLIT_TOLERANCE` off its share.
+        """
+        chars = sum(job.chars for job in jobs)
+        pauses = (len(jobs) - 1) * BATCH_PAUSE_MS / 1000
+        speech = max(0.0, sum(durations) - pauses)
+        for job, duration in zip(jobs, durations):
+            expected = pauses / len(jobs) + speech * job.chars / chars
+            if abs(duration - expected) > SPLIT_TOLERANCE * expected:
+                return False
+        return True
+
+    @staticmethod
+    def _shared(
+        jobs: list['_Job'], transfers: Sequence[Optional[Transfer]],
+        seconds: float
+    ) -> list['_Take']:
+        """Shares a batched request's time out between its fragments, by
+        their length.
+
+        Args:
+            jobs: The `_Job`s synthesized together.
+            transfers: A `Transfer` per job, carrying the whole request's
+                timings, or `None`s if the encoder does not measure them.
+            seconds: The wall-clock seconds the request took.
+
+        Returns:
+            A `_Take` per job.
+        """
+        chars = sum(job.chars for job in jobs)
+        takes = []
+        for i, (job, transfer) in enumerate(zip(jobs, transfers)):
+            share = job.chars / chars
+            if transfer is not None:
+                transfer = transfer._replace(
+                    ttfb=transfer.ttfb * share,
+                    transfer=transfer.transfer * share,
+                    # Counted once, or a retried batch would count as several.
+                    attempts=transfer.attempts if i == 0 else 1
+                )
+            takes.append(
+                _Take(job, transfer, seconds * share, jobs[0].position)
+            )
+        return takes
+
+    def _synthesize_all(
+        self, jobs: list[list['_Job']], workers: int,
+        finish: Callable[['_Take'], None]
+    ) -> None:
+        """Synthesizes fragments concurrently, longest first.
+
+        With several requests in flight, the order they are started in decides
+        when the last one finishes: a long fragment picked up at the end of a
+        book runs on alone while the other workers sit idle. Starting the
+        longest first leaves the short ones to fill in around them, so the
+        workers finish close together. Each fragment is still written to its
+        own file, and `finish` is called for it on this thread, so the manifest
+        and the progress bar are only ever touched from here.
+
+        Args:
+            jobs: The `_Job`s to synthesize, a request's worth at a time.
+            workers: How many requests to make at once.
+            finish: Called with each `_Take` as it completes.
+        """
+        ordered = sorted(
+            jobs, key=lambda batch: sum(job.chars for job in batch),
+            reverse=True
+        )
+        pool = ThreadPoolExecutor(max_workers=workers)
+        try:
+            futures = [
+                pool.submit(self._synthesize, batch) for batch in ordered
+            ]
+            for future in as_completed(futures):
+                for take in future.result():
+                    finish(take)
+        finally:
+            # On an error or a Ctrl-C, what has not started never will; what
+            # has finished is already in the manifest, to resume from.
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _stamp(
+        self, fragment: Fragment, filepath: Path, duration: Optional[int]
+    ) -> None:
+        """Records in a fragment that it has been encoded.
+
+        Args:
+            fragment: The `Fragment`.
+            filepath: The `Path` of its audio file.
+            duration: Its silence duration in milliseconds, if any.
+        """
+        fragment.encoded = datetime.now(timezone.utc)
+        fragment.filename = filepath.name
+        fragment.encoder = self.name
+        fragment.silence_duration = duration
+        fragment.audio_format = self.audio_format
+
     def fragment_path(
         self, filename: str, encode_dir: Optional[Path] = None
     ) -> Path:
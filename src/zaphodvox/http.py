@@ -1,5 +1,12 @@
 import os
-from typing import Optional, Union
+import random
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from time import monotonic, sleep
+from typing import Callable, Optional, Union
+
+import requests
+from tenacity import RetryCallState, Retrying, retry_if_exception
 
 CONNECT_TIMEOUT = 5.0
 """The seconds to wait for a server to accept a connection.
@@ -18,9 +25,48 @@ warmup. Time that out and the retry aborts real work and then fails the job --
 which is worse than the hang this timeout exists to prevent.
 """
 
+WARM_READ_TIMEOUT = 120.0
+"""The most seconds to wait for a response from a server that has been warmed
+up.
+
+Once its models are loaded and compiled, generation takes seconds even for a
+long fragment, so a response that has not come in two minutes is a server that
+has hung -- and waiting the rest of `DEFAULT_READ_TIMEOUT` for it would only
+put off the retry. A read timeout that was asked for, longer or shorter, is
+left alone.
+"""
+
+ADAPTIVE_FLOOR = 15.0
+"""The fewest seconds an adaptive read timeout allows, however short the text:
+generating a word costs as much in fixed overhead as generating a line."""
+
+ADAPTIVE_MARGIN = 4.0
+"""How many times longer than the expected generation time an adaptive read
+timeout allows."""
+
+ADAPTIVE_SAMPLES = 3
+"""The responses to see before trusting the estimate of a server's speed."""
+
+ADAPTIVE_SMOOTHING = 0.2
+"""How much each new response moves the estimate of a server's speed."""
+
 TIMEOUT_ENV = 'ZAPHODVOX_TIMEOUT'
 """The environment variable holding the default read timeout."""
 
+MAX_ATTEMPTS = 5
+"""The requests to make for one piece of work before giving up on it, unless
+the server is down (see `CircuitBreaker`)."""
+
+BACKOFF_BASE = 1.0
+"""The seconds to wait, at most, before the first retry. Each retry after that
+may wait up to twice as long as the last."""
+
+BACKOFF_MAX = 60.0
+"""The most seconds to wait between two retries of a failing request."""
+
+MAX_RETRY_AFTER = 300.0
+"""The most seconds a server's `Retry-After` is honored for."""
+
 
 def request_timeout(
     read: Optional[float]
@@ -60,6 +106,89 @@ def request_timeout(
     return (CONNECT_TIMEOUT, read)
 
 
+def warm_timeout(
+    timeout: Optional[tuple[float, float]]
+) -> Optional[tuple[float, float]]:
+    """The `timeout` to use once a server has been warmed up.
+
+    Args:
+        timeout: The `(connect, read)` timeout used until now, or `None` to
+            wait forever.
+
+    Returns:
+        The same timeout with its read timeout cut to `WARM_READ_TIMEOUT` if
+            it was still `DEFAULT_READ_TIMEOUT`. Any other timeout, or one
+            that waits forever, is kept: it was asked for, and a server known
+            to be slow is exactly why someone would ask for a longer one.
+    """
+    if timeout is None:
+        return None
+    connect, read = timeout
+    if read != DEFAULT_READ_TIMEOUT:
+        return timeout
+    return (connect, WARM_READ_TIMEOUT)
+
+
+class TimeoutEstimator():
+    """Sizes each request's read timeout to the text it asks for.
+
+    One read timeout for every request has to be long enough for the longest
+    fragment a book has -- so a twenty-character line waits just as long as a
+    two-thousand-character one before a hung server is noticed. This keeps a
+    running estimate of how many characters a second the server generates
+    (smoothed, so one slow response does not swing it) and allows each request
+    `ADAPTIVE_MARGIN` times what its text should take, between
+    `ADAPTIVE_FLOOR` and the configured timeout.
+    """
+
+    def __init__(self) -> None:
+        """Initializes the `TimeoutEstimator` object."""
+        self.rate: Optional[float] = None
+        """The estimated characters generated a second."""
+        self.samples = 0
+        """How many responses the estimate is drawn from."""
+
+    def observe(self, chars: int, seconds: float) -> None:
+        """Records how long the server took to generate some text.
+
+        Args:
+            chars: The characters of text.
+            seconds: The seconds to the response.
+        """
+        if chars <= 0 or seconds <= 0:
+            return
+        rate = chars / seconds
+        if self.rate is None:
+            self.rate = rate
+        else:
+            self.rate += ADAPTIVE_SMOOTHING * (rate - self.rate)
+        self.samples += 1
+
+    def timeout(
+        self, chars: int, ceiling: Optional[tuple[float, float]]
+    ) -> Optional[tuple[float, float]]:
+        """The `timeout` to give a request for some text.
+
+        Args:
+            chars: The characters of text the request asks for.
+            ceiling: The configured `(connect, read)` timeout, or `None` to
+                wait forever.
+
+        Returns:
+            The `(connect, read)` timeout, with the read timeout sized to
+                `chars` -- or `ceiling` itself, until there are
+                `ADAPTIVE_SAMPLES` responses to size it by, or if it waits
+                forever.
+        """
+        if ceiling is None or self.rate is None:
+            return ceiling
+        if self.samples < ADAPTIVE_SAMPLES:
+            return ceiling
+        connect, read = ceiling
+        expected = ADAPTIVE_MARGIN * chars / self.rate
+        return (connect, min(max(expected, ADAPTIVE_FLOOR), read))
+
+
 def default_timeout() -> Union[str, float]:
     """The default read timeout, from the environment.
 
@@ -68,3 +197,230 @@ def default_timeout() -> Union[str, float]:
             environment, for `argparse` to convert and complain about).
     """
     return os.environ.get(TIMEOUT_ENV, DEFAULT_READ_TIMEOUT)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether a failed request is worth making again.
+
+    A request the server rejected as malformed -- a `4xx` other than the
+    "too many requests" and "timed out" ones -- will be rejected again, however
+    long it waits, so it fails at once with the server's complaint rather than
+    four more times. Everything else might yet succeed.
+
+    Args:
+        error: The exception the request raised.
+
+    Returns:
+        `False` for a client error the server will only repeat.
+    """
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return not (400 <= status < 500) or status in (408, 429)
+    return True
+
+
+def is_outage(error: BaseException) -> bool:
+    """Whether a failed request says the server is down or overwhelmed, rather
+    than that this one request went wrong.
+
+    Args:
+        error: The exception the request raised.
+
+    Returns:
+        `True` for a refused or dropped connection, a timeout, a `429` or a
+            `5xx`.
+    """
+    if isinstance(error, requests.HTTPError):
+        if error.response is None:
+            return False
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """The seconds a server asked to be left alone for, in a `Retry-After`.
+
+    Args:
+        error: The exception the request raised.
+
+    Returns:
+        The seconds to wait (at most `MAX_RETRY_AFTER`), or `None` if the
+            server did not say.
+    """
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        seconds = (when - datetime.now(timezone.utc)).total_seconds()
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+def backoff(attempt: int) -> float:
+    """The seconds to wait before retrying a request that has failed.
+
+    Exponential, so a server that is struggling gets more room each time, and
+    jittered across the whole interval ("full jitter"), so requests that failed
+    together do not all come back together.
+
+    Args:
+        attempt: The number of the attempt that failed, from `1`.
+
+    Returns:
+        The seconds to wait.
+    """
+    ceiling = min(BACKOFF_BASE * 2 ** (attempt - 1), BACKOFF_MAX)
+    return random.uniform(0, ceiling)
+
+
+class CircuitBreaker():
+    """Notices a server that is down, and pauses the work until it is back.
+
+    Retrying each request a few times rides out a hiccup, but not a server that
+    is restarting, or has run out of GPU memory and is reloading its models:
+    every request would use up its attempts in the same few seconds and the
+    job would die with it. Once enough requests in a row have failed with an
+    outage (`is_outage()`), the breaker opens. A request then waits out a
+    cooldown -- doubling each time the server is found still down -- rather
+    than counting attempts, and it gives up only once the server has been
+    down for `patience` seconds.
+    """
+
+    def __init__(
+        self,
+        threshold: int = 3,
+        cooldown: float = 15.0,
+        max_cooldown: float = 300.0,
+        patience: float = 1800.0,
+    ) -> None:
+        """Initializes the `CircuitBreaker` object.
+
+        Args:
+            threshold: The outages in a row that open the breaker. Defaults to
+                `3`.
+            cooldown: The seconds to wait once the breaker opens. Defaults to
+                `15`.
+            max_cooldown: The most seconds to wait at a time. Defaults to
+                `300`.
+            patience: The seconds to wait out an outage before giving up.
+                Defaults to `1800` (half an hour).
+        """
+        self.threshold = threshold
+        """The outages in a row that open the breaker."""
+        self.cooldown = cooldown
+        """The seconds to wait once the breaker opens."""
+        self.max_cooldown = max_cooldown
+        """The most seconds to wait at a time."""
+        self.patience = patience
+        """The seconds to wait out an outage before giving up."""
+        self.failures = 0
+        """The outages in a row."""
+        self.opened: Optional[float] = None
+        """When the breaker opened (`time.monotonic()`), if it is open."""
+
+    @property
+    def is_open(self) -> bool:
+        """Whether the server is believed to be down."""
+        return self.opened is not None
+
+    @property
+    def exhausted(self) -> bool:
+        """Whether the server has been down for longer than `patience`."""
+        return (
+            self.opened is not None
+            and monotonic() - self.opened >= self.patience
+        )
+
+    def failure(self, error: BaseException) -> None:
+        """Records a failed request.
+
+        Args:
+            error: The exception the request raised.
+        """
+        if not is_outage(error):
+            return
+        self.failures += 1
+        if self.failures >= self.threshold and self.opened is None:
+            self.opened = monotonic()
+
+    def success(self) -> None:
+        """Records a request that succeeded, closing the breaker."""
+        self.failures = 0
+        self.opened = None
+
+    def pause(self) -> float:
+        """The seconds to wait before the next request, while it is open.
+
+        Returns:
+            The cooldown, doubled for every outage since the breaker opened.
+        """
+        doublings = max(0, self.failures - self.threshold)
+        return min(self.cooldown * 2 ** doublings, self.max_cooldown)
+
+
+def retrying(
+    breaker: Optional[CircuitBreaker] = None,
+    attempts: int = MAX_ATTEMPTS,
+    retryable: Callable[[BaseException], bool] = is_retryable,
+) -> Retrying:
+    """The retry policy for a request to a server.
+
+    A failed request is retried only if it might succeed (`is_retryable()`),
+    after an exponential, jittered `backoff()` -- or as long as the server asked
+    for in a `Retry-After`, if that is longer. A request that finds the
+    `breaker` open waits out its cooldown instead, and keeps doing so, however
+    many attempts that takes, until the server is back or the breaker runs out
+    of patience. The caller closes the breaker with `success()` once the
+    request has gone through.
+
+    Args:
+        breaker: The `CircuitBreaker` shared by every request of the job.
+            Defaults to `None` (each request stands alone).
+        attempts: The attempts to make while the breaker is closed. Defaults to
+            `MAX_ATTEMPTS`.
+        retryable: Whether a failed request is worth making again. Defaults to
+            `is_retryable()`. A failure it rejects is raised at once, and not
+            counted against the `breaker`.
+
+    Returns:
+        The `tenacity.Retrying` to run the request in.
+    """
+    def stop(state: RetryCallState) -> bool:
+        if breaker is not None and breaker.is_open:
+            return breaker.exhausted
+        return state.attempt_number >= attempts
+
+    def wait(state: RetryCallState) -> float:
+        error = state.outcome.exception() if state.outcome else None
+        if breaker is not None and breaker.is_open:
+            seconds = breaker.pause()
+        else:
+            seconds = backoff(state.attempt_number)
+        if error is not None and (asked := retry_after(error)) is not None:
+            seconds = max(seconds, asked)
+        return seconds
+
+    def after(state: RetryCallState) -> None:
+        if breaker is not None and state.outcome is not None:
+            if (error := state.outcome.exception()) is not None:
+                breaker.failure(error)
+
+    return Retrying(
+        reraise=True,
+        retry=retry_if_exception(retryable),
+        stop=stop,
+        wait=wait,
+        after=after,
+        sleep=sleep,
+    )
@@ -1,19 +1,45 @@
+import hashlib
 import json
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from time import monotonic
+from math import ceil
+from typing import Callable, Iterable, NamedTuple, Optional
 
 import requests
+from pydantic import BaseModel
+from requests.adapters import HTTPAdapter
 from tenacity import Retrying, stop_after_attempt
 
 from zaphodvox.http import request_timeout
+from zaphodvox.paths import atomic_write
 from zaphodvox.progress import ProgressBar
-from zaphodvox.proof import ProofFinding
+from zaphodvox.proof import LineIndex, ProofFinding, fingerprint_lines
 from zaphodvox.text import end_of_sentence
 
 DEFAULT_LLM_URL = 'http://127.0.0.1:1234'
 """The default base URL of a local OpenAI-compatible LLM server (LM Studio)."""
 
 CHUNK_CHARS = 2000
-"""The approximate size (in characters) of each proofreading chunk."""
+"""The approximate size (in characters) of each proofreading chunk, unless the
+model's context window is given."""
+
+CHARS_PER_TOKEN = 4.0
+"""The characters of English prose a token is taken to hold, until the server
+says otherwise."""
+
+CHUNK_SHARE = 0.5
+"""The share of the context window, after the system prompt, a chunk may take
+up. The rest is room for the chat template and the answer, which for a badly
+garbled chunk can run to as many tokens as the chunk itself."""
+
+MIN_CHUNK_TOKENS = 64
+"""The fewest tokens a chunk can be given: a couple of sentences."""
+
+MAX_CHUNK_TOKENS = 8192
+"""The most tokens a chunk is given, however large the context window. Past a
+few thousand tokens of input, a model's attention to each line -- and so the
+errors it notices -- falls off well before the context runs out."""
 
 PROOF_SYSTEM = (
     'You are a meticulous proofreader for an audiobook manuscript. Each input '
@@ -57,6 +83,78 @@ PROOF_SCHEMA = {
 """The JSON schema requested of the LLM (structured output)."""
 
 
+class CompletionError(ValueError):
+    """A completion that came back cut short, or not as JSON."""
+
+
+class Completion(NamedTuple):
+    """One answer from the LLM server, and what it cost."""
+
+    content: str
+    """The message content (a JSON string)."""
+    seconds: float
+    """The wall-clock seconds the successful request took."""
+    prompt_tokens: Optional[int] = None
+    """The tokens of prompt read, if the server reported them."""
+    completion_tokens: Optional[int] = None
+    """The tokens generated, if the server reported them."""
+
+
+class ChunkUsage(BaseModel):
+    """What proofreading one chunk cost."""
+
+    start: int
+    """The (1-based) line number of the chunk's first line."""
+    lines: int
+    """The lines in the chunk."""
+    seconds: float
+    """The wall-clock seconds the completion took."""
+    prompt_tokens: Optional[int] = None
+    """The tokens of prompt read, if the server reported them."""
+    completion_tokens: Optional[int] = None
+    """The tokens generated, if the server reported them."""
+
+
+class LLMUsage(BaseModel):
+    """The completions of a proofreading pass, chunk by chunk.
+
+    A local server's speed depends on the model, its quantization and the GPU
+    far more than on anything here, and tokens a second is the figure every
+    one of them is compared by.
+    """
+
+    chunks: list[ChunkUsage] = []
+    """The chunks sent to the LLM, in the order they came back."""
+    unchanged: int = 0
+    """The chunks not sent because they had not changed since the last report,
+    their findings kept from it."""
+
+    @property
+    def seconds(self) -> float:
+        """The seconds spent waiting on completions, summed over the chunks."""
+        return sum(c.seconds for c in self.chunks)
+
+    @property
+    def prompt_tokens(self) -> int:
+        """The tokens of prompt the server reported reading."""
+        return sum(c.prompt_tokens or 0 for c in self.chunks)
+
+    @property
+    def completion_tokens(self) -> int:
+        """The tokens the server reported generating."""
+        return sum(c.completion_tokens or 0 for c in self.chunks)
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        """The tokens generated per second of each completion, over the chunks
+        whose usage was reported."""
+        counted = [c for c in self.chunks if c.completion_tokens is not None]
+        seconds = sum(c.seconds for c in counted)
+        if not seconds:
+            return None
+        return sum(c.completion_tokens or 0 for c in counted) / seconds
+
+
 class LLMClient:
     """A thin client for a local OpenAI-compatible chat-completions server."""
 
@@ -66,6 +164,8 @@ class LLMClient:
         model: Optional[str] = None,
         temperature: float = 0.1,
         timeout: Optional[float] = None,
+        stream: bool = False,
+        connections: int = 1,
     ) -> None:
         """Initializes the `LLMClient`.
 
@@ -77,15 +177,63 @@ class LLMClient:
             temperature: The sampling temperature (low for consistency).
             timeout: The seconds to wait for a completion. Defaults to
                 `DEFAULT_READ_TIMEOUT`; `0` waits forever.
+            stream: Whether to have completions streamed back (as server-sent
+                events) and read as they are generated. Defaults to `False`.
+            connections: The connections to keep open to the server: one for
+                each completion asked for at once. Defaults to `1`.
         """
         self._url = (url or DEFAULT_LLM_URL).rstrip('/')
         """The base URL of the local LLM server."""
         self._model = model
         """The model id."""
+        self._served: Optional[str] = None
+        """The `served_model`, once asked for."""
         self._temperature = temperature
         """The sampling temperature."""
         self._timeout = request_timeout(timeout)
         """The `(connect, read)` timeout for every request."""
+        self._stream = stream
+        """Whether completions are streamed."""
+        self._session = requests.Session()
+        """The session every request goes through, so that each chunk reuses
+        a connection rather than opening its own."""
+        adapter = HTTPAdapter(pool_maxsize=connections)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+    @property
+    def url(self) -> str:
+        """The base URL of the local LLM server."""
+        return self._url
+
+    @property
+    def model(self) -> Optional[str]:
+        """The model id, if one was given."""
+        return self._model
+
+    @property
+    def served_model(self) -> str:
+        """The model the server answers with.
+
+        That is the `model`, if one was given. Otherwise the server uses
+        whatever it has loaded, so it is asked, once, what that is (`GET
+        /v1/models`): answers from one model are no use for another. A server
+        that cannot say is taken to serve an unnamed one (`''`).
+        """
+        if self._model:
+            return self._model
+        if self._served is None:
+            try:
+                with self._session.get(
+                    f'{self._url}/v1/models', timeout=self._timeout
+                ) as response:
+                    response.raise_for_status()
+                    ids = [m['id'] for m in response.json()['data']]
+                self._served = ','.join(sorted(str(i) for i in ids))
+            except (requests.RequestException, ValueError, KeyError,
+                    TypeError):
+                self._served = ''
+        return self._served
 
     def complete_json(self, system: str, user: str, schema: dict) -> str:
         """Requests a JSON completion from the chat endpoint.
@@ -98,6 +246,29 @@ class LLMClient:
         Returns:
             The message content (a JSON string).
         """
+        return self.complete(system, user, schema).content
+
+    def complete(self, system: str, user: str, schema: dict) -> Completion:
+        """Requests a JSON completion from the chat endpoint, with its usage.
+
+        An answer that was cut short (the model ran out of tokens, or the
+        connection dropped mid-stream) or that is not JSON is asked for again,
+        like a failed request: read as findings, it would quietly be none.
+        Streamed, such an answer is usually given up on at its first
+        character, rather than after the model has finished generating it.
+
+        Args:
+            system: The system prompt.
+            user: The user message.
+            schema: The JSON schema for structured output.
+
+        Returns:
+            The `Completion`.
+
+        Raises:
+            CompletionError: If every attempt came back cut short or not as
+                JSON.
+        """
         payload: dict = {
             'messages': [
                 {'role': 'system', 'content': system},
@@ -108,24 +279,337 @@ class LLMClient:
         }
         if self._model:
             payload['model'] = self._model
+        if self._stream:
+            payload['stream'] = True
+            payload['stream_options'] = {'include_usage': True}
         for attempt in Retrying(reraise=True, stop=stop_after_attempt(3)):
             with attempt:
-                with requests.post(
+                started = monotonic()
+                with self._session.post(
                     f'{self._url}/v1/chat/completions',
                     json=payload,
                     timeout=self._timeout,
+                    stream=self._stream,
                 ) as response:
                     response.raise_for_status()
-                    data = response.json()
-                    return data['choices'][0]['message']['content']
+                    if self._stream:
+                        # Server-sent events are always UTF-8, but without a
+                        # charset `requests` would read them as Latin-1.
+                        response.encoding = 'utf-8'
+                        content, finish, usage = _read_events(
+                            response.iter_lines(decode_unicode=True)
+                        )
+                    else:
+                        data = response.json()
+                        choice = data['choices'][0]
+                        content = choice['message']['content']
+                        finish = choice.get('finish_reason')
+                        usage = data.get('usage')
+                _check_json(content, finish)
+                usage = usage if isinstance(usage, dict) else {}
+                return Completion(
+                    content=content,
+                    seconds=monotonic() - started,
+                    prompt_tokens=usage.get('prompt_tokens'),
+                    completion_tokens=usage.get('completion_tokens'),
+                )
         raise RuntimeError('unreachable')
 
 
+def _read_events(
+    lines: Iterable[str]
+) -> tuple[str, Optional[str], Optional[dict]]:
+    """Reads a streamed completion, as its server-sent events arrive.
+
+    Args:
+        lines: The lines of the response body.
+
+    Returns:
+        The message content, the reason the model stopped (`None` if the
+            stream ended before it said), and the usage, if the server sent it.
+
+    Raises:
+        CompletionError: As soon as the content is plainly not a JSON object.
+    """
+    parts: list[str] = []
+    finish: Optional[str] = None
+    usage: Optional[dict] = None
+    started = False
+    for line in lines:
+        if not line or not line.startswith('data:'):
+            continue
+        data = line[len('data:'):].strip()
+        if data == '[DONE]':
+            break
+        try:
+            event = json.loads(data)
+        except ValueError as e:
+            raise CompletionError(f'Malformed event: {data[:80]!r}') from e
+        usage = event.get('usage') or usage
+        for choice in event.get('choices') or []:
+            delta = (choice.get('delta') or {}).get('content') or ''
+            if not started and delta.strip():
+                # Structured output opens with the object; anything else is
+                # the model talking, and not worth reading to the end of.
+                if not delta.lstrip().startswith('{'):
+                    raise CompletionError(
+                        f'Not a JSON object: {delta.strip()[:80]!r}'
+                    )
+                started = True
+            parts.append(delta)
+            finish = choice.get('finish_reason') or finish
+    return ''.join(parts), finish, usage
+
+
+def _check_json(content: str, finish: Optional[str]) -> None:
+    """Checks that a completion is whole, and JSON.
+
+    Args:
+        content: The message content.
+        finish: The reason the model stopped, if known.
+
+    Raises:
+        CompletionError: If the model ran out of tokens, or the content does
+            not parse.
+    """
+    if finish == 'length':
+        raise CompletionError('The completion was cut short (max tokens)')
+    try:
+        json.loads(content)
+    except (TypeError, ValueError) as e:
+        raise CompletionError(f'Not JSON: {str(content)[:80]!r}') from e
+
+
+class TokenCounter:
+    """Estimates how many tokens a model will make of some text.
+
+    A `tokenizer` -- the model's own, say -- counts exactly. Without one the
+    count is estimated from a characters-per-token ratio, which `observe()`
+    calibrates from the prompt tokens the server reports having read.
+    """
+
+    def __init__(
+        self,
+        chars_per_token: float = CHARS_PER_TOKEN,
+        tokenizer: Optional[Callable[[str], int]] = None,
+    ) -> None:
+        """Initializes the `TokenCounter`.
+
+        Args:
+            chars_per_token: The characters a token is taken to hold. Defaults
+                to `CHARS_PER_TOKEN`.
+            tokenizer: A function that counts the tokens of a text exactly, if
+                there is one.
+        """
+        self.chars_per_token = chars_per_token
+        """The characters a token is taken to hold."""
+        self.tokenizer = tokenizer
+        """The function that counts tokens exactly, if any."""
+        self._chars = 0
+        """The characters of prompt observed."""
+        self._tokens = 0
+        """The tokens the server made of them."""
+
+    @property
+    def calibrated(self) -> bool:
+        """Whether the ratio has been measured against the server."""
+        return self._tokens > 0
+
+    def count(self, text: str) -> int:
+        """The tokens a text will take up.
+
+        Args:
+            text: The text.
+
+        Returns:
+            The count (or the estimate, rounded up).
+        """
+        if self.tokenizer is not None:
+            return self.tokenizer(text)
+        return ceil(len(text) / self.chars_per_token)
+
+    def observe(self, chars: int, tokens: Optional[int]) -> None:
+        """Calibrates the ratio from a prompt the server has read.
+
+        The server's count includes its chat template, which is a little
+        overhead on every prompt; the ratio comes out a little low for it,
+        which errs on the side of smaller chunks.
+
+        Args:
+            chars: The characters of the prompt sent.
+            tokens: The prompt tokens the server reported, if it did.
+        """
+        if not tokens or chars <= 0:
+            return
+        self._chars += chars
+        self._tokens += tokens
+        self.chars_per_token = self._chars / self._tokens
+
+    def budget(self, context: int) -> int:
+        """The tokens a chunk of manuscript may take up.
+
+        Args:
+            context: The model's context window, in tokens.
+
+        Returns:
+            The `CHUNK_SHARE` of what is left of `context` after the system
+                prompt, between `MIN_CHUNK_TOKENS` and `MAX_CHUNK_TOKENS`.
+
+        Raises:
+            ValueError: If the context window has no room for a chunk.
+        """
+        room = (context - self.count(PROOF_SYSTEM)) * CHUNK_SHARE
+        if room < MIN_CHUNK_TOKENS:
+            raise ValueError(
+                f'A context window of {context} token(s) leaves no room to '
+                'proofread in.'
+            )
+        return int(min(room, MAX_CHUNK_TOKENS))
+
+
+class LLMCache:
+    """The LLM's answers to earlier proofreading passes, kept on disk.
+
+    A manuscript is proofread again and again as it is fixed, and most of its
+    chunks come through unchanged each time; a completion takes seconds, a
+    file read does not. Each answer is stored under a hash of everything that
+    went into it -- the server and its model, the prompt, the schema, and the
+    chunk's lines -- so an edited chunk, or a new prompt, model or server,
+    simply misses.
+
+    The lines are hashed without their numbers, so a chunk that has only moved
+    (because a line above it was added or removed) is still found; its
+    findings are moved with it.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        """Initializes the `LLMCache`.
+
+        Args:
+            directory: The directory `Path` to keep the answers in (created as
+                needed).
+        """
+        self._directory = directory
+        """The directory the answers are kept in."""
+        self.hits = 0
+        """The chunks answered from the cache."""
+        self.misses = 0
+        """The chunks sent to the LLM."""
+
+    @staticmethod
+    def key(client: LLMClient, chunk_lines: list[str]) -> str:
+        """The key a chunk's answer is stored under.
+
+        Args:
+            client: The `LLMClient` asked.
+            chunk_lines: The chunk's lines.
+
+        Returns:
+            A hex digest.
+        """
+        payload = json.dumps(
+            [
+                client.url, client.served_model, PROOF_SYSTEM, PROOF_SCHEMA,
+                chunk_lines
+            ],
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str, start: int) -> Optional[list[ProofFinding]]:
+        """Looks up a chunk's findings.
+
+        Args:
+            key: The chunk's `key()`.
+            start: The (1-based) line number the chunk now starts at.
+
+        Returns:
+            The findings, moved to the chunk's current lines, or `None` if the
+                chunk has not been answered (or its answer cannot be read).
+        """
+        try:
+            entry = json.loads(
+                (self._directory / f'{key}.json').read_text(encoding='utf-8')
+            )
+            shift = start - int(entry['start'])
+            findings = _parse_findings(entry['content'])
+        except (OSError, ValueError, KeyError, TypeError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        for finding in findings:
+            finding.line += shift
+        return findings
+
+    def put(self, key: str, start: int, content: str) -> None:
+        """Stores the LLM's answer for a chunk, if the cache can be written.
+
+        Args:
+            key: The chunk's `key()`.
+            start: The (1-based) line number the chunk starts at.
+            content: The LLM's answer (a JSON string).
+        """
+        try:
+            atomic_write(
+                self._directory / f'{key}.json',
+                json.dumps({'start': start, 'content': content})
+            )
+        except OSError:
+            pass
+
+    def _ratio_path(self, client: LLMClient) -> Path:
+        """The file a server's characters-per-token ratio is kept in."""
+        payload = json.dumps([client.url, client.served_model])
+        digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+        return self._directory / f'tokens-{digest}.json'
+
+    def load_ratio(self, client: LLMClient) -> Optional[float]:
+        """Looks up the characters-per-token ratio measured for a server.
+
+        Args:
+            client: The `LLMClient` of the server (and model).
+
+        Returns:
+            The ratio, or `None` if it has not been measured.
+        """
+        try:
+            data = json.loads(
+                self._ratio_path(client).read_text(encoding='utf-8')
+            )
+            ratio = float(data['chars_per_token'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return ratio if ratio > 0 else None
+
+    def save_ratio(self, client: LLMClient, ratio: float) -> None:
+        """Keeps the characters-per-token ratio measured for a server.
+
+        Args:
+            client: The `LLMClient` of the server (and model).
+            ratio: The ratio.
+        """
+        try:
+            atomic_write(
+                self._ratio_path(client),
+                json.dumps({'chars_per_token': ratio})
+            )
+        except OSError:
+            pass
+
+
+def _line_chars(number: int, line: str) -> int:
+    """The size of a line, in characters, with its newline."""
+    return len(line) + 1
+
+
 def _chunk_lines(
-    lines: list[str], chunk_chars: int = CHUNK_CHARS
+    lines: list[str],
+    budget: int = CHUNK_CHARS,
+    measure: Callable[[int, str], int] = _line_chars,
+    first: int = 1,
 ) -> list[tuple[int, list[str]]]:
-    """Groups lines into chunks of roughly `chunk_chars`, tracking the
-        (1-based) starting line number of each chunk.
+    """Groups lines into chunks of roughly `budget`, tracking the (1-based)
+        starting line number of each chunk.
 
     A chunk is only flushed at a sentence end or a blank (paragraph) line, so a
     chunk never ends in the middle of a sentence — which would otherwise look
@@ -133,24 +617,27 @@ def _chunk_lines(
 
     Args:
         lines: The text lines.
-        chunk_chars: The target chunk size in characters (a chunk may run
-            slightly longer to reach the next sentence boundary).
+        budget: The target chunk size (a chunk may run slightly longer to
+            reach the next sentence boundary). Defaults to `CHUNK_CHARS`.
+        measure: The size of a line, given its (1-based) number: in the same
+            units as `budget`. Defaults to its characters.
+        first: The line number of the first line. Defaults to `1`.
 
     Returns:
         A list of `(start_line, chunk_lines)` tuples.
     """
     chunks: list[tuple[int, list[str]]] = []
     current: list[str] = []
-    start = 1
+    start = first
     size = 0
-    for number, line in enumerate(lines, start=1):
+    for number, line in enumerate(lines, start=first):
         if not current:
             start = number
         current.append(line)
-        size += len(line) + 1
+        size += measure(number, line)
         stripped = line.strip()
         at_boundary = not stripped or end_of_sentence(stripped)
-        if size >= chunk_chars and at_boundary:
+        if size >= budget and at_boundary:
             chunks.append((start, current))
             current = []
             size = 0
@@ -159,6 +646,46 @@ def _chunk_lines(
     return chunks
 
 
+def _pass_key(client: LLMClient) -> str:
+    """The `LineIndex.llm` of a pass with the client's server and model, and
+    this prompt."""
+    payload = json.dumps(
+        [client.url, client.served_model, PROOF_SYSTEM, PROOF_SCHEMA],
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _unchanged_chunks(
+    index: LineIndex, fingerprints: list[str]
+) -> dict[int, tuple[int, list[ProofFinding]]]:
+    """The chunks of the last pass with no line changed, added or removed
+        since.
+
+    Args:
+        index: The `LineIndex` of the last pass.
+        fingerprints: The `fingerprint_lines()` of the manuscript now.
+
+    Returns:
+        The number of lines of each chunk, and its findings (moved with it),
+            by the (1-based) line number it now starts at.
+    """
+    moved = index.moved(fingerprints)
+    unchanged: dict[int, tuple[int, list[ProofFinding]]] = {}
+    for first, last in index.chunks:
+        start = moved.get(first)
+        if start is None or any(
+            moved.get(number) != start + number - first
+            for number in range(first + 1, last + 1)
+        ):
+            continue
+        unchanged[start] = (last - first + 1, [
+            finding.model_copy(update={'line': finding.line + start - first})
+            for finding in index.findings if first <= finding.line <= last
+        ])
+    return unchanged
+
+
 def _parse_findings(content: str) -> list[ProofFinding]:
     """Parses the LLM's JSON response into `ProofFinding`s, defensively.
 
@@ -190,25 +717,170 @@ def _parse_findings(content: str) -> list[ProofFinding]:
     return findings
 
 
-def proofread(text: str, client: LLMClient) -> list[ProofFinding]:
+def _numbered(start: int, chunk_lines: list[str]) -> str:
+    """A chunk's lines, each prefixed with its line number for the LLM."""
+    return '\n'.join(
+        f'{start + offset}: {line}' for offset, line in enumerate(chunk_lines)
+    )
+
+
+def _proofread_chunk(
+    client: LLMClient, start: int, chunk_lines: list[str],
+    cache: Optional[LLMCache] = None, key: str = ''
+) -> tuple[list[ProofFinding], Completion]:
+    """Proofreads one chunk of lines with the local LLM.
+
+    Args:
+        client: The `LLMClient`.
+        start: The (1-based) line number of the chunk's first line.
+        chunk_lines: The chunk's lines.
+        cache: The `LLMCache` to store the answer in, if any.
+        key: The chunk's `LLMCache.key()`, if there is a cache.
+
+    Returns:
+        The LLM's findings (mapped to absolute line numbers), and the
+            `Completion` they came from.
+    """
+    numbered = _numbered(start, chunk_lines)
+    completion = client.complete(PROOF_SYSTEM, numbered, PROOF_SCHEMA)
+    if cache is not None:
+        cache.put(key, start, completion.content)
+    return _parse_findings(completion.content), completion
+
+
+def proofread(
+    text: str, client: LLMClient, workers: int = 1,
+    cache: Optional[LLMCache] = None,
+    usage: Optional[LLMUsage] = None,
+    context: Optional[int] = None,
+    counter: Optional[TokenCounter] = None,
+    index: Optional[LineIndex] = None,
+) -> list[ProofFinding]:
     """Proofreads the text with the local LLM, chunk by chunk.
 
+    A local server can usually generate several completions at once, and a
+    long manuscript is hundreds of chunks, so with `workers` the chunks are
+    sent that many at a time. The progress bar counts each chunk as it comes
+    back, in whatever order that is, and the findings are put back in the
+    order of the chunks they came from -- the same list, in the same order,
+    as one at a time.
+
+    With a `cache`, only the chunks it has no answer for are sent at all.
+
+    Given the model's `context` window, the chunks are sized in tokens to fill
+    a share of it, rather than to `CHUNK_CHARS`: fewer, larger requests for a
+    large model, and none that overflow a small one. The tokens are counted by
+    the `counter`; without a tokenizer it estimates them, at a ratio measured
+    from the server's own counts on an earlier pass (kept in the `cache`). The
+    ratio is only measured the once, so the chunks -- and the cache's answers
+    for them -- stay put from one pass to the next.
+
+    Given the `index` of the last pass, its chunks that have not changed are
+    kept as they were, findings and all, and only the lines between them are
+    chunked afresh and sent. Chunked from scratch, a line added near the start
+    could move every boundary after it, and every chunk would be new.
+
     Args:
         text: The manuscript text.
         client: The `LLMClient`.
+        workers: How many chunks to proofread at once. Defaults to `1`.
+        cache: The `LLMCache` to reuse answers from, if any.
+        usage: The `LLMUsage` to record each completion in, if any.
+        context: The model's context window, in tokens, if known.
+        counter: The `TokenCounter` to size chunks with, given a `context`.
+            Defaults to an estimate.
+        index: The `LineIndex` of the last pass, if any; it is updated to
+            this one.
 
     Returns:
         The LLM's findings (mapped to absolute line numbers).
+
+    Raises:
+        ValueError: If the `context` window has no room for a chunk.
     """
-    chunks = _chunk_lines(text.split('\n'))
-    findings: list[ProofFinding] = []
-    with ProgressBar('Proofreading', total=len(chunks)) as bar:
-        for start, chunk_lines in chunks:
-            numbered = '\n'.join(
-                f'{start + offset}: {line}'
-                for offset, line in enumerate(chunk_lines)
+    lines = text.split('\n')
+    calibrate: Optional[TokenCounter] = None
+    budget, measure = CHUNK_CHARS, _line_chars
+    if context is not None:
+        if counter is None:
+            counter = TokenCounter()
+            ratio = cache.load_ratio(client) if cache is not None else None
+            if ratio is not None:
+                counter.chars_per_token = ratio
+            else:
+                calibrate = counter
+        measured = counter
+        budget = counter.budget(context)
+
+        def measure(number: int, line: str) -> int:
+            return measured.count(f'{number}: {line}\n')
+
+    fingerprints = fingerprint_lines(lines)
+    unchanged: dict[int, tuple[int, list[ProofFinding]]] = {}
+    if index is not None and index.llm == _pass_key(client):
+        unchanged = _unchanged_chunks(index, fingerprints)
+    chunks: list[tuple[int, list[str]]] = []
+    results: dict[int, list[ProofFinding]] = {}
+    number = 1
+    for start in [*sorted(unchanged), len(lines) + 1]:
+        if start > number:
+            chunks += _chunk_lines(
+                lines[number - 1:start - 1], budget, measure, number
             )
-            content = client.complete_json(PROOF_SYSTEM, numbered, PROOF_SCHEMA)
-            findings.extend(_parse_findings(content))
-            bar.next()
+        if start in unchanged:
+            size, results[len(chunks)] = unchanged[start]
+            chunks.append((start, lines[start - 1:start - 1 + size]))
+            number = start + size
+    if usage is not None:
+        usage.unchanged += len(results)
+    with ProgressBar('Proofreading', total=len(chunks)) as bar:
+        pool = ThreadPoolExecutor(max_workers=workers)
+        try:
+            futures = {}
+            for i, (start, chunk_lines) in enumerate(chunks):
+                if i in results:
+                    bar.next()
+                    continue
+                key = ''
+                if cache is not None:
+                    key = cache.key(client, chunk_lines)
+                    if (cached := cache.get(key, start)) is not None:
+                        results[i] = cached
+                        bar.next()
+                        continue
+                futures[pool.submit(
+                    _proofread_chunk, client, start, chunk_lines, cache, key
+                )] = i
+            for future in as_completed(futures):
+                i = futures[future]
+                results[i], completion = future.result()
+                start, chunk_lines = chunks[i]
+                if calibrate is not None:
+                    calibrate.observe(
+                        len(PROOF_SYSTEM) + len(_numbered(start, chunk_lines)),
+                        completion.prompt_tokens
+                    )
+                if usage is not None:
+                    usage.chunks.append(ChunkUsage(
+                        start=start,
+                        lines=len(chunk_lines),
+                        seconds=completion.seconds,
+                        prompt_tokens=completion.prompt_tokens,
+                        completion_tokens=completion.completion_tokens,
+                    ))
+                bar.next()
+        finally:
+            # A failed chunk fails the pass; the chunks not yet sent are not.
+            pool.shutdown(wait=False, cancel_futures=True)
+    if calibrate is not None and calibrate.calibrated and cache is not None:
+        cache.save_ratio(client, calibrate.chars_per_token)
+    findings = [finding for i in sorted(results) for finding in results[i]]
+    if index is not None:
+        index.fingerprints = fingerprints
+        index.llm = _pass_key(client)
+        index.chunks = [
+            (start, start + len(chunk_lines) - 1)
+            for start, chunk_lines in chunks
+        ]
+        index.findings = findings
     return findings
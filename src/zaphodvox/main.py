@@ -10,15 +10,26 @@ from rich.table import Table
 
 from zaphodvox import __version__
 from zaphodvox.audio import concat_files
-from zaphodvox.dictionary import add_words, build_speller, load_words
+from zaphodvox.dictionary import (
+    add_words, build_speller, dictionary_version, load_words
+)
 from zaphodvox.encoder import Encoder
 from zaphodvox.manifest import Fragment, Manifest
 from zaphodvox.named_voices import NamedVoices
 from zaphodvox.arg_parser import parse_args
-from zaphodvox.llm import LLMClient, proofread
-from zaphodvox.paths import abspath, clip_filename, name_slug, rebase_ref
-from zaphodvox.proof import ProofReport, proof_text
+from zaphodvox.llm import LLMCache, LLMClient, LLMUsage, proofread
+from zaphodvox.paths import (
+    abspath, cache_dir, clip_filename, name_slug, rebase_ref
+)
+from zaphodvox.proof import (
+    LineIndex,
+    ProofReport,
+    SuggestionCache,
+    proof_text,
+)
+from zaphodvox.scoring import CandidateScore, score_candidate
 from zaphodvox.text import clean_text, parse_text
+from zaphodvox.timing import PERCENTILES, EncodeReport
 from zaphodvox.voice import Voice
 
 
@@ -83,7 +94,7 @@ def main(
             return
 
         if args.proof:
-            proof(args, text, console)
+            proof_all(args, text, console)
             return
 
         args.encoder, args.voice = encoder_voice(args)
@@ -114,8 +125,9 @@ def main(
 
         if args.encode:
             assert manifest is not None
+            report = EncodeReport(encoder=args.encoder.name)
             try:
-                manifest = encode(args, manifest)
+                manifest = encode(args, manifest, report)
             except KeyboardInterrupt:
                 # The audio already synthesized is on disk, but without the
                 # manifest naming it there is no way back to it: the run would
@@ -123,8 +135,10 @@ def main(
                 # as it goes, so what is in hand describes exactly how far it
                 # got.
                 save_manifest(args, manifest, console, interrupted=True)
+                report_timings(args, report, console)
                 sys.exit(130)
             save_manifest(args, manifest, console)
+            report_timings(args, report, console)
 
         if args.concat and manifest:
             concat(args, manifest)
@@ -200,11 +214,27 @@ def validate(args: Namespace) -> None:
         return
     if not (inputfile or audition):
         raise ValueError('No input file specified.')
+    if args.more_inputfiles:
+        if not args.proof:
+            raise ValueError('Only --proof takes more than one input file.')
+        if args.basename or args.proof_out:
+            raise ValueError(
+                '--basename and --proof-out name a single report; proof '
+                'several files without them.'
+            )
     if args.proof and any(
         [args.clean, args.plan, encode, args.concat, audition,
          args.adopt is not None]
     ):
         raise ValueError('--proof cannot be combined with other actions.')
+    if encode and (args.normalize or args.trim) \
+            and args.qwen_audio_format != 'wav':
+        # Said now, not once the whole book has been synthesized and is
+        # waiting to be concatenated.
+        raise ValueError(
+            '--normalize and --trim need wav fragments, not '
+            f'{args.qwen_audio_format}.'
+        )
     if audition:
         if any([args.clean, args.plan, args.encode, args.concat]):
             raise ValueError(
@@ -355,7 +385,10 @@ def plan(
     return plan_manifest
 
 
-def encode(args: Namespace, manifest: Manifest) -> Manifest:
+def encode(
+    args: Namespace, manifest: Manifest,
+    report: Optional[EncodeReport] = None
+) -> Manifest:
     """Encodes the specified manifest and optionally concatenates the
         encoded files to the specified directory.
 
@@ -377,7 +410,14 @@ def encode(args: Namespace, manifest: Manifest) -> Manifest:
         encode_dir=out_dir,
         indexes=parse_indexes(index_str, manifest.length),
         voices=named_voices.encoder_voices(),
-        silence_duration=silence_duration
+        silence_duration=silence_duration,
+        normalize=args.normalize,
+        trim=args.trim,
+        silence_files=args.silence_files,
+        report=report,
+        warmup=args.warmup,
+        workers=args.workers,
+        batch_chars=args.batch_chars
     )
     manifest.set_used_voices(named_voices.voices)
     return manifest
@@ -418,6 +458,68 @@ def save_manifest(
             )
 
 
+def report_timings(
+    args: Namespace, report: EncodeReport, console: Console
+) -> None:
+    """Summarizes where an encode's time went, and writes the full report
+        under `--report`.
+
+    Args:
+        args: The parsed command-line arguments.
+        report: The `EncodeReport` of the (possibly interrupted) encode.
+        console: The `Console` object.
+    """
+    if not report.fragments:
+        return
+    title = (
+        f'{len(report.fragments)} fragment(s) in {report.seconds:.1f}s, '
+        f'{report.retries} retried request(s)'
+    )
+    if report.coalesced:
+        title += f', {report.coalesced} repeat(s) copied'
+    if report.batched:
+        title += f', {report.batched} request(s) saved by batching'
+    if (rtf := report.real_time_factor) is not None:
+        title += f', {rtf:.2f}× real time'
+    table = Table(title=title)
+    table.add_column('')
+    for p in PERCENTILES:
+        table.add_column(f'p{p}', justify='right')
+    rows = [
+        ('latency (s)', 'seconds', '.2f'),
+        ('first byte (s)', 'ttfb', '.2f'),
+        ('transfer (s)', 'transfer', '.3f'),
+        ('chars/s', 'chars_per_second', '.1f'),
+        ('real-time factor', 'real_time_factor', '.2f'),
+    ]
+    for label, field, spec in rows:
+        if values := report.percentiles(field):
+            table.add_row(label, *(format(v, spec) for v in values))
+    console.print(table)
+    slowest = Table(title='Slowest fragments')
+    slowest.add_column('index', justify='right')
+    slowest.add_column('file')
+    slowest.add_column('chars', justify='right')
+    slowest.add_column('seconds', justify='right')
+    slowest.add_column('attempts', justify='right')
+    for timing in report.slowest():
+        slowest.add_row(
+            str(timing.index), timing.filename, str(timing.chars),
+            f'{timing.seconds:.2f}', str(timing.attempts)
+        )
+    console.print(slowest)
+    if not (args.report or args.report_out):
+        return
+    fn = f'{args.basename}-report.json'
+    fp = file_path(args.report_out, fn, args.out_dir)
+    with open(str(fp), 'w', encoding='utf-8', newline='\n') as f:
+        if fp.suffix.lower() == '.csv':
+            f.write(report.to_csv())
+        else:
+            f.write(report.model_dump_json(indent=4))
+    console.print(f'[dim]Report written to {fp}[/dim]')
+
+
 def resume_indexes(manifest: Manifest) -> str:
     """The `--indexes` spec of the fragments that were never encoded.
 
@@ -454,11 +556,28 @@ def concat(args: Namespace, manifest: Manifest) -> None:
     concat_out: Optional[Path] = args.concat_out
     out_dir: Optional[Path] = args.out_dir
     encoder: Encoder = args.encoder
+    loudness: Optional[float] = args.loudness if args.normalize else None
+    trim: bool = args.trim
 
     file_ext = file_extension(manifest, encoder)
     filename = f'{basename}.{file_ext}'
     concat_out = file_path(concat_out, filename, out_dir)
-    concat_files(out_dir or Path(), manifest, file_ext, concat_out)
+    unmeasured = any(
+        f.text and f.filename and (
+            (loudness is not None and f.loudness is None)
+            or (trim and f.trim_start is None)
+        )
+        for f in manifest.fragments
+    )
+    concat_files(
+        out_dir or Path(), manifest, file_ext, concat_out, loudness=loudness,
+        trim=trim
+    )
+    if unmeasured and args.save_manifest:
+        # A book encoded without --normalize or --trim has just been measured
+        # for them. Keep the measurements, so the next run has none to take.
+        fn = f'{basename}-manifest.json'
+        write_manifest(manifest, file_path(args.manifest_out, fn, out_dir))
 
 
 AUDITION_MIN_CHARS = 120
@@ -537,8 +656,6 @@ def audition(args: Namespace, text: str, console: Console) -> None:
         )
         for c in candidates
     ]
-    encoder.encode_manifest(Manifest(fragments=fragments), encode_dir=out_dir)
-
     index_fp = file_path(None, f'{basename}-audition.json', out_dir)
     # A clone's `ref_audio` is anchored to the file that declared it -- a voices
     # file elsewhere, or the working directory -- and the index is not that
@@ -547,19 +664,8 @@ def audition(args: Namespace, text: str, console: Console) -> None:
     # the index would be a lie about where their audio actually came from.
     recorded = [candidate.model_copy(deep=True) for candidate in candidates]
     rebase_voices(recorded, index_fp.parent)
-    index = [
-        {
-            'seed': candidate.seed,
-            'filename': fragment.filename,
-            'text': audition_text,
-            # The voice that produced the candidate, tagged with its encoder --
-            # which is how `--adopt` knows what kind of voice to build.
-            'voice': candidate.model_dump(exclude_none=True),
-        }
-        for candidate, fragment in zip(recorded, fragments)
-    ]
-    with open(str(index_fp), 'w', encoding='utf-8', newline='\n') as f:
-        f.write(json.dumps(index, indent=4))
+    index: dict[int, dict] = {}
+    scores: dict[int, CandidateScore] = {}
 
     if len(voice_ids) > 1:
         header = f'Auditioning {len(voice_ids)} preset voices'
@@ -568,30 +674,127 @@ def audition(args: Namespace, text: str, console: Console) -> None:
     if voice.temperature is not None:
         header += f'  ·  temp: {voice.temperature}'
     console.print(header)
-    table = Table()
-    if len(voice_ids) > 1:
-        table.add_column('voice')
-    table.add_column('seed', justify='right')
-    table.add_column('file')
-    for candidate, fragment in zip(candidates, fragments):
-        row = [str(candidate.seed), fragment.filename or '']
-        if len(voice_ids) > 1:
-            row.insert(0, candidate.voice_id or '')
-        table.add_row(*row)
-    console.print(table)
+    width = max(len(fragment.filename or '') for fragment in fragments)
+    print_row(console, ['seed', 'file'], voice_ids, width, header=True)
+
+    def encoded(i: int, fragment: Fragment) -> None:
+        # The index is rewritten as each candidate lands, listing only those
+        # that have: an audition stopped partway is adoptable as far as it got.
+        candidate = recorded[i]
+        index[i] = {
+            'seed': candidate.seed,
+            'filename': fragment.filename,
+            'text': audition_text,
+            # The voice that produced the candidate, tagged with its encoder --
+            # which is how `--adopt` knows what kind of voice to build.
+            'voice': candidate.model_dump(exclude_none=True),
+        }
+        filepath = encoder.fragment_path(fragment.filename or '', out_dir)
+        if encoder.audio_format == 'wav' and filepath.is_file():
+            if score := score_candidate(filepath, audition_text):
+                scores[i] = score
+                index[i]['score'] = score.model_dump()
+        with open(str(index_fp), 'w', encoding='utf-8', newline='\n') as f:
+            f.write(json.dumps([index[k] for k in sorted(index)], indent=4))
+        row = [str(candidates[i].seed), fragment.filename or '']
+        print_row(
+            console, row, voice_ids, width, voice_id=candidates[i].voice_id
+        )
+
+    encoder.encode_manifest(
+        Manifest(fragments=fragments), encode_dir=out_dir,
+        workers=args.workers, on_encoded=encoded
+    )
+    seed = seeds[0]
+    if scores:
+        ranked = sorted(scores, key=lambda i: scores[i].score, reverse=True)
+        if (best := candidates[ranked[0]].seed) is not None:
+            seed = best
+        print_ranking(console, ranked, scores, candidates, fragments, voice_ids)
     # Auditioned by name, the hint is the whole command. Adopting appends the
     # take's seed, so the name to reach for afterwards (in a `ZVOX:` tag, or
     # `--voice-name`) is not the one that was auditioned -- say which it is.
     name = voice_name or '<name>'
     console.print(
-        f'Adopt the one you like as a clone voice, e.g. seed {seeds[0]} '
-        f'(adopted as "{name}-{seeds[0]:02}"):\n'
-        f'  zaphodvox --adopt {seeds[0]} --voice-name "{name}"'
+        f'Adopt the one you like as a clone voice, e.g. seed {seed} '
+        f'(adopted as "{name}-{seed:02}"):\n'
+        f'  zaphodvox --adopt {seed} --voice-name "{name}"'
         f' --voices-file "{args.voices_file or "voices.json"}" {index_fp}'
     )
     console.print(f'[dim]Index written to {index_fp}[/dim]')
 
 
+def print_ranking(
+    console: Console, ranked: list[int], scores: dict[int, CandidateScore],
+    candidates: list[Voice], fragments: list[Fragment],
+    voice_ids: list[Optional[str]]
+) -> None:
+    """Prints the audition candidates best first, by their `CandidateScore`.
+
+    Args:
+        console: The `Console` object.
+        ranked: The indexes of the scored candidates, best first.
+        scores: The `CandidateScore` of each scored candidate, by index.
+        candidates: The candidate `Voice`s.
+        fragments: The candidates' `Fragment`s.
+        voice_ids: The preset voices being shopped (a voice column is shown
+            when there is more than one).
+    """
+    table = Table(title='Ranked (listen to the top few first)')
+    if len(voice_ids) > 1:
+        table.add_column('voice')
+    table.add_column('seed', justify='right')
+    table.add_column('file')
+    table.add_column('score', justify='right')
+    table.add_column('pace', justify='right')
+    table.add_column('clipped', justify='right')
+    table.add_column('silent', justify='right')
+    table.add_column('flatness', justify='right')
+    table.add_column('jitter', justify='right')
+    for i in ranked:
+        score = scores[i]
+        row = [
+            str(candidates[i].seed), fragments[i].filename or '',
+            f'{score.score:.2f}', f'{score.rate:.2f}×',
+            f'{score.clipping:.1%}', f'{score.silence:.0%}',
+            f'{score.flatness:.2f}', f'{score.pitch_jitter:.2f}',
+        ]
+        if len(voice_ids) > 1:
+            row.insert(0, candidates[i].voice_id or '')
+        table.add_row(*row)
+    console.print(table)
+
+
+def print_row(
+    console: Console, row: list[str], voice_ids: list[Optional[str]],
+    width: int, voice_id: Optional[str] = None, header: bool = False
+) -> None:
+    """Prints one row of the audition table, as its candidate finishes.
+
+    Each row is a table of its own, with the columns held to fixed widths so
+    the rows line up as they arrive.
+
+    Args:
+        console: The `Console` object.
+        row: The seed and file cells.
+        voice_ids: The preset voices being shopped (a voice column is shown
+            when there is more than one).
+        width: The width of the file column.
+        voice_id: The candidate's voice. Defaults to `None`.
+        header: Whether this is the header row. Defaults to `False`.
+    """
+    table = Table(show_header=False, box=None)
+    if len(voice_ids) > 1:
+        table.add_column(
+            min_width=max(len(v or '') for v in voice_ids), no_wrap=True
+        )
+        row = ['voice' if header else voice_id or '', *row]
+    table.add_column(justify='right', min_width=4)
+    table.add_column(min_width=width, no_wrap=True)
+    table.add_row(*row, style='bold' if header else None)
+    console.print(table)
+
+
 def named_audition_voice(args: Namespace) -> Voice:
     """Resolves the `--voice-name` an audition was asked for against the voices
         file.
@@ -820,6 +1023,33 @@ def write_named_voice(
     console.print(voice.model_dump_json(indent=4, exclude_none=True))
 
 
+def proof_all(args: Namespace, text: str, console: Console) -> None:
+    """Proofreads the input file, and any more given, each to its own report.
+
+    A shelf of manuscripts is proofed in one go, each file just as if it had
+    been given alone: its report, and its default wordlist, are named for it.
+
+    Args:
+        args: The parsed command-line arguments.
+        text: The text of the (first) input file.
+        console: The `Console` object.
+    """
+    if not args.more_inputfiles:
+        proof(args, text, console)
+        return
+    for inputfile in [args.inputfile, *args.more_inputfiles]:
+        console.rule(str(inputfile))
+        if inputfile != args.inputfile:
+            text = read_text_manifest(inputfile)[0]
+        proof(
+            Namespace(**{
+                **vars(args), 'inputfile': inputfile,
+                'basename': inputfile.stem
+            }),
+            text, console
+        )
+
+
 def proof(args: Namespace, text: str, console: Console) -> None:
     """Proofreads the text and writes a report of deterministic issues
         (spelling against a project wordlist, junk/unusual characters,
@@ -834,15 +1064,58 @@ def proof(args: Namespace, text: str, console: Console) -> None:
     dict_path: Path = args.dict or Path(f'{basename}.dict')
     out_dir: Optional[Path] = args.out_dir
 
-    speller = build_speller(args.dict_language, load_words(dict_path))
-    findings = proof_text(text, speller).findings
+    custom_words = load_words(dict_path)
+    speller = build_speller(
+        args.dict_language, custom_words, cache=cache_dir() / 'dictionaries'
+    )
+    version = dictionary_version(args.dict_language, custom_words)
+    checked = proof_text(
+        text, speller, workers=args.workers,
+        cache=SuggestionCache(cache_dir() / 'spelling' / f'{version}.json'),
+        budget=args.spell_budget
+    )
+    findings = checked.findings
+    fp = file_path(args.proof_out, f'{basename}-proof.json', out_dir)
     if args.llm_url:
-        client = LLMClient(args.llm_url, args.llm_model, timeout=args.timeout)
-        findings += proofread(text, client)
+        client = LLMClient(
+            args.llm_url, args.llm_model, timeout=args.timeout,
+            stream=args.llm_stream, connections=args.llm_workers
+        )
+        cache = LLMCache(cache_dir() / 'llm') if args.llm_cache else None
+        usage = LLMUsage()
+        # The index of the last pass sits beside its report; without the
+        # cache, every chunk is sent regardless.
+        index_fp = fp.with_name(f'{fp.stem}.lines.json')
+        index = LineIndex.read(index_fp) if args.llm_cache else LineIndex()
+        findings += proofread(
+            text, client, workers=args.llm_workers, cache=cache, usage=usage,
+            context=args.llm_context, index=index
+        )
+        with open(str(index_fp), 'w', encoding='utf-8', newline='\n') as f:
+            f.write(index.model_dump_json(exclude_none=True))
+        if usage.unchanged:
+            console.print(
+                f'[dim]LLM: {usage.unchanged} chunk(s) unchanged since the '
+                'last report[/dim]'
+            )
+        if cache is not None and cache.hits + cache.misses:
+            console.print(
+                f'[dim]LLM cache: {cache.hits} of '
+                f'{cache.hits + cache.misses} chunk(s) reused[/dim]'
+            )
+        if usage.chunks:
+            line = (
+                f'LLM: {len(usage.chunks)} completion(s) in '
+                f'{usage.seconds:.1f}s, {usage.prompt_tokens} prompt + '
+                f'{usage.completion_tokens} completion token(s)'
+            )
+            if (rate := usage.tokens_per_second) is not None:
+                line += f', {rate:.1f} token(s)/s'
+            console.print(f'[dim]{line}[/dim]')
     report = ProofReport.from_findings(findings)
     report.source_file = str(args.inputfile)
+    report.unsuggested = checked.unsuggested
 
-    fp = file_path(args.proof_out, f'{basename}-proof.json', out_dir)
     with open(str(fp), 'w', encoding='utf-8', newline='\n') as f:
         f.write(report.model_dump_json(indent=4, exclude_none=True))
 
@@ -868,6 +1141,11 @@ def proof(args: Namespace, text: str, console: Console) -> None:
             + '  '.join(f'{k}: {v}' for k, v in report.summary.items())
             + '[/dim]'
         )
+    if checked.unsuggested:
+        console.print(
+            f'[yellow]{checked.unsuggested} unknown word(s) left without '
+            'suggestions (--spell-budget); run again to find more.[/yellow]'
+        )
     console.print(f'[dim]Report written to {fp}[/dim]')
 
 
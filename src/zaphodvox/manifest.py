@@ -46,6 +46,15 @@ class Fragment(BaseModel):
     """The audio format for the speech conversion."""
     encoded: Optional[datetime] = None
     """The date/time of the speech conversion."""
+    loudness: Optional[float] = None
+    """The measured loudness of the speech in dBFS (gated RMS), which
+    `--normalize` levels the fragment from. Measured once, at encoding."""
+    trim_start: Optional[int] = None
+    """The milliseconds of dead air at the start of the speech, which `--trim`
+    leaves out when concatenating. The file itself is never rewritten."""
+    trim_end: Optional[int] = None
+    """The milliseconds of dead air at the end of the speech, which `--trim`
+    leaves out when concatenating."""
 
 
 class Manifest(BaseModel):
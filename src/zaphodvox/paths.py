@@ -1,7 +1,11 @@
 import os
 import re
+import tempfile
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Union
+
+CACHE_DIR_ENV = 'ZAPHODVOX_CACHE_DIR'
+"""The environment variable that overrides the cache directory."""
 
 
 def abspath(path: Path) -> Path:
@@ -40,6 +44,56 @@ def expanded_path(value: str) -> Path:
     return Path(value).expanduser()
 
 
+def cache_dir() -> Path:
+    """The directory zaphodvox keeps its caches in.
+
+    Everything in it can be rebuilt, just slowly, so it lives where the
+    platform expects throwaway data: `$XDG_CACHE_HOME/zaphodvox`, which is
+    `~/.cache/zaphodvox` unless set otherwise. `ZAPHODVOX_CACHE_DIR` overrides
+    both, for a faster disk or a shared one.
+
+    Returns:
+        The cache directory `Path` (which may not exist yet).
+    """
+    if value := os.environ.get(CACHE_DIR_ENV):
+        return expanded_path(value)
+    if value := os.environ.get('XDG_CACHE_HOME'):
+        return expanded_path(value) / 'zaphodvox'
+    return Path.home() / '.cache' / 'zaphodvox'
+
+
+def atomic_write(path: Path, data: Union[str, bytes]) -> None:
+    """Writes a file whole, or not at all.
+
+    The data is written to a temporary file beside it and moved into place, so
+    a run interrupted mid-write -- or a concurrent one writing the same file --
+    never leaves a truncated file behind, and a failed write leaves no
+    temporary one. The directory is created as needed.
+
+    The caches write through this and pass over an `OSError`: a cache that
+    cannot be written only costs the next run the time it would have saved.
+
+    Args:
+        path: The `Path` of the file.
+        data: The contents: text (written as UTF-8) or bytes.
+
+    Raises:
+        OSError: If the file cannot be written.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data.encode('utf-8') if isinstance(data, str) else data)
+        os.replace(temp, path)
+    except BaseException:
+        try:
+            os.unlink(temp)
+        except OSError:
+            pass
+        raise
+
+
 def name_slug(voice_name: str) -> str:
     """Reduces a voice name to something safe to build a filename from.
 
@@ -34,9 +34,10 @@ class ProgressBar():
         args.append(TextColumn('['))
         args.append(TimeElapsedColumn())
         args.append(TextColumn(']'))
+        args.append(TextColumn('{task.fields[status]}'))
         self._progress = Progress(*args)
         self._task_id = self._progress.add_task(
-            title, total=total, completed=completed
+            title, total=total, completed=completed, status=''
         )
         self._live = Live(Panel.fit(self._progress, title=title))
 
@@ -53,6 +54,14 @@ class ProgressBar():
         """
         self._progress.advance(self._task_id, advance=n)
 
+    def status(self, text: str) -> None:
+        """Shows a line of status beside the progress, in place of the last.
+
+        Args:
+            text: The status to show.
+        """
+        self._progress.update(self._task_id, status=text)
+
     def stop(self) -> None:
         """Completes and stops the progress bar."""
 
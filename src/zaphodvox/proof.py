@@ -1,22 +1,49 @@
+import hashlib
+import json
 import re
 import unicodedata
-from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from difflib import SequenceMatcher
+from functools import lru_cache
+from math import ceil
+from pathlib import Path
+from time import time
+from typing import NamedTuple, Optional
 
 from pydantic import BaseModel
 from spellchecker import SpellChecker
 
+from zaphodvox.paths import atomic_write
+
 WORD_RE = re.compile(r"[A-Za-z]+(?:'[A-Za-z]+)*")
 """Matches word tokens (letters, with internal apostrophes)."""
 
 REPEAT_RE = re.compile(r'([*_#~=+\-])\1{2,}')
 """Matches runs of 3+ of the same markup/punctuation character."""
 
+SCAN_RE = re.compile(
+    rf'(?P<word>{WORD_RE.pattern})'
+    r'|(?P<run>(?P<mark>[*_#~=+\-])(?P=mark){2,})'
+    r'|(?P<odd>[^\t\x20-\x7e])'
+)
+"""Matches, in one pass over a line, the words, the runs of `REPEAT_RE`, and
+every character that might be unusual (anything but a tab or printable ASCII).
+The three never match the same characters, so together they find just what
+each would alone."""
+
 ZERO_WIDTH = {'\u200b', '\u200c', '\u200d', '\ufeff', '\u00a0'}
 """Zero-width and non-breaking characters that are usually unwanted."""
 
 MAX_REPORTED_LINES = 20
 """The maximum number of line numbers to list for a grouped finding."""
 
+SHARDS_PER_WORKER = 4
+"""How many ranges of lines each worker process is given, so that one range of
+heavy going does not leave the others idle."""
+
+_speller: Optional[SpellChecker] = None
+"""The `SpellChecker` of a worker process."""
+
 
 class ProofFinding(BaseModel):
     """A single issue found while proofing a manuscript."""
@@ -50,6 +77,9 @@ class ProofReport(BaseModel):
     """A count of findings by type."""
     findings: list[ProofFinding] = []
     """The individual findings."""
+    unsuggested: Optional[int] = None
+    """The unknown words left without suggestions, when the time to find them
+    ran out."""
 
     @classmethod
     def from_findings(cls, findings: list[ProofFinding]) -> 'ProofReport':
@@ -67,44 +97,236 @@ class ProofReport(BaseModel):
         return cls(summary=summary, findings=findings)
 
 
-def check_spelling(
-    lines: list[str], speller: SpellChecker
-) -> list[ProofFinding]:
-    """Flags words absent from the dictionary, grouped by unique word.
+def fingerprint_lines(lines: list[str]) -> list[str]:
+    """A short hash of each line, to tell which have changed since.
 
     Args:
         lines: The text lines.
-        speller: The `SpellChecker` (seeded with any custom words).
 
     Returns:
-        One finding per unique unknown word.
+        One hex digest per line.
+    """
+    return [
+        hashlib.blake2b(line.encode('utf-8'), digest_size=8).hexdigest()
+        for line in lines
+    ]
+
+
+class LineIndex(BaseModel):
+    """The manuscript as the LLM last proofread it, kept beside the report
+    (as `*-proof.lines.json`).
+
+    A manuscript is proofread again after every fix. Compared line by line
+    with the one before, the chunks the LLM was given that have not changed
+    -- even if they have moved, because lines above them were added or
+    removed -- keep their findings, and only the chunks with changed or new
+    lines are sent again.
     """
-    occurrences: dict[str, dict] = {}
-    for number, line in enumerate(lines, start=1):
-        for match in WORD_RE.finditer(line):
-            token = match.group(0)
-            base = token[:-2] if token.lower().endswith("'s") else token
-            base = base.strip("'")
-            key = base.lower()
-            if len(key) < 2:
-                continue
-            entry = occurrences.setdefault(key, {'text': base, 'lines': []})
-            entry['lines'].append(number)
+
+    fingerprints: list[str] = []
+    """The `fingerprint_lines()` of the manuscript."""
+    llm: Optional[str] = None
+    """A hash of the model and prompt the chunks were proofread with: another
+    model's findings are no use."""
+    chunks: list[tuple[int, int]] = []
+    """The first and last (1-based) line of each chunk."""
     findings: list[ProofFinding] = []
-    for key in sorted(speller.unknown(list(occurrences.keys()))):
-        entry = occurrences[key]
+    """The LLM's findings."""
+
+    @classmethod
+    def read(cls, path: Path) -> 'LineIndex':
+        """Reads the index kept beside a report.
+
+        Args:
+            path: The `Path` of the index.
+
+        Returns:
+            The `LineIndex`, or an empty one if there is none (or it cannot be
+                read), so that every chunk is sent.
+        """
+        try:
+            with open(str(path), 'r', encoding='utf-8') as f:
+                return cls.model_validate_json(f.read())
+        except (OSError, ValueError):
+            return cls()
+
+    def moved(self, fingerprints: list[str]) -> dict[int, int]:
+        """Where the lines that have not changed are now.
+
+        Args:
+            fingerprints: The `fingerprint_lines()` of the manuscript now.
+
+        Returns:
+            The (1-based) line number of each unchanged line, by its number
+                then.
+        """
+        matcher = SequenceMatcher(None, self.fingerprints, fingerprints)
+        return {
+            old + offset + 1: new + offset + 1
+            for old, new, size in matcher.get_matching_blocks()
+            for offset in range(size)
+        }
+
+
+class SuggestionCache:
+    """The spelling suggestions found on earlier runs, kept on disk.
+
+    Finding a suggestion means trying every spelling within two edits of the
+    unknown word against the dictionary, which takes the better part of a
+    second a word -- and a fantasy novel has hundreds of unknown words, the
+    same ones every time it is proofed. The suggestions are kept in one file
+    per `dictionary_version()`, so a new dictionary (or a word added to the
+    project's) starts a new one.
+    """
+
+    def __init__(self, path: Path) -> None:
+        """Initializes the `SuggestionCache`, reading any kept suggestions.
+
+        Args:
+            path: The `Path` of the file to keep the suggestions in.
+        """
+        self._path = path
+        """The file the suggestions are kept in."""
+        self._suggestions: dict[str, list[str]] = {}
+        """The suggestions, by lowercased word."""
+        self._changed = False
+        """Whether there are suggestions not yet saved."""
+        try:
+            data = json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict):
+            self._suggestions = {
+                k: v for k, v in data.items() if isinstance(v, list)
+            }
+
+    def get(self, key: str) -> Optional[list[str]]:
+        """The suggestions kept for a word, if any were."""
+        return self._suggestions.get(key)
+
+    def put(self, key: str, suggestions: list[str]) -> None:
+        """Keeps the suggestions for a word."""
+        self._suggestions[key] = suggestions
+        self._changed = True
+
+    def save(self) -> None:
+        """Writes the suggestions out, if there are new ones and the cache can
+        be written."""
+        if not self._changed:
+            return
+        try:
+            atomic_write(self._path, json.dumps(self._suggestions))
+            self._changed = False
+        except OSError:
+            pass
+
+
+def _suggest(
+    speller: SpellChecker, keys: list[str], deadline: Optional[float] = None
+) -> list[Optional[list[str]]]:
+    """Suggests corrections for unknown words, most common first.
+
+    Args:
+        speller: The `SpellChecker`.
+        keys: The lowercased unknown words.
+        deadline: The `time()` to stop looking at, if any.
+
+    Returns:
+        Up to five suggestions for each word, or `None` for the words the
+            `deadline` came before.
+    """
+    suggestions: list[Optional[list[str]]] = []
+    for key in keys:
+        if deadline is not None and time() >= deadline:
+            suggestions.append(None)
+            continue
         candidates = (speller.candidates(key) or set()) - {key}
-        suggestions = sorted(
-            candidates, key=lambda word: speller.word_frequency[word],
-            reverse=True
-        )[:5]
+        # Alphabetically among equally common words: a set's order changes
+        # from run to run, and a kept suggestion should match a fresh one.
+        suggestions.append(sorted(
+            candidates,
+            key=lambda word: (-speller.word_frequency[word], word)
+        )[:5])
+    return suggestions
+
+
+class _Spelling(NamedTuple):
+    """The spelling findings, and how many of them lack suggestions."""
+
+    findings: list[ProofFinding]
+    """One finding per unknown word, alphabetically."""
+    unsuggested: int
+    """The unknown words the time ran out before."""
+
+
+def _spelling_findings(
+    occurrences: dict[str, dict], speller: SpellChecker,
+    pool: Optional[ProcessPoolExecutor] = None, workers: int = 1,
+    cache: Optional[SuggestionCache] = None, budget: Optional[float] = None
+) -> _Spelling:
+    """Reports the unknown words among the occurrences.
+
+    Args:
+        occurrences: The `_Scan.words`.
+        speller: The `SpellChecker`.
+        pool: The process pool to find suggestions in, if any.
+        workers: The worker processes in the `pool`.
+        cache: The `SuggestionCache` to reuse and keep suggestions in, if any.
+        budget: The seconds to spend finding suggestions not in the `cache`,
+            if limited.
+
+    Returns:
+        The `_Spelling`.
+    """
+    unknown = sorted(speller.unknown(list(occurrences.keys())))
+    found: dict[str, Optional[list[str]]] = {}
+    if cache is not None:
+        found = {k: s for k in unknown if (s := cache.get(k)) is not None}
+    todo = [key for key in unknown if key not in found]
+    deadline = None if budget is None else time() + budget
+    if pool is None or not todo:
+        suggested = _suggest(speller, todo, deadline)
+    else:
+        size = max(1, ceil(len(todo) / (workers * SHARDS_PER_WORKER)))
+        shards = [todo[i:i + size] for i in range(0, len(todo), size)]
+        suggested = [
+            s for shard in pool.map(
+                _worker_suggest, shards, [deadline] * len(shards)
+            ) for s in shard
+        ]
+    for key, suggestions in zip(todo, suggested):
+        found[key] = suggestions
+        if cache is not None and suggestions is not None:
+            cache.put(key, suggestions)
+    if cache is not None:
+        cache.save()
+    findings: list[ProofFinding] = []
+    for key in unknown:
+        entry = occurrences[key]
+        suggestions = found[key] or []
         findings.append(ProofFinding(
             line=entry['lines'][0], type='spelling', source='dictionary',
             severity='warning', text=entry['text'], message='Unknown word',
             suggestions=suggestions, count=len(entry['lines']),
             lines=entry['lines'][:MAX_REPORTED_LINES],
         ))
-    return findings
+    unsuggested = sum(found[key] is None for key in unknown)
+    return _Spelling(findings, unsuggested)
+
+
+def check_spelling(
+    lines: list[str], speller: SpellChecker
+) -> list[ProofFinding]:
+    """Flags words absent from the dictionary, grouped by unique word.
+
+    Args:
+        lines: The text lines.
+        speller: The `SpellChecker` (seeded with any custom words).
+
+    Returns:
+        One finding per unique unknown word.
+    """
+    return _spelling_findings(_scan(lines).words, speller).findings
 
 
 def check_repeated_chars(lines: list[str]) -> list[ProofFinding]:
@@ -116,25 +338,17 @@ def check_repeated_chars(lines: list[str]) -> list[ProofFinding]:
     Returns:
         One finding per run.
     """
-    findings: list[ProofFinding] = []
-    for number, line in enumerate(lines, start=1):
-        for match in REPEAT_RE.finditer(line):
-            run = match.group(0)
-            findings.append(ProofFinding(
-                line=number, type='repeated-char', source='regex',
-                severity='info', text=run,
-                message=(
-                    f"Run of {len(run)} '{match.group(1)}' "
-                    '(stray markup or artifact?)'
-                ),
-            ))
-    return findings
+    return _scan(lines).repeats
 
 
+@lru_cache(maxsize=None)
 def _is_unusual(char: str) -> bool:
     """Whether a character is a control, format, or otherwise unexpected one
         (excluding tabs, which the whitespace check handles).
 
+    Each character is looked up once and remembered: a book uses a few dozen
+    characters outside printable ASCII, a great many times over.
+
     Args:
         char: The character to test.
 
@@ -148,20 +362,11 @@ def _is_unusual(char: str) -> bool:
     return unicodedata.category(char) in ('Cc', 'Cf', 'Co', 'Cn')
 
 
-def check_unusual_chars(lines: list[str]) -> list[ProofFinding]:
-    """Flags control/format/unexpected characters, grouped by character.
-
-    Args:
-        lines: The text lines.
-
-    Returns:
-        One finding per unusual character.
-    """
-    occurrences: dict[str, list[int]] = {}
-    for number, line in enumerate(lines, start=1):
-        for char in line:
-            if _is_unusual(char):
-                occurrences.setdefault(char, []).append(number)
+def _unusual_findings(
+    occurrences: dict[str, list[int]]
+) -> list[ProofFinding]:
+    """Reports the unusual characters a `_scan()` found, one finding per
+    character."""
     findings: list[ProofFinding] = []
     for char, numbers in occurrences.items():
         name = unicodedata.name(char, 'UNKNOWN')
@@ -174,20 +379,43 @@ def check_unusual_chars(lines: list[str]) -> list[ProofFinding]:
     return findings
 
 
-def check_whitespace(lines: list[str]) -> list[ProofFinding]:
-    """Flags trailing whitespace, tabs, and runs of 3+ blank lines.
+def check_unusual_chars(lines: list[str]) -> list[ProofFinding]:
+    """Flags control/format/unexpected characters, grouped by character.
 
     Args:
         lines: The text lines.
 
+    Returns:
+        One finding per unusual character.
+    """
+    return _unusual_findings(_scan(lines).unusual)
+
+
+class _Whitespace(NamedTuple):
+    """The numbers of the lines with each kind of whitespace issue."""
+
+    trailing: list[int]
+    """The lines with trailing whitespace."""
+    tabs: list[int]
+    """The lines with tabs."""
+    blank: list[int]
+    """The blank lines."""
+
+
+def _whitespace_findings(
+    found: _Whitespace, total: int
+) -> list[ProofFinding]:
+    """Reports the whitespace issues a `_scan()` found.
+
+    Args:
+        found: The `_Whitespace`.
+        total: The number of lines in the text.
+
     Returns:
         Grouped whitespace findings.
     """
     findings: list[ProofFinding] = []
-    trailing = [
-        number for number, line in enumerate(lines, start=1)
-        if line.strip() and line != line.rstrip()
-    ]
+    trailing, tabs = found.trailing, found.tabs
     if trailing:
         findings.append(ProofFinding(
             line=trailing[0], type='whitespace', source='regex',
@@ -195,47 +423,211 @@ def check_whitespace(lines: list[str]) -> list[ProofFinding]:
             message='Lines with trailing whitespace', count=len(trailing),
             lines=trailing[:MAX_REPORTED_LINES],
         ))
-    tabs = [
-        number for number, line in enumerate(lines, start=1) if '\t' in line
-    ]
     if tabs:
         findings.append(ProofFinding(
             line=tabs[0], type='whitespace', source='regex', severity='info',
             text='tab', message='Lines containing tab characters',
             count=len(tabs), lines=tabs[:MAX_REPORTED_LINES],
         ))
-    run = 0
-    start = 0
-    for number, line in enumerate(lines, start=1):
-        if line.strip():
-            if run > 2:
-                findings.append(ProofFinding(
-                    line=start, type='whitespace', source='regex',
-                    severity='info', text=f'{run} blank lines',
-                    message=f'{run} consecutive blank lines',
-                ))
-            run = 0
-        else:
-            start = number if run == 0 else start
-            run += 1
+    # A run of blank lines is reported once a line of text ends it; one that
+    # runs to the end of the text is just how the file ends.
+    blank = set(found.blank)
+    for start in found.blank:
+        if start - 1 in blank:
+            continue
+        end = start
+        while end + 1 in blank:
+            end += 1
+        run = end - start + 1
+        if run > 2 and end < total:
+            findings.append(ProofFinding(
+                line=start, type='whitespace', source='regex',
+                severity='info', text=f'{run} blank lines',
+                message=f'{run} consecutive blank lines',
+            ))
     return findings
 
 
-def proof_text(text: str, speller: SpellChecker) -> ProofReport:
+def check_whitespace(lines: list[str]) -> list[ProofFinding]:
+    """Flags trailing whitespace, tabs, and runs of 3+ blank lines.
+
+    Args:
+        lines: The text lines.
+
+    Returns:
+        Grouped whitespace findings.
+    """
+    return _whitespace_findings(_scan(lines).whitespace, len(lines))
+
+
+class _Scan(NamedTuple):
+    """What one range of lines has to say to each check."""
+
+    words: dict[str, dict]
+    """The lines each word is on, by lowercased word: the word as first
+    written (`text`), and the numbers of the lines (`lines`)."""
+    repeats: list[ProofFinding]
+    """The `check_repeated_chars()` findings."""
+    unusual: dict[str, list[int]]
+    """The lines each unusual character is on (once per occurrence), by
+    character, in the order the characters first appear."""
+    whitespace: _Whitespace
+    """The lines with whitespace issues."""
+
+
+def _scan(lines: list[str], first: int = 1) -> _Scan:
+    """Runs every check over a range of lines, in a single pass.
+
+    Each line is matched against `SCAN_RE` once, rather than once for each
+    check, and only the characters it picks out are looked up as possibly
+    unusual: the rest of a line never leaves the regular expression engine.
+
+    Args:
+        lines: The text lines.
+        first: The line number of the first line. Defaults to `1`.
+
+    Returns:
+        The `_Scan`.
+    """
+    scan = _Scan({}, [], {}, _Whitespace([], [], []))
+    words, repeats, unusual = scan.words, scan.repeats, scan.unusual
+    trailing, tabs, blank = scan.whitespace
+    # The word each token stands for (`None` if too short to check), worked
+    # out the first time the token is seen.
+    keys: dict[str, Optional[str]] = {}
+    for number, line in enumerate(lines, start=first):
+        if not line.strip():
+            blank.append(number)
+        elif line != line.rstrip():
+            trailing.append(number)
+        if '\t' in line:
+            tabs.append(number)
+        for match in SCAN_RE.finditer(line):
+            kind = match.lastgroup
+            if kind == 'word':
+                if (key := keys.get(token := match.group(), '')) == '':
+                    base = token[:-2] if token.lower().endswith("'s") else token
+                    base = base.strip("'")
+                    key = keys[token] = base.lower() if len(base) > 1 else None
+                    if key is not None and key not in words:
+                        words[key] = {'text': base, 'lines': []}
+                if key is not None:
+                    words[key]['lines'].append(number)
+            elif kind == 'run':
+                run = match.group()
+                repeats.append(ProofFinding(
+                    line=number, type='repeated-char', source='regex',
+                    severity='info', text=run,
+                    message=(
+                        f"Run of {len(run)} '{match.group('mark')}' "
+                        '(stray markup or artifact?)'
+                    ),
+                ))
+            elif _is_unusual(char := match.group()):
+                unusual.setdefault(char, []).append(number)
+    return scan
+
+
+def _merge(scans: list[_Scan]) -> _Scan:
+    """Puts the scans of consecutive ranges of lines back together.
+
+    Merged in order, a word keeps the spelling it was first written with and
+    its lines stay in order, exactly as if the text had been scanned whole.
+
+    Args:
+        scans: The `_Scan`s, in line order.
+
+    Returns:
+        The `_Scan` of all the lines.
+    """
+    merged = _Scan({}, [], {}, _Whitespace([], [], []))
+    for scan in scans:
+        for key, entry in scan.words.items():
+            merged.words.setdefault(
+                key, {'text': entry['text'], 'lines': []}
+            )['lines'].extend(entry['lines'])
+        merged.repeats.extend(scan.repeats)
+        for char, numbers in scan.unusual.items():
+            merged.unusual.setdefault(char, []).extend(numbers)
+        for kind, numbers in zip(merged.whitespace, scan.whitespace):
+            kind.extend(numbers)
+    return merged
+
+
+def _init_worker(speller: SpellChecker) -> None:
+    """Gives a worker process its `SpellChecker`, once."""
+    global _speller
+    _speller = speller
+
+
+def _worker_scan(shard: tuple[int, list[str]]) -> _Scan:
+    """`_scan()`s a `(first, lines)` range of lines, in a worker process."""
+    first, lines = shard
+    return _scan(lines, first)
+
+
+def _worker_suggest(
+    keys: list[str], deadline: Optional[float]
+) -> list[Optional[list[str]]]:
+    """`_suggest()`s corrections for unknown words, in a worker process."""
+    assert _speller is not None
+    return _suggest(_speller, keys, deadline)
+
+
+def proof_text(
+    text: str, speller: SpellChecker, workers: int = 1,
+    cache: Optional[SuggestionCache] = None, budget: Optional[float] = None
+) -> ProofReport:
     """Runs all deterministic checks over the text.
 
+    With `workers`, the lines are cut into ranges and scanned across that many
+    processes, and the unknown words looked up for suggestions the same way
+    (the dictionary's edit-distance search is by far the slowest part). The
+    ranges are merged back in order, so the report is the same as from one.
+
+    Suggestions already in the `cache` are not looked for again. Those that
+    are can be held to a time `budget`: the words it runs out before are
+    still reported, without suggestions, and are looked for first on the next
+    run, since the ones found this time are kept.
+
     Args:
         text: The manuscript text.
         speller: The `SpellChecker` (seeded with any custom words).
+        workers: How many processes to proof with. Defaults to `1`.
+        cache: The `SuggestionCache` to reuse and keep suggestions in, if any.
+        budget: The seconds to spend finding suggestions, if limited (`0`
+            finds none).
 
     Returns:
         The `ProofReport`.
     """
     lines = text.split('\n')
+    if workers <= 1:
+        scan = _scan(lines)
+        spelling = _spelling_findings(
+            scan.words, speller, cache=cache, budget=budget
+        )
+    else:
+        size = max(1, ceil(len(lines) / (workers * SHARDS_PER_WORKER)))
+        shards = [
+            (i + 1, lines[i:i + size]) for i in range(0, len(lines), size)
+        ]
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker,
+            initargs=(speller,)
+        ) as pool:
+            scan = _merge(list(pool.map(_worker_scan, shards)))
+            spelling = _spelling_findings(
+                scan.words, speller, pool=pool, workers=workers, cache=cache,
+                budget=budget
+            )
     findings = (
-        check_spelling(lines, speller)
-        + check_repeated_chars(lines)
-        + check_unusual_chars(lines)
-        + check_whitespace(lines)
+        spelling.findings
+        + scan.repeats
+        + _unusual_findings(scan.unusual)
+        + _whitespace_findings(scan.whitespace, len(lines))
     )
-    return ProofReport.from_findings(findings)
+    report = ProofReport.from_findings(findings)
+    if spelling.unsuggested:
+        report.unsuggested = spelling.unsuggested
+    return report
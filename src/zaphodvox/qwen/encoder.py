@@ -1,14 +1,28 @@
+import json
+import wave
 from argparse import Namespace
+from base64 import b64decode
 from pathlib import Path
-from typing import Optional
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Any, Callable, Optional
 
 import requests
-from tenacity import Retrying, stop_after_attempt
+from requests.exceptions import HTTPError, ReadTimeout, RequestException
 
+from zaphodvox.audio import DEFAULT_PARAMS, audio_duration
 from zaphodvox.encoder import Encoder, PresetVoice
-from zaphodvox.http import request_timeout
+from zaphodvox.http import (
+    CircuitBreaker,
+    TimeoutEstimator,
+    is_retryable,
+    request_timeout,
+    retrying,
+    warm_timeout,
+)
 from zaphodvox.paths import abspath
 from zaphodvox.qwen.voice import QwenVoice
+from zaphodvox.timing import Transfer
 from zaphodvox.voice import Voice
 
 DEFAULT_URL = 'http://127.0.0.1:4123'
@@ -17,6 +31,26 @@ DEFAULT_URL = 'http://127.0.0.1:4123'
 FILE_EXTENSIONS = {'wav': 'wav', 'mp3': 'mp3'}
 """The file extension for supported audio formats (`response_format`s)."""
 
+WARMUP_TEXT = 'Ready.'
+"""What is synthesized to load a model before an encode."""
+
+STREAM_PARAMS = DEFAULT_PARAMS
+"""The sample format of the raw PCM the server streams: the model's own."""
+
+STREAM_CHUNK_BYTES = 4800
+"""How much streamed audio to read at a time: a tenth of a second."""
+
+UNSUPPORTED_STATUSES = (404, 405, 501)
+"""The statuses a server without a batch endpoint answers one with."""
+
+
+def _batch_unsupported(error: BaseException) -> bool:
+    """Whether a failed batch request says the server has no batch endpoint."""
+    return (
+        isinstance(error, HTTPError) and error.response is not None
+        and error.response.status_code in UNSUPPORTED_STATUSES
+    )
+
 
 class QwenEncoder(Encoder):
     """An `Encoder` subclass that uses a locally-hosted Qwen3-TTS server to
@@ -31,6 +65,8 @@ class QwenEncoder(Encoder):
         url: Optional[str] = None,
         audio_format: Optional[str] = None,
         timeout: Optional[float] = None,
+        stream: bool = False,
+        on_chunk: Optional[Callable[[Path, bytes], None]] = None,
     ) -> None:
         """Initializes the `QwenEncoder` object.
 
@@ -41,6 +77,14 @@ class QwenEncoder(Encoder):
                 Defaults to `wav`.
             timeout: The seconds to wait for a response. Defaults to
                 `DEFAULT_READ_TIMEOUT`; `0` waits forever.
+            stream: Whether to have the server stream the audio as it is
+                generated (`wav` only). Defaults to `False`.
+            on_chunk: Called with the file and the frames of each chunk of
+                streamed audio as it is written. Defaults to `None`.
+
+        Raises:
+            ValueError: If `stream` is asked of an audio format other than
+                `wav`.
         """
         self._url = (url or DEFAULT_URL).rstrip('/')
         """The base URL of the Qwen3-TTS server."""
@@ -48,6 +92,22 @@ class QwenEncoder(Encoder):
         """The audio format (`response_format`) to request."""
         self._timeout = request_timeout(timeout)
         """The `(connect, read)` timeout for every request."""
+        self._breaker = CircuitBreaker()
+        """Pauses the encode while the server is down, rather than letting
+        every fragment use up its retries on it."""
+        self._estimator = TimeoutEstimator()
+        """Sizes each synthesis request's read timeout to its text."""
+        self._batch: Optional[bool] = None
+        """Whether the server has a batch endpoint, once it has been asked."""
+        if stream and self._audio_format != 'wav':
+            raise ValueError('Streamed audio can only be written as wav.')
+        self._stream = stream
+        """Whether to have the server stream the audio as it is generated."""
+        self.on_chunk = on_chunk
+        """Called with the file and the frames of each chunk of streamed audio
+        as it is written, so playback (or a pipe) can start with the first.
+        A request that is retried starts its file over, and is given to
+        `on_chunk` again from the start."""
 
     @property
     def audio_format(self) -> str:
@@ -95,38 +155,375 @@ class QwenEncoder(Encoder):
                 f'against "{anchor}").'
             )
 
-    def t2s(self, text: str, voice: Voice, filepath: Path) -> None:
+    def warmup(self, voices: list[Voice]) -> None:
+        """Load the server's models before the first fragment, and tighten the
+        read timeout once they are.
+
+        The server loads its clone and design models on first use and compiles
+        them, which takes minutes -- the reason the default read timeout is
+        ten. Waiting for the server to answer, then synthesizing a word once
+        with each kind of voice (preset, clone, design) the encode will use,
+        moves that stall out of the first real fragment. Every fragment after
+        it is then held to `WARM_READ_TIMEOUT`, so a hung server is noticed in
+        minutes rather than ten -- unless a timeout of its own was asked for.
+
+        Args:
+            voices: The distinct `QwenVoice`s the encode will use.
+        """
+        for attempt in retrying(self._breaker):
+            with attempt:
+                with requests.get(
+                    f'{self._url}/v1/voices', timeout=self._timeout
+                ) as r:
+                    r.raise_for_status()
+        self._breaker.success()
+        modes: dict[str, QwenVoice] = {}
+        for voice in voices:
+            if isinstance(voice, QwenVoice):
+                mode = (
+                    'clone' if voice.is_clone
+                    else 'design' if voice.is_design else 'preset'
+                )
+                modes.setdefault(mode, voice)
+        with TemporaryDirectory() as tmp:
+            filepath = Path(tmp) / f'warmup.{self.file_extension}'
+            for voice in modes.values():
+                # A word that took a model load to say is no measure of how
+                # fast the server speaks.
+                self.t2s(WARMUP_TEXT, voice, filepath, observe=False)
+        self._timeout = warm_timeout(self._timeout)
+
+    def t2s(
+        self, text: str, voice: Voice, filepath: Path, observe: bool = True
+    ) -> Transfer:
         """Convert text to speech using the specified voice and save it to the
         given filepath.
 
+        A failed request is retried as `retrying()` sees fit: never, if the
+        server rejected it; after a growing, jittered backoff, if it might yet
+        succeed; and, when the server looks to be down, once it is back.
+
+        Each request is allowed as long as its text should take at the speed
+        the server has been going (see `TimeoutEstimator`). A request that
+        times out anyway is retried under the full timeout: it may be the
+        server that slowed down, not the server that hung.
+
         Args:
             text: The text to convert to speech.
             voice: The `QwenVoice` to use for the speech conversion.
             filepath: The `Path` of the generated audio file.
+            observe: Whether to count the request towards the server's speed.
+                Defaults to `True`.
+
+        Returns:
+            The `Transfer` of the attempt that succeeded, and how many it took.
 
         Raises:
             ValueError: If `voice` is not a `QwenVoice`.
         """
         if not isinstance(voice, QwenVoice):
             raise ValueError('Not a QwenVoice.')
-        for attempt in Retrying(reraise=True, stop=stop_after_attempt(5)):
+        timed_out = False
+        for attempt in retrying(self._breaker):
             with attempt:
-                if voice.is_clone:
-                    self._t2s_clone(text, voice, filepath)
-                elif voice.is_design:
-                    self._t2s_design(text, voice, filepath)
-                else:
-                    self._t2s_preset(text, voice, filepath)
+                timeout = (
+                    self._timeout if timed_out
+                    else self._estimator.timeout(len(text), self._timeout)
+                )
+                try:
+                    if voice.is_clone:
+                        transfer = self._t2s_clone(
+                            text, voice, filepath, timeout
+                        )
+                    elif voice.is_design:
+                        transfer = self._t2s_design(
+                            text, voice, filepath, timeout
+                        )
+                    else:
+                        transfer = self._t2s_preset(
+                            text, voice, filepath, timeout
+                        )
+                except ReadTimeout:
+                    timed_out = True
+                    raise
+        self._breaker.success()
+        if observe:
+            self._estimator.observe(len(text), transfer.ttfb)
+        return transfer._replace(
+            attempts=attempt.retry_state.attempt_number
+        )
+
+    def t2s_batch(
+        self, texts: list[str], voice: Voice, filepaths: list[Path]
+    ) -> Optional[list[Transfer]]:
+        """Convert several texts to speech in one request to the server's batch
+        endpoint, which generates them side by side on the GPU.
+
+        Whether the server has one is asked once, of `GET /v1/capabilities`
+        (see `batch_capable()`). The items are the bodies the single-text
+        endpoints take, listed under `items`: as JSON for a preset or designed
+        voice, and as a JSON form field beside the one upload of the reference
+        clip for a clone. The audio comes back as a JSON list of base64 `audio`
+        results, in order.
+
+        The request is retried as `t2s()` is, but for the answers of a server
+        without the endpoint (`UNSUPPORTED_STATUSES`). Those are final: a `501`
+        would otherwise be retried as an outage, and open the breaker on a
+        server that is quite well. A server that turns out not to batch after
+        all -- the endpoint is missing, or returns the wrong number of results
+        -- is not asked again.
+
+        Args:
+            texts: The texts to convert to speech.
+            voice: The `QwenVoice` to use for all of them.
+            filepaths: The `Path`s of the generated audio files.
+
+        Returns:
+            A `Transfer` per text (each carrying the request's timings), or
+                `None` if the server has no batch endpoint.
+
+        Raises:
+            ValueError: If `voice` is not a `QwenVoice`.
+        """
+        if not isinstance(voice, QwenVoice):
+            raise ValueError('Not a QwenVoice.')
+        if not self.batch_capable():
+            return None
+        chars = sum(len(text) for text in texts)
+        try:
+            for attempt in retrying(
+                self._breaker,
+                retryable=lambda e: (
+                    not _batch_unsupported(e) and is_retryable(e)
+                ),
+            ):
+                with attempt:
+                    timeout = self._estimator.timeout(chars, self._timeout)
+                    results = self._post_batch(texts, voice, timeout)
+        except HTTPError as e:
+            if not _batch_unsupported(e):
+                raise
+            self._batch = False
+            return None
+        self._breaker.success()
+        if results is None or len(results[2]) != len(texts):
+            self._batch = False
+            return None
+        ttfb, transfer, audio = results
+        self._estimator.observe(chars, ttfb)
+        transfers = []
+        for filepath, data in zip(filepaths, audio):
+            filepath.write_bytes(data)
+            transfers.append(Transfer(
+                ttfb=ttfb, transfer=transfer, received=len(data),
+                attempts=attempt.retry_state.attempt_number,
+                duration=audio_duration(data),
+            ))
+        return transfers
+
+    def batch_capable(self) -> bool:
+        """Whether the server has a batch synthesis endpoint.
+
+        Asked of `GET /v1/capabilities` the first time, and remembered. A
+        server without the endpoint -- any server but one that says `batch` --
+        is simply one that is sent a request per fragment, so a failure to
+        answer is taken as a no rather than retried.
+
+        Returns:
+            `True` if the server batches.
+        """
+        if self._batch is None:
+            try:
+                with requests.get(
+                    f'{self._url}/v1/capabilities', timeout=self._timeout
+                ) as r:
+                    r.raise_for_status()
+                    self._batch = bool(r.json().get('batch'))
+            except (RequestException, ValueError, AttributeError):
+                self._batch = False
+        return self._batch
+
+    def _post_batch(
+        self, texts: list[str], voice: QwenVoice,
+        timeout: Optional[tuple[float, float]]
+    ) -> Optional[tuple[float, float, list[bytes]]]:
+        """`POST` a batch synthesis request.
+
+        Args:
+            texts: The texts to convert to speech.
+            voice: The `QwenVoice` to use for all of them.
+            timeout: The `(connect, read)` timeout for the request.
+
+        Returns:
+            The seconds to the first byte, the seconds spent receiving the
+                body, and the audio of each result -- or `None` if the response
+                is not a list of them.
+        """
+        start = perf_counter()
+        url = f'{self._url}/v1/audio/speech/batch'
+        if voice.is_clone:
+            ref_audio = voice.resolved_ref_audio
+            assert ref_audio is not None
+            items = [self._clone_data(text, voice) for text in texts]
+            with open(str(ref_audio), 'rb') as ref:
+                with requests.post(
+                    url, timeout=timeout, data={'items': json.dumps(items)},
+                    files={'voice_file': ref}
+                ) as r:
+                    r.raise_for_status()
+                    body = r.content
+                    ttfb = r.elapsed.total_seconds()
+        else:
+            payload = (
+                self._design_payload if voice.is_design
+                else self._preset_payload
+            )
+            with requests.post(
+                url, timeout=timeout,
+                json={'items': [payload(text, voice) for text in texts]}
+            ) as r:
+                r.raise_for_status()
+                body = r.content
+                ttfb = r.elapsed.total_seconds()
+        transfer = max(0.0, perf_counter() - start - ttfb)
+        try:
+            audio = [b64decode(a) for a in json.loads(body)['audio']]
+        except (ValueError, KeyError, TypeError):
+            return None
+        return ttfb, transfer, audio
+
+    def _post(
+        self, endpoint: str, filepath: Path,
+        timeout: Optional[tuple[float, float]], **kwargs: Any
+    ) -> Transfer:
+        """`POST` a synthesis request and save the audio it returns.
+
+        `requests` stamps a response with the time its headers took to arrive
+        (`elapsed`) before it reads the body, so the time to the first byte and
+        the time spent receiving the audio can be told apart without streaming.
+        The connect time is folded into the former; `requests` does not expose
+        it on its own.
+
+        Args:
+            endpoint: The path of the endpoint, after the base URL.
+            filepath: The `Path` of the generated audio file.
+            timeout: The `(connect, read)` timeout for the request.
+            **kwargs: The body of the request, as `requests.post` takes it.
+
+        Returns:
+            The `Transfer` of the request.
+        """
+        if self._stream:
+            return self._post_stream(endpoint, filepath, timeout, **kwargs)
+        start = perf_counter()
+        with requests.post(
+            f'{self._url}{endpoint}', timeout=timeout, **kwargs
+        ) as r:
+            r.raise_for_status()
+            received = perf_counter()
+            ttfb = r.elapsed.total_seconds()
+            filepath.write_bytes(r.content)
+        return Transfer(
+            ttfb=ttfb,
+            transfer=max(0.0, received - start - ttfb),
+            received=len(r.content),
+            duration=audio_duration(r.content),
+        )
+
+    def _post_stream(
+        self, endpoint: str, filepath: Path,
+        timeout: Optional[tuple[float, float]], **kwargs: Any
+    ) -> Transfer:
+        """`POST` a synthesis request for streamed audio, and write it to a
+        `wav` as it arrives.
+
+        The server sends raw PCM in `STREAM_PARAMS` as it generates it, so the
+        first of the audio is on disk -- and handed to `on_chunk` -- long before
+        the last of it is generated. `wave` fills the header's lengths in as
+        the frames are written, so the file is a valid `wav` throughout. A
+        chunk that ends partway through a frame keeps the rest back for the
+        next, so `on_chunk` is only ever given whole frames.
+
+        Args:
+            endpoint: The path of the endpoint, after the base URL.
+            filepath: The `Path` of the generated audio file.
+            timeout: The `(connect, read)` timeout for the request (the read
+                timeout is how long to wait for each chunk).
+            **kwargs: The body of the request, as `requests.post` takes it.
+
+        Returns:
+            The `Transfer` of the request, timed to the first chunk of audio.
+        """
+        if 'json' in kwargs:
+            kwargs['json'] = {
+                **kwargs['json'], 'stream': True, 'response_format': 'pcm'
+            }
+        else:
+            kwargs['data'] = {
+                **kwargs['data'], 'stream': 'true', 'response_format': 'pcm'
+            }
+        size = STREAM_PARAMS.channels * STREAM_PARAMS.sample_width
+        ttfb: Optional[float] = None
+        received = 0
+        rest = b''
+        start = perf_counter()
+        with requests.post(
+            f'{self._url}{endpoint}', timeout=timeout, stream=True, **kwargs
+        ) as r:
+            r.raise_for_status()
+            with wave.open(str(filepath), 'wb') as w:
+                w.setnchannels(STREAM_PARAMS.channels)
+                w.setsampwidth(STREAM_PARAMS.sample_width)
+                w.setframerate(STREAM_PARAMS.frame_rate)
+                for chunk in r.iter_content(chunk_size=STREAM_CHUNK_BYTES):
+                    if ttfb is None:
+                        ttfb = perf_counter() - start
+                    received += len(chunk)
+                    rest += chunk
+                    whole = len(rest) - len(rest) % size
+                    frames, rest = rest[:whole], rest[whole:]
+                    if frames:
+                        w.writeframes(frames)
+                        if self.on_chunk is not None:
+                            self.on_chunk(filepath, frames)
+        seconds = perf_counter() - start
+        ttfb = seconds if ttfb is None else ttfb
+        return Transfer(
+            ttfb=ttfb,
+            transfer=seconds - ttfb,
+            received=received,
+            duration=received // size / STREAM_PARAMS.frame_rate,
+        )
 
     def _t2s_preset(
-        self, text: str, voice: QwenVoice, filepath: Path
-    ) -> None:
+        self, text: str, voice: QwenVoice, filepath: Path,
+        timeout: Optional[tuple[float, float]]
+    ) -> Transfer:
         """Synthesize a built-in preset voice via `POST /v1/audio/speech`.
 
         Args:
             text: The text to convert to speech.
             voice: The preset `QwenVoice` to use.
             filepath: The `Path` of the generated audio file.
+            timeout: The `(connect, read)` timeout for the request.
+
+        Returns:
+            The `Transfer` of the request.
+        """
+        return self._post(
+            '/v1/audio/speech', filepath, timeout,
+            json=self._preset_payload(text, voice)
+        )
+
+    def _preset_payload(self, text: str, voice: QwenVoice) -> dict:
+        """The body of a preset voice's synthesis request.
+
+        Args:
+            text: The text to convert to speech.
+            voice: The preset `QwenVoice` to use.
+
+        Returns:
+            The JSON payload.
         """
         payload: dict = {
             'input': text,
@@ -140,24 +537,41 @@ class QwenEncoder(Encoder):
             payload['seed'] = voice.seed
         if voice.temperature is not None:
             payload['temperature'] = voice.temperature
-        with requests.post(
-            f'{self._url}/v1/audio/speech', json=payload, timeout=self._timeout
-        ) as r:
-            r.raise_for_status()
-            filepath.write_bytes(r.content)
+        return payload
 
     def _t2s_clone(
-        self, text: str, voice: QwenVoice, filepath: Path
-    ) -> None:
+        self, text: str, voice: QwenVoice, filepath: Path,
+        timeout: Optional[tuple[float, float]]
+    ) -> Transfer:
         """Synthesize a cloned voice via `POST /v1/audio/speech/upload`.
 
         Args:
             text: The text to convert to speech.
             voice: The clone `QwenVoice` to use.
             filepath: The `Path` of the generated audio file.
+            timeout: The `(connect, read)` timeout for the request.
+
+        Returns:
+            The `Transfer` of the request.
         """
         ref_audio = voice.resolved_ref_audio
         assert ref_audio is not None
+        with open(str(ref_audio), 'rb') as ref:
+            return self._post(
+                '/v1/audio/speech/upload', filepath, timeout,
+                data=self._clone_data(text, voice), files={'voice_file': ref}
+            )
+
+    def _clone_data(self, text: str, voice: QwenVoice) -> dict[str, str]:
+        """The form fields of a cloned voice's synthesis request.
+
+        Args:
+            text: The text to convert to speech.
+            voice: The clone `QwenVoice` to use.
+
+        Returns:
+            The form fields, as strings.
+        """
         data = {
             'input': text,
             'language': voice.language,
@@ -171,25 +585,37 @@ class QwenEncoder(Encoder):
             data['seed'] = str(voice.seed)
         if voice.temperature is not None:
             data['temperature'] = str(voice.temperature)
-        with open(str(ref_audio), 'rb') as ref:
-            with requests.post(
-                f'{self._url}/v1/audio/speech/upload',
-                data=data,
-                files={'voice_file': ref},
-                timeout=self._timeout,
-            ) as r:
-                r.raise_for_status()
-                filepath.write_bytes(r.content)
+        return data
 
     def _t2s_design(
-        self, text: str, voice: QwenVoice, filepath: Path
-    ) -> None:
+        self, text: str, voice: QwenVoice, filepath: Path,
+        timeout: Optional[tuple[float, float]]
+    ) -> Transfer:
         """Synthesize a designed voice via `POST /v1/audio/speech/design`.
 
         Args:
             text: The text to convert to speech.
             voice: The design `QwenVoice` to use.
             filepath: The `Path` of the generated audio file.
+            timeout: The `(connect, read)` timeout for the request.
+
+        Returns:
+            The `Transfer` of the request.
+        """
+        return self._post(
+            '/v1/audio/speech/design', filepath, timeout,
+            json=self._design_payload(text, voice)
+        )
+
+    def _design_payload(self, text: str, voice: QwenVoice) -> dict:
+        """The body of a designed voice's synthesis request.
+
+        Args:
+            text: The text to convert to speech.
+            voice: The design `QwenVoice` to use.
+
+        Returns:
+            The JSON payload.
         """
         payload: dict = {
             'input': text,
@@ -201,13 +627,7 @@ class QwenEncoder(Encoder):
             payload['seed'] = voice.seed
         if voice.temperature is not None:
             payload['temperature'] = voice.temperature
-        with requests.post(
-            f'{self._url}/v1/audio/speech/design',
-            json=payload,
-            timeout=self._timeout,
-        ) as r:
-            r.raise_for_status()
-            filepath.write_bytes(r.content)
+        return payload
 
     @classmethod
     def from_args(
@@ -228,6 +648,7 @@ class QwenEncoder(Encoder):
             url=args.qwen_url,
             audio_format=args.qwen_audio_format,
             timeout=args.timeout,
+            stream=args.qwen_stream,
         )
         voice = QwenVoice.from_args(args)
         return (encoder, voice)
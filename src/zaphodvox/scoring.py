@@ -0,0 +1,151 @@
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from pydantic import BaseModel
+
+from zaphodvox.audio import TRIM_THRESHOLD_DB, read_samples
+
+SPEAKING_RATE = 14.0
+"""The characters of text a narrator reads per second, at an unhurried pace:
+about 150 words a minute."""
+
+_FRAME_MS = 40
+"""The length of the frames a candidate is analyzed in: a few pitch periods of
+the lowest voice."""
+
+_HOP_MS = 20
+"""How far apart the frames start."""
+
+_VOICED_DB = -40.0
+"""How loud a frame has to be, in dBFS, to be taken as speech for the spectral
+and pitch measures."""
+
+_CLIP_LEVEL = 0.999
+"""How close to full scale a sample has to be to count as clipped."""
+
+_PITCH_RANGE = (60.0, 400.0)
+"""The fundamental frequencies, in Hz, a speaking voice is looked for in."""
+
+_SILENCE_ALLOWANCE = 0.3
+"""The share of a clip that can be dead air before it counts against it: the
+pauses between sentences, and the server's padding at the ends."""
+
+_NOISE_ALLOWANCE_DB = -60.0
+"""How high the noise floor can sit, in dBFS, before it counts against a clip.
+Clean synthetic speech falls to digital silence between phrases."""
+
+_WEIGHTS = {
+    'rate': 2.0, 'clipping': 100.0, 'silence': 2.0, 'flatness': 4.0,
+    'noise': 0.5, 'jitter': 0.5,
+}
+"""How heavily each flaw counts against a candidate. A clip half again as long
+as the text should take costs about as much as one with 1% of its samples
+clipped, or one whose pitch jumps a semitone from frame to frame."""
+
+
+class CandidateScore(BaseModel):
+    """How an audition candidate measures up as a clone reference.
+
+    None of it is a verdict on how the voice *sounds* -- only on the faults a
+    reference should not have, which are tedious to find by ear across thirty
+    clips: a take that rushes or drags, that clips, that is mostly silence,
+    that is hiss rather than voice, or whose pitch lurches about. The `score`
+    ranks the candidates, so the ones worth listening to come first.
+    """
+
+    duration: float
+    """The seconds of audio."""
+    rate: float
+    """The duration over the duration the text should take at
+    `SPEAKING_RATE` (`1.0` is on pace)."""
+    clipping: float
+    """The share of samples at full scale."""
+    silence: float
+    """The share of the clip that is dead air."""
+    flatness: float
+    """The spectral flatness of the speech, from `0` (a pure tone) to `1`
+    (white noise). Clean speech is well under `0.3`."""
+    noise_floor: float
+    """The level of the quietest tenth of the clip, in dBFS."""
+    pitch_jitter: float
+    """The typical change in pitch from one frame of speech to the next, in
+    semitones."""
+    score: float
+    """All of the above in one number, from `0` to `1` (higher is better)."""
+
+
+def score_candidate(filepath: Path, text: str) -> Optional[CandidateScore]:
+    """Measures an audition candidate.
+
+    The clip is cut into overlapping frames and every measure is taken over
+    all of them at once, as arrays, so a sweep of thirty clips is scored in a
+    moment.
+
+    Args:
+        filepath: The `Path` of the candidate's `wav` file.
+        text: The text it reads.
+
+    Returns:
+        The `CandidateScore`, or `None` if the file cannot be read or is too
+            short to measure.
+    """
+    if (read := read_samples(filepath)) is None:
+        return None
+    samples, rate = read
+    frame = rate * _FRAME_MS // 1000
+    if len(samples) < frame or frame == 0:
+        return None
+    mono = samples.mean(axis=1)
+    duration = len(mono) / rate
+    expected = max(len(text), 1) / SPEAKING_RATE
+    clipping = float(np.mean(np.abs(samples) >= _CLIP_LEVEL))
+
+    frames = np.lib.stride_tricks.sliding_window_view(mono, frame)
+    frames = frames[::rate * _HOP_MS // 1000]
+    db = 10 * np.log10(np.mean(np.square(frames), axis=1) + 1e-12)
+    silence = float(np.mean(db < TRIM_THRESHOLD_DB))
+    noise_floor = float(np.percentile(db, 10))
+    voiced = frames[db >= _VOICED_DB]
+
+    flatness, jitter = 1.0, 0.0
+    if len(voiced):
+        spectrum = np.square(
+            np.abs(np.fft.rfft(voiced * np.hanning(frame), axis=1))
+        ) + 1e-12
+        flatness = float(np.mean(
+            np.exp(np.mean(np.log(spectrum), axis=1))
+            / np.mean(spectrum, axis=1)
+        ))
+        # The autocorrelation of each frame, by way of its power spectrum; the
+        # strongest lag in the range of a speaking voice is its pitch period.
+        correlation = np.fft.irfft(
+            np.square(np.abs(np.fft.rfft(voiced, n=2 * frame, axis=1))),
+            axis=1
+        )[:, :frame]
+        low = int(rate / _PITCH_RANGE[1])
+        high = min(frame - 1, int(rate / _PITCH_RANGE[0]))
+        lags = np.argmax(correlation[:, low:high], axis=1) + low
+        semitones = 12 * np.log2(rate / lags)
+        if len(semitones) > 1:
+            jitter = float(np.median(np.abs(np.diff(semitones))))
+
+    penalties = {
+        'rate': abs(float(np.log(duration / expected))),
+        'clipping': clipping,
+        'silence': max(0.0, silence - _SILENCE_ALLOWANCE),
+        'flatness': flatness,
+        'noise': max(0.0, (noise_floor - _NOISE_ALLOWANCE_DB) / 10),
+        'jitter': jitter,
+    }
+    penalty = sum(_WEIGHTS[k] * v for k, v in penalties.items())
+    return CandidateScore(
+        duration=duration,
+        rate=duration / expected,
+        clipping=clipping,
+        silence=silence,
+        flatness=flatness,
+        noise_floor=noise_floor,
+        pitch_jitter=jitter,
+        score=float(np.exp(-penalty)),
+    )
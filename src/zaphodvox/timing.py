@@ -0,0 +1,195 @@
+import csv
+import io
+from datetime import datetime, timezone
+from typing import NamedTuple, Optional
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+PERCENTILES = (50, 95, 99)
+"""The percentiles the report summarizes each measurement by."""
+
+SLOWEST = 5
+"""How many of the slowest fragments the report lists."""
+
+
+class Transfer(NamedTuple):
+    """How one fragment's audio came back from the server."""
+
+    ttfb: float
+    """The seconds from sending the request to the response headers."""
+    transfer: float
+    """The seconds spent receiving the response body."""
+    received: int
+    """The bytes of audio received."""
+    attempts: int = 1
+    """How many requests it took, counting the one that succeeded."""
+    duration: Optional[float] = None
+    """The seconds of audio received, if they could be read from its header."""
+
+
+class FragmentTiming(BaseModel):
+    """Where the time went for one synthesized fragment."""
+
+    index: int
+    """The fragment's index in the manifest."""
+    filename: str
+    """The fragment's audio file name."""
+    chars: int
+    """The characters of text synthesized."""
+    seconds: float
+    """The wall-clock seconds from asking for the fragment to having it on
+    disk, failed attempts and all."""
+    ttfb: Optional[float] = None
+    """The seconds to the response headers of the successful attempt, if the
+    encoder measures it."""
+    transfer: Optional[float] = None
+    """The seconds spent receiving the successful attempt's body, if the encoder
+    measures it."""
+    received: Optional[int] = None
+    """The bytes of audio received, if the encoder measures it."""
+    attempts: int = 1
+    """How many requests the fragment took."""
+    chars_per_second: float = 0.0
+    """The characters synthesized per wall-clock second."""
+    duration: Optional[float] = None
+    """The seconds of audio synthesized, if the encoder measures it."""
+    real_time_factor: Optional[float] = None
+    """The seconds of audio synthesized per wall-clock second, if the encoder
+    measures the audio."""
+    batch: Optional[int] = None
+    """The index of the first fragment of the request this one shared, if it
+    was batched; its times are its share of that request's, by length."""
+
+
+class EncodeReport(BaseModel):
+    """The timings of an `--encode` run, fragment by fragment.
+
+    A slow book is slow for one of a few reasons -- the server is generating
+    slowly, requests are failing and being retried, or the audio is slow to
+    arrive or to land on disk -- and each of them shows up in a different
+    column here.
+    """
+
+    encoder: Optional[str] = None
+    """The name of the encoder."""
+    started: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc)
+    )
+    """When the run started; the encoder sets it again as the first fragment
+    is asked for."""
+    finished: Optional[datetime] = None
+    """When the last fragment was synthesized, or `None` if none has been."""
+    fragments: list[FragmentTiming] = []
+    """The timings, in the order the fragments were synthesized."""
+    coalesced: int = 0
+    """The fragments copied from an identical one encoded in the same run,
+    rather than synthesized: the requests the run saved."""
+
+    def add(
+        self, index: int, filename: str, chars: int, seconds: float,
+        transfer: Optional[Transfer] = None, batch: Optional[int] = None
+    ) -> None:
+        """Records the timing of one synthesized fragment.
+
+        Args:
+            index: The fragment's index in the manifest.
+            filename: The fragment's audio file name.
+            chars: The characters of text synthesized.
+            seconds: The wall-clock seconds the fragment took.
+            transfer: The `Transfer` the encoder measured, if any.
+            batch: The index of the first fragment of the request this one
+                shared, if it was batched.
+        """
+        timing = FragmentTiming(
+            index=index, filename=filename, chars=chars, seconds=seconds,
+            batch=batch,
+            chars_per_second=chars / seconds if seconds > 0 else 0.0
+        )
+        if transfer is not None:
+            timing.ttfb = transfer.ttfb
+            timing.transfer = transfer.transfer
+            timing.received = transfer.received
+            timing.attempts = transfer.attempts
+            timing.duration = transfer.duration
+            if transfer.duration is not None and seconds > 0:
+                timing.real_time_factor = transfer.duration / seconds
+        self.fragments.append(timing)
+
+    @property
+    def retries(self) -> int:
+        """The requests that failed and were retried, over the whole run."""
+        return sum(f.attempts - 1 for f in self.fragments)
+
+    @property
+    def batched(self) -> int:
+        """The requests saved by batching fragments together."""
+        batched = [f.batch for f in self.fragments if f.batch is not None]
+        return len(batched) - len(set(batched))
+
+    @property
+    def seconds(self) -> float:
+        """The wall-clock seconds from the start of the run to the last
+        synthesized fragment.
+
+        With several workers the fragments overlap, so this is less than the
+        sum of their `seconds`: it is how long the run took, not how long the
+        server spent.
+        """
+        if self.finished is None:
+            return 0.0
+        return max(0.0, (self.finished - self.started).total_seconds())
+
+    @property
+    def real_time_factor(self) -> Optional[float]:
+        """The seconds of audio synthesized per wall-clock second of the run,
+        counting the fragments whose audio was measured.
+
+        Characters per second depends on the text as much as the server (a
+        line of dialogue and a line of numbers read at different speeds), so
+        this is the figure to compare server builds and GPU settings by.
+        """
+        durations = [
+            f.duration for f in self.fragments if f.duration is not None
+        ]
+        if not durations or not (seconds := self.seconds):
+            return None
+        return sum(durations) / seconds
+
+    def percentiles(self, field: str) -> Optional[list[float]]:
+        """A measurement's `PERCENTILES` across the fragments that have it.
+
+        Args:
+            field: The `FragmentTiming` field to summarize.
+
+        Returns:
+            One value per percentile, or `None` if no fragment has the field.
+        """
+        values = [
+            v for v in (getattr(f, field) for f in self.fragments)
+            if v is not None
+        ]
+        if not values:
+            return None
+        return [float(p) for p in np.percentile(values, PERCENTILES)]
+
+    def slowest(self) -> list[FragmentTiming]:
+        """The `SLOWEST` fragments, slowest first."""
+        return sorted(
+            self.fragments, key=lambda f: f.seconds, reverse=True
+        )[:SLOWEST]
+
+    def to_csv(self) -> str:
+        """The fragment timings as CSV, one row per fragment.
+
+        Returns:
+            The CSV text, with a header row.
+        """
+        fields = list(FragmentTiming.model_fields)
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator='\n')
+        writer.writerow(fields)
+        for timing in self.fragments:
+            values = [getattr(timing, f) for f in fields]
+            writer.writerow(['' if v is None else v for v in values])
+        return out.getvalue()
@@ -1,5 +1,7 @@
 import json
 from collections import namedtuple
+from datetime import timedelta
+from pathlib import Path
 from typing import Iterator
 from unittest.mock import MagicMock, mock_open, patch
 
@@ -8,6 +10,23 @@ import pytest
 from zaphodvox.qwen.voice import QwenVoice
 
 
+@pytest.fixture(autouse=True)
+def no_backoff() -> Iterator[MagicMock]:
+    """Retries happen without waiting: the backoff between them is exercised
+    as the seconds asked of this stand-in for `sleep`.
+    """
+    with patch('zaphodvox.http.sleep') as ms:
+        yield ms
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch) -> Path:
+    """Caches are kept out of the real home directory, and start empty."""
+    cache = tmp_path / 'cache'
+    monkeypatch.setenv('ZAPHODVOX_CACHE_DIR', str(cache))
+    return cache
+
+
 @pytest.fixture
 def text_to_encode() -> str:
     return "Don't panic!"
@@ -150,6 +169,7 @@ def mock_qwen() -> Iterator[MockQwen]:
     ):
         response = MagicMock()
         response.content = b'audio'
+        response.elapsed = timedelta(seconds=0.25)
         mock_requests.post.return_value.__enter__.return_value = response
         yield MockQwen(
             mock_requests,
@@ -5,6 +5,7 @@ from pathlib import Path
 import pytest
 
 from zaphodvox.arg_parser import parse_args
+from zaphodvox.audio import DEFAULT_LOUDNESS
 from zaphodvox.http import DEFAULT_READ_TIMEOUT
 from zaphodvox.qwen.encoder import DEFAULT_URL
 
@@ -30,6 +31,15 @@ class TestArgParser():
         assert not args.encode
         assert not args.concat
         assert args.concat_out is None
+        assert args.normalize is False
+        assert args.loudness == DEFAULT_LOUDNESS
+        assert args.trim is False
+        assert args.silence_files is False
+        assert args.report is False
+        assert args.report_out is None
+        assert args.warmup is False
+        assert args.workers == 1
+        assert args.batch_chars is None
         assert args.save_manifest is True
         assert args.manifest_out is None
         # Qwen
@@ -42,6 +52,7 @@ class TestArgParser():
         assert args.voice_temperature is None
         assert args.qwen_url == DEFAULT_URL
         assert args.qwen_audio_format == 'wav'
+        assert args.qwen_stream is False
         # Proofing
         assert args.proof is False
         assert args.proof_out is None
@@ -50,6 +61,26 @@ class TestArgParser():
         assert args.dict_language == 'en'
         assert args.llm_url is None
         assert args.llm_model is None
+        assert args.llm_workers == 1
+        assert args.llm_cache is True
+        assert args.llm_stream is False
+        assert args.llm_context is None
+
+    def test_more_inputfiles_may_follow_the_options(self):
+        args = parse_args(['a.txt', '--proof', 'b.txt', 'c.txt'])
+
+        assert args.inputfile == Path('a.txt')
+        assert args.more_inputfiles == [Path('b.txt'), Path('c.txt')]
+        assert args.proof is True
+
+    def test_normalize_takes_a_loudness(self):
+        args = parse_args(['--concat', '--normalize', '--loudness=-18', 'm.json'])
+        assert args.normalize is True
+        assert args.loudness == -18.0
+
+    def test_llm_context_from_env(self, monkeypatch):
+        monkeypatch.setenv('ZAPHODVOX_LLM_CONTEXT', '32768')
+        assert parse_args(['--proof', 'book.txt']).llm_context == 32768
 
     def test_llm_model_from_env(self, monkeypatch):
         monkeypatch.setenv('ZAPHODVOX_LLM_MODEL', 'qwen2.5-7b-instruct')
@@ -166,3 +197,26 @@ class TestTimeout():
             parse_args(['--timeout', '-5'])
 
         assert 'negative' in err.getvalue()
+
+
+class TestWorkers():
+    def test_workers(self):
+        assert parse_args(['--workers', '4']).workers == 4
+
+    def test_no_workers_is_rejected(self):
+        with pytest.raises(SystemExit), redirect_stderr(StringIO()) as err:
+            parse_args(['--workers', '0'])
+
+        assert 'less than one' in err.getvalue()
+
+
+class TestSpellBudget():
+    def test_spell_budget(self):
+        assert parse_args(['--proof', 'b.txt']).spell_budget is None
+        assert parse_args(['--spell-budget=0', 'b.txt']).spell_budget == 0.0
+
+    def test_a_negative_budget_is_rejected(self):
+        with pytest.raises(SystemExit), redirect_stderr(StringIO()) as err:
+            parse_args(['--spell-budget', '-1', 'b.txt'])
+
+        assert 'negative' in err.getvalue()
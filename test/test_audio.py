@@ -6,10 +6,18 @@ import pytest
 
 from zaphodvox.audio import (
     DEFAULT_PARAMS,
+    MAX_GAIN_DB,
+    TRIM_PADDING_MS,
     AudioParams,
+    _encoded_silence,
+    audio_duration,
     audio_params,
     concat_files,
     create_silence,
+    loudness_gain,
+    measure_loudness,
+    silence_bounds,
+    split_wav,
 )
 from zaphodvox.manifest import Fragment, Manifest
 
@@ -45,6 +53,18 @@ def read_wav(filepath: Path) -> tuple[AudioParams, float]:
         return params, w.getnframes() / w.getframerate()
 
 
+def write_take(filepath: Path, lead: int, speech: int, tail: int) -> None:
+    """Writes a `wav` take of `speech` ms of sound padded with `lead` and `tail`
+    ms of dead air, as the server returns them."""
+    def frames(ms: int, value: int) -> bytes:
+        return value.to_bytes(2, 'little', signed=True) * (24 * ms)
+    with wave.open(str(filepath), 'wb') as w:
+        w.setnchannels(SPEECH.channels)
+        w.setsampwidth(SPEECH.sample_width)
+        w.setframerate(SPEECH.frame_rate)
+        w.writeframes(frames(lead, 0) + frames(speech, 8000) + frames(tail, 0))
+
+
 class TestAudioParams():
     def test_reads_a_wav_header(self, tmp_path):
         filepath = tmp_path / 'a.wav'
@@ -59,6 +79,20 @@ class TestAudioParams():
         assert audio_params(filepath) is None
 
 
+class TestAudioDuration():
+    def test_reads_the_duration_from_the_header(self, tmp_path):
+        write_wav(tmp_path / 'a.wav', SPEECH, 1500)
+
+        data = (tmp_path / 'a.wav').read_bytes()
+
+        assert audio_duration(data) == pytest.approx(1.5)
+
+    def test_anything_else_has_no_duration(self):
+        # An mp3, say, would have to be decoded to be measured.
+        assert audio_duration(b'ID3fake') is None
+        assert audio_duration(b'') is None
+
+
 class TestCreateSilence():
     def test_silence_matches_the_given_sample_format(self, tmp_path):
         # The whole point: silence has to agree with the speech around it, or
@@ -93,6 +127,11 @@ class TestCreateSilence():
     ):
         # mp3 has to go through an encoder; only wav can be written directly.
         segment_cls, segment = mock_audio
+        segment.set_channels.return_value = segment
+        segment.set_sample_width.return_value = segment
+        encoded = segment.export.return_value.__enter__.return_value
+        encoded.read.return_value = b'ID3silence'
+        _encoded_silence.cache_clear()
 
         create_silence(100, tmp_path / 'silence.mp3', 'mp3', SPEECH)
 
@@ -101,6 +140,39 @@ class TestCreateSilence():
         )
         segment.set_channels.assert_called_once_with(SPEECH.channels)
 
+    def test_encoded_silence_is_encoded_once_per_duration(
+        self, tmp_path, mock_audio
+    ):
+        # A book pauses for the same length over and over; only the first of
+        # them should cost an ffmpeg process, the rest are copies.
+        segment_cls, segment = mock_audio
+        segment.set_channels.return_value = segment
+        segment.set_sample_width.return_value = segment
+        encoded = segment.export.return_value.__enter__.return_value
+        encoded.read.return_value = b'ID3silence'
+        _encoded_silence.cache_clear()
+
+        for i in range(3):
+            create_silence(250, tmp_path / f's-{i}.mp3', 'mp3', SPEECH)
+        create_silence(750, tmp_path / 's-3.mp3', 'mp3', SPEECH)
+
+        assert segment_cls.silent.call_count == 2
+        for i in range(4):
+            assert (tmp_path / f's-{i}.mp3').read_bytes() == b'ID3silence'
+        _encoded_silence.cache_clear()
+
+    def test_a_long_silence_is_written_in_blocks(self, tmp_path):
+        # Longer than one shared block of zeros, and not a multiple of it.
+        filepath = tmp_path / 'silence.wav'
+
+        create_silence(2345, filepath, 'wav', SPEECH)
+
+        params, seconds = read_wav(filepath)
+        assert params == SPEECH
+        assert seconds == pytest.approx(2.345)
+        with wave.open(str(filepath), 'rb') as w:
+            assert set(w.readframes(w.getnframes())) == {0}
+
 
 class TestConcatWav():
     def _manifest(self, filenames: list[str]) -> Manifest:
@@ -175,6 +247,32 @@ class TestConcatWav():
         assert params == SPEECH
         assert seconds == pytest.approx(2.5, abs=0.01)
 
+    def test_a_silence_without_a_file_is_made_up(
+        self, tmp_path, mock_progress_bar
+    ):
+        # Setup: silence is only a duration in the manifest unless
+        # --silence-files wrote it out, so it is not a missing fragment.
+        write_wav(tmp_path / 'f-0.wav', SPEECH, 1000, value=1)
+        write_wav(tmp_path / 'f-2.wav', SPEECH, 1000, value=1)
+        manifest = Manifest(fragments=[
+            Fragment(filename='f-0.wav', text='words'),
+            Fragment(filename='f-1.wav', text='', silence_duration=500),
+            Fragment(filename='f-2.wav', text='more words'),
+        ])
+        out = tmp_path / 'book.wav'
+
+        # Run
+        concat_files(tmp_path, manifest, 'wav', out)
+
+        # Verify: half a second of zeroed frames, in the speech's format.
+        params, seconds = read_wav(out)
+        assert params == SPEECH
+        assert seconds == pytest.approx(2.5)
+        with wave.open(str(out), 'rb') as w:
+            frames = w.readframes(w.getnframes())
+        assert frames[48000:72000] == bytes(24000)
+        assert not (tmp_path / 'f-1.wav').exists()
+
     def test_a_missing_fragment_is_an_error(self, tmp_path, mock_progress_bar):
         # A fragment that was never written -- an encode interrupted partway --
         # must not be quietly left out of the book. Skipping it would produce a
@@ -206,6 +304,217 @@ class TestConcatWav():
         assert seconds == pytest.approx(2.0)
 
 
+class TestLoudness():
+    def test_a_full_scale_square_wave_is_zero_dbfs(self, tmp_path):
+        filepath = tmp_path / 'loud.wav'
+        write_wav(filepath, SPEECH, 1000, value=32767)
+
+        assert measure_loudness(filepath) == pytest.approx(0.0, abs=0.01)
+
+    def test_half_the_amplitude_is_six_db_quieter(self, tmp_path):
+        write_wav(tmp_path / 'a.wav', SPEECH, 1000, value=16000)
+        write_wav(tmp_path / 'b.wav', SPEECH, 1000, value=8000)
+
+        a = measure_loudness(tmp_path / 'a.wav')
+        b = measure_loudness(tmp_path / 'b.wav')
+
+        assert a is not None and b is not None
+        assert a - b == pytest.approx(6.02, abs=0.01)
+
+    def test_pauses_do_not_make_speech_quieter(self, tmp_path):
+        # The same speech with a long gap in it is the same loudness: the
+        # measure is of the speaking, not of how much of the file is gaps.
+        write_wav(tmp_path / 'speech.wav', SPEECH, 1000, value=8000)
+        write_wav(tmp_path / 'gap.wav', SPEECH, 2000, value=0)
+        manifest = Manifest(fragments=[
+            Fragment(filename='speech.wav', text='x'),
+            Fragment(filename='gap.wav', text='x'),
+            Fragment(filename='speech.wav', text='x'),
+        ])
+        out = tmp_path / 'gappy.wav'
+        concat_files(tmp_path, manifest, 'wav', out)
+
+        assert measure_loudness(out) == pytest.approx(
+            measure_loudness(tmp_path / 'speech.wav'), abs=0.01
+        )
+
+    def test_silence_and_unreadable_files_have_no_loudness(self, tmp_path):
+        write_wav(tmp_path / 'silence.wav', SPEECH, 500)
+        (tmp_path / 'junk.wav').write_text('not audio', encoding='utf-8')
+
+        assert measure_loudness(tmp_path / 'silence.wav') is None
+        assert measure_loudness(tmp_path / 'junk.wav') is None
+
+    def test_the_gain_is_bounded(self):
+        assert loudness_gain(-26.0, -20.0) == pytest.approx(10 ** (6 / 20))
+        assert loudness_gain(-60.0, -20.0) \
+            == pytest.approx(10 ** (MAX_GAIN_DB / 20))
+        assert loudness_gain(None, -20.0) == 1.0
+
+
+class TestConcatNormalize():
+    def test_fragments_are_levelled_during_the_copy(
+        self, tmp_path, mock_progress_bar
+    ):
+        # Setup: two takes that came back 6 dB apart, and a pause between them.
+        write_wav(tmp_path / 'f-0.wav', SPEECH, 1000, value=8000)
+        write_wav(tmp_path / 'f-1.wav', SPEECH, 500)
+        write_wav(tmp_path / 'f-2.wav', SPEECH, 1000, value=4000)
+        manifest = Manifest(fragments=[
+            Fragment(filename='f-0.wav', text='loud', loudness=-12.25),
+            Fragment(filename='f-1.wav', text='', silence_duration=500),
+            Fragment(filename='f-2.wav', text='quiet'),
+        ])
+        out = tmp_path / 'book.wav'
+
+        # Run
+        concat_files(tmp_path, manifest, 'wav', out, loudness=-20.0)
+
+        # Verify: both come out at the target, and the one that had never been
+        # measured now has been, in the manifest.
+        assert manifest.fragments[2].loudness == pytest.approx(-18.27, abs=0.01)
+        _, seconds = read_wav(out)
+        assert seconds == pytest.approx(2.5)
+        with wave.open(str(out), 'rb') as w:
+            first = w.readframes(24000)
+            pause = w.readframes(12000)
+            last = w.readframes(24000)
+        level = 32768 * 10 ** (-20 / 20)
+        assert abs(int.from_bytes(first[:2], 'little', signed=True)) \
+            == pytest.approx(level, abs=2)
+        assert abs(int.from_bytes(last[:2], 'little', signed=True)) \
+            == pytest.approx(level, abs=2)
+        assert set(pause) == {0}
+
+    def test_encoded_fragments_cannot_be_levelled(
+        self, tmp_path, mock_progress_bar
+    ):
+        (tmp_path / 'f-0.mp3').write_bytes(b'ID3fake')
+        manifest = Manifest(fragments=[Fragment(filename='f-0.mp3', text='x')])
+
+        with patch('zaphodvox.audio.subprocess.run') as run:
+            with pytest.raises(ValueError, match='wav'):
+                concat_files(
+                    tmp_path, manifest, 'mp3', tmp_path / 'book.mp3',
+                    loudness=-20.0
+                )
+
+        run.assert_not_called()
+
+
+def write_speech(filepath: Path, spans: list[tuple[int, int]]) -> None:
+    """Writes a `wav` take of `(ms, value)` spans, one after another."""
+    with wave.open(str(filepath), 'wb') as w:
+        w.setnchannels(SPEECH.channels)
+        w.setsampwidth(SPEECH.sample_width)
+        w.setframerate(SPEECH.frame_rate)
+        for ms, value in spans:
+            w.writeframes(value.to_bytes(2, 'little', signed=True) * (24 * ms))
+
+
+class TestTrim():
+    def test_finds_the_dead_air_at_each_end(self, tmp_path):
+        write_take(tmp_path / 'take.wav', 600, 1000, 400)
+
+        assert silence_bounds(tmp_path / 'take.wav') \
+            == (600 - TRIM_PADDING_MS, 400 - TRIM_PADDING_MS)
+
+    def test_a_take_with_no_dead_air_is_left_alone(self, tmp_path):
+        write_take(tmp_path / 'take.wav', 0, 1000, 50)
+
+        assert silence_bounds(tmp_path / 'take.wav') == (0, 0)
+
+    def test_an_all_silent_take_is_left_alone(self, tmp_path):
+        write_wav(tmp_path / 'silence.wav', SPEECH, 500)
+
+        assert silence_bounds(tmp_path / 'silence.wav') == (0, 0)
+
+    def test_an_unreadable_take_is_not_measured(self, tmp_path):
+        (tmp_path / 'junk.wav').write_text('not audio', encoding='utf-8')
+
+        assert silence_bounds(tmp_path / 'junk.wav') is None
+
+    def test_concat_skips_the_dead_air(self, tmp_path, mock_progress_bar):
+        # Setup: two takes trailing off differently either side of a pause,
+        # one of which was measured at encoding and one of which was not.
+        write_take(tmp_path / 'f-0.wav', 300, 1000, 700)
+        write_wav(tmp_path / 'f-1.wav', SPEECH, 500)
+        write_take(tmp_path / 'f-2.wav', 500, 1000, 200)
+        manifest = Manifest(fragments=[
+            Fragment(
+                filename='f-0.wav', text='one', trim_start=200, trim_end=600
+            ),
+            Fragment(filename='f-1.wav', text='', silence_duration=500),
+            Fragment(filename='f-2.wav', text='two'),
+        ])
+        out = tmp_path / 'book.wav'
+
+        # Run
+        concat_files(tmp_path, manifest, 'wav', out, trim=True)
+
+        # Verify: each take keeps just its padding, the pause is untouched, and
+        # the files on disk are never rewritten.
+        assert (manifest.fragments[2].trim_start,
+                manifest.fragments[2].trim_end) == (400, 100)
+        _, seconds = read_wav(out)
+        assert seconds == pytest.approx(1.2 + 0.5 + 1.2)
+        _, seconds = read_wav(tmp_path / 'f-0.wav')
+        assert seconds == pytest.approx(2.0)
+
+    def test_encoded_fragments_cannot_be_trimmed(
+        self, tmp_path, mock_progress_bar
+    ):
+        (tmp_path / 'f-0.mp3').write_bytes(b'ID3fake')
+        manifest = Manifest(fragments=[Fragment(filename='f-0.mp3', text='x')])
+
+        with patch('zaphodvox.audio.subprocess.run') as run:
+            with pytest.raises(ValueError, match='wav'):
+                concat_files(
+                    tmp_path, manifest, 'mp3', tmp_path / 'book.mp3', trim=True
+                )
+
+        run.assert_not_called()
+
+
+
+class TestSplitWav():
+    def test_cuts_in_the_middle_of_the_longest_gaps(self, tmp_path):
+        # Three fragments read with long stops between them, and a short
+        # pause inside the second that is not one of the cuts.
+        write_speech(tmp_path / 'batch.wav', [
+            (100, 0), (500, 8000), (600, 0), (300, 8000), (200, 0),
+            (300, 8000), (400, 0), (700, 8000), (100, 0),
+        ])
+        parts = [tmp_path / f'f-{i}.wav' for i in range(3)]
+
+        durations = split_wav(tmp_path / 'batch.wav', parts)
+
+        assert durations == pytest.approx([0.9, 1.3, 1.0])
+        for part, seconds in zip(parts, durations):
+            assert read_wav(part) == (SPEECH, pytest.approx(seconds))
+        # Each piece trails off as a take of its own would, for trimming.
+        assert silence_bounds(parts[0]) == (0, 300 - TRIM_PADDING_MS)
+
+    def test_too_few_gaps_writes_nothing(self, tmp_path):
+        write_take(tmp_path / 'batch.wav', 300, 1000, 300)
+        parts = [tmp_path / 'f-0.wav', tmp_path / 'f-1.wav']
+
+        assert split_wav(tmp_path / 'batch.wav', parts) is None
+        assert not any(part.exists() for part in parts)
+
+    def test_the_padding_at_the_ends_is_not_a_gap(self, tmp_path):
+        write_take(tmp_path / 'batch.wav', 1000, 1000, 1000)
+
+        assert split_wav(
+            tmp_path / 'batch.wav', [tmp_path / 'a.wav', tmp_path / 'b.wav']
+        ) is None
+
+    def test_an_unreadable_take_is_not_split(self, tmp_path):
+        (tmp_path / 'junk.wav').write_text('not audio', encoding='utf-8')
+
+        assert split_wav(tmp_path / 'junk.wav', [tmp_path / 'a.wav']) is None
+
+
 class TestConcatEncoded():
     def test_mp3_is_concatenated_in_one_ffmpeg_pass(
         self, tmp_path, mock_progress_bar
@@ -239,6 +548,43 @@ class TestConcatEncoded():
         for f in filenames:
             assert str((tmp_path / f).resolve().as_posix()) in listed[0]
 
+    def test_silence_is_written_once_per_duration(
+        self, tmp_path, mock_progress_bar
+    ):
+        # Setup: ffmpeg reads files, so a made-up silence has to be one -- but
+        # one per length of pause, however often the book pauses that long.
+        for f in ('f-0.mp3', 'f-2.mp3', 'f-4.mp3'):
+            (tmp_path / f).write_bytes(b'ID3fake')
+        manifest = Manifest(fragments=[
+            Fragment(filename='f-0.mp3', text='x'),
+            Fragment(filename='f-1.mp3', text='', silence_duration=500),
+            Fragment(filename='f-2.mp3', text='y'),
+            Fragment(filename='f-3.mp3', text='', silence_duration=500),
+            Fragment(filename='f-4.mp3', text='z'),
+        ])
+        out = tmp_path / 'book.mp3'
+        listed = []
+
+        def capture(cmd, **kwargs):
+            listfile = Path(cmd[cmd.index('-i') + 1])
+            listed.append(listfile.read_text(encoding='utf-8').splitlines())
+            return None
+
+        # Run
+        with patch('zaphodvox.audio.subprocess.run', side_effect=capture), \
+                patch('zaphodvox.audio.audio_params', return_value=SPEECH), \
+                patch('zaphodvox.audio.create_silence') as silence:
+            silence.side_effect = lambda d, f, *a: f.write_bytes(b'ID3fake')
+            concat_files(tmp_path, manifest, 'mp3', out)
+
+        # Verify
+        silence.assert_called_once()
+        assert silence.call_args.args[0] == 500
+        assert silence.call_args.args[2:] == ('mp3', SPEECH)
+        assert len(listed[0]) == 5
+        assert listed[0][1] == listed[0][3]
+        assert 'silence-500.mp3' in listed[0][1]
+
     def test_a_missing_mp3_fragment_is_an_error(
         self, tmp_path, mock_progress_bar
     ):
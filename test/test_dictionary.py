@@ -1,6 +1,15 @@
+import os
 from pathlib import Path
+from unittest.mock import call, patch
 
-from zaphodvox.dictionary import add_words, build_speller, load_words
+from spellchecker import SpellChecker
+
+from zaphodvox.dictionary import (
+    add_words,
+    build_speller,
+    dictionary_version,
+    load_words,
+)
 
 
 class TestDictionary():
@@ -25,3 +34,77 @@ class TestDictionary():
         speller = build_speller('en', {'zaphod'})
         assert not speller.unknown(['zaphod'])
         assert speller.unknown(['beeblebrox'])
+
+    def test_dictionary_version(self):
+        # A word added to the project's dictionary changes what it suggests.
+        assert dictionary_version('en', {'zaphod'}) \
+            == dictionary_version('en', {'zaphod'})
+        assert dictionary_version('en', {'zaphod'}) \
+            != dictionary_version('en', {'zaphod', 'ford'})
+        assert dictionary_version('en') != dictionary_version('de')
+
+
+class TestSpellerCache():
+    def test_a_built_dictionary_is_kept(self, tmp_path):
+        build_speller('en', {'zaphod'}, cache=tmp_path)
+
+        # Read back, not built: the language's own word list is not loaded.
+        with patch(
+            'zaphodvox.dictionary.SpellChecker', wraps=SpellChecker
+        ) as built:
+            speller = build_speller('en', {'zaphod'}, cache=tmp_path)
+
+        assert built.call_args_list == [call(language=None)]
+
+        assert not speller.unknown(['zaphod'])
+        assert speller.unknown(['beeblebrox'])
+
+    def test_a_changed_wordlist_builds_anew(self, tmp_path):
+        build_speller('en', {'zaphod'}, cache=tmp_path)
+
+        speller = build_speller('en', {'zaphod', 'ford'}, cache=tmp_path)
+
+        assert not speller.unknown(['ford'])
+        assert len(list(tmp_path.glob('*.json'))) == 2
+
+    def test_a_damaged_dictionary_is_rebuilt(self, tmp_path):
+        version = dictionary_version('en', {'zaphod'})
+        (tmp_path / f'{version}.json').write_text('{"zaphod": 1, "tr')
+
+        speller = build_speller('en', {'zaphod'}, cache=tmp_path)
+
+        assert not speller.unknown(['zaphod'])
+        assert (tmp_path / f'{version}.json').stat().st_size > 1000
+
+    def test_a_dictionary_that_is_not_word_frequencies_is_rebuilt(
+        self, tmp_path
+    ):
+        version = dictionary_version('en', {'zaphod'})
+        (tmp_path / f'{version}.json').write_text('["zaphod"]')
+
+        speller = build_speller('en', {'zaphod'}, cache=tmp_path)
+
+        assert not speller.unknown(['the', 'zaphod'])
+
+    def test_only_the_most_recent_are_kept(self, tmp_path):
+        with patch('zaphodvox.dictionary.SPELLER_CACHE_SIZE', 1):
+            build_speller('en', {'zaphod'}, cache=tmp_path)
+            build_speller('en', {'ford'}, cache=tmp_path)
+
+        assert [p.stem for p in tmp_path.glob('*.json')] \
+            == [dictionary_version('en', {'ford'})]
+
+    def test_the_one_last_used_is_kept(self, tmp_path):
+        # Built first, but used since: the other one goes.
+        with patch('zaphodvox.dictionary.SPELLER_CACHE_SIZE', 2):
+            build_speller('en', {'zaphod'}, cache=tmp_path)
+            build_speller('en', {'ford'}, cache=tmp_path)
+            for path in tmp_path.glob('*.json'):
+                os.utime(path, (1, 1))
+            build_speller('en', {'zaphod'}, cache=tmp_path)
+            build_speller('en', {'arthur'}, cache=tmp_path)
+
+        assert {p.stem for p in tmp_path.glob('*.json')} == {
+            dictionary_version('en', {'zaphod'}),
+            dictionary_version('en', {'arthur'}),
+        }
@@ -1,16 +1,36 @@
+import heapq
+import json
+import re
+import wave
+from base64 import b64encode
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
 from pathlib import Path
-from unittest.mock import call
+from threading import Thread
+from time import sleep
+from unittest.mock import call, patch
 
 import pytest
+import requests
 from pydantic import ValidationError
-from test_audio import SPEECH, read_wav, write_wav
+from requests.exceptions import ReadTimeout
+from test_audio import SPEECH, read_wav, write_speech, write_wav
 
 from zaphodvox.arg_parser import parse_args
-from zaphodvox.http import CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT
+from zaphodvox.encoder import BATCH_BREAK
+from zaphodvox.http import (
+    ADAPTIVE_FLOOR,
+    ADAPTIVE_SAMPLES,
+    CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
+    WARM_READ_TIMEOUT,
+)
 from zaphodvox.manifest import Fragment, Manifest
 from zaphodvox.qwen.encoder import DEFAULT_URL, QwenEncoder
 from zaphodvox.qwen.voice import QwenVoice
 from zaphodvox.text import parse_text
+from zaphodvox.timing import EncodeReport
 from zaphodvox.voice import Voice
 
 DEFAULT_TIMEOUT = (CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT)
@@ -57,13 +77,11 @@ class TestEncoder():
         mock_qwen.write_bytes.assert_any_call(
             tmp_path / f'{basename}-00000.wav', b'audio'
         )
-        # Fragment #1 (silence), written after the speech so it can be
-        # given the same sample format.
-        mock_silence.assert_called_once()
-        duration, filepath, fmt = mock_silence.call_args.args[:3]
-        assert duration == 100
-        assert filepath == tmp_path / f'{basename}-00001.wav'
-        assert fmt == 'wav'
+        # Fragment #1 (silence) is only a duration in the manifest; the
+        # concatenation makes it up, so no file is written for it.
+        mock_silence.assert_not_called()
+        assert manifest.fragments[1].silence_duration == 100
+        assert manifest.fragments[1].encoded is not None
         # Fragment #2
         mock_qwen.post.assert_has_calls([speech_call('Paragraph 2')])
         mock_qwen.write_bytes.assert_any_call(
@@ -301,6 +319,54 @@ class TestEncoder():
         assert mock_qwen.post.call_count == 5
         mock_qwen.write_bytes.assert_not_called()
 
+    def test_t2s_reports_the_transfer(self, mock_qwen, tmp_path):
+        # Setup: the server fails once before it answers.
+        mock_qwen.response.raise_for_status.side_effect = [
+            Exception('boom'), None
+        ]
+        voice = QwenVoice(voice_id='Ryan')
+
+        # Run
+        transfer = QwenEncoder().t2s('Hello', voice, tmp_path / 'out.wav')
+
+        # Verify: the time to the headers is what `requests` measured, and the
+        # failed attempt is counted rather than hidden in the latency.
+        assert transfer.ttfb == 0.25
+        assert transfer.received == len(b'audio')
+        assert transfer.attempts == 2
+        # Not a wav, so there is no header to read the duration from.
+        assert transfer.duration is None
+
+    def test_t2s_reports_the_audio_duration(self, mock_qwen, tmp_path):
+        # Setup: the server returns two seconds of speech.
+        write_wav(tmp_path / 'take.wav', SPEECH, 2000)
+        mock_qwen.response.content = (tmp_path / 'take.wav').read_bytes()
+
+        # Run
+        transfer = QwenEncoder().t2s(
+            'Hello', QwenVoice(voice_id='Ryan'), tmp_path / 'out.wav'
+        )
+
+        # Verify
+        assert transfer.duration == pytest.approx(2.0)
+
+    def test_a_rejected_request_is_not_retried(self, mock_qwen, tmp_path):
+        # Setup: the server refuses the request as invalid.
+        response = requests.Response()
+        response.status_code = 422
+        mock_qwen.response.raise_for_status.side_effect = requests.HTTPError(
+            '422 Unprocessable Entity', response=response
+        )
+
+        # Run
+        with pytest.raises(requests.HTTPError, match='422'):
+            QwenEncoder().t2s(
+                'Hello', QwenVoice(voice_id='Ryan'), tmp_path / 'out.wav'
+            )
+
+        # Verify: asking four more times would only get four more refusals.
+        assert mock_qwen.post.call_count == 1
+
     def test_audio_format(self):
         assert QwenEncoder().audio_format == 'wav'
         assert QwenEncoder(audio_format='mp3').audio_format == 'mp3'
@@ -390,6 +456,44 @@ class TestTimeout():
         assert mock_qwen.post.call_args.kwargs['timeout'] \
             == (CONNECT_TIMEOUT, 30.0)
 
+    def test_the_timeout_adapts_to_the_server(self, mock_qwen, tmp_path):
+        # Setup: a server that answers 100 characters in a quarter second.
+        encoder = QwenEncoder()
+        voice = QwenVoice(voice_id='Ryan')
+        for _ in range(ADAPTIVE_SAMPLES):
+            encoder.t2s('x' * 100, voice, tmp_path / 'o.wav')
+
+        # Run
+        encoder.t2s('Hi', voice, tmp_path / 'o.wav')
+
+        # Verify: a hung request for a short line is noticed in seconds.
+        assert mock_qwen.post.call_args.kwargs['timeout'] \
+            == (CONNECT_TIMEOUT, ADAPTIVE_FLOOR)
+
+    def test_a_timed_out_request_is_retried_under_the_full_timeout(
+        self, mock_qwen, tmp_path
+    ):
+        # Setup: an estimate, and then a request that outlives it -- which may
+        # be a server that slowed down rather than one that hung.
+        encoder = QwenEncoder()
+        voice = QwenVoice(voice_id='Ryan')
+        for _ in range(ADAPTIVE_SAMPLES):
+            encoder.t2s('x' * 100, voice, tmp_path / 'o.wav')
+        mock_qwen.response.raise_for_status.side_effect = [
+            ReadTimeout('slow'), None
+        ]
+
+        # Run
+        encoder.t2s('Hi', voice, tmp_path / 'o.wav')
+
+        # Verify
+        timeouts = [
+            c.kwargs['timeout'] for c in mock_qwen.post.call_args_list[-2:]
+        ]
+        assert timeouts == [
+            (CONNECT_TIMEOUT, ADAPTIVE_FLOOR), DEFAULT_TIMEOUT
+        ]
+
     def test_the_timeout_comes_from_the_command_line(self):
         encoder, _ = QwenEncoder.from_args(
             parse_args(['--voice-id', 'Ryan', '--timeout', '45'])
@@ -398,19 +502,105 @@ class TestTimeout():
         assert encoder._timeout == (CONNECT_TIMEOUT, 45.0)
 
 
+class TestWarmup():
+    """The first request of a run loads and compiles a model, which is why
+    the default read timeout is ten minutes. A warmup takes that stall before
+    the encode, so the encode itself can be held to a tight one.
+    """
+
+    def test_waits_for_the_server_then_loads_each_kind_of_voice(
+        self, mock_qwen, tmp_path
+    ):
+        # Setup: two presets and a clone -- two models to load.
+        ref = tmp_path / 'ref.wav'
+        ref.write_text('reference-audio')
+        voices = [
+            QwenVoice(voice_id='Ryan'),
+            QwenVoice(voice_id='Vivian'),
+            QwenVoice(ref_audio=str(ref), ref_text='Hello'),
+        ]
+
+        # Run
+        QwenEncoder().warmup(voices)
+
+        # Verify
+        mock_qwen.requests.get.assert_called_once()
+        assert mock_qwen.requests.get.call_args.args[0] \
+            == f'{DEFAULT_URL}/v1/voices'
+        urls = [c.args[0] for c in mock_qwen.post.call_args_list]
+        assert urls == [
+            f'{DEFAULT_URL}/v1/audio/speech',
+            f'{DEFAULT_URL}/v1/audio/speech/upload',
+        ]
+        # Under the patient timeout: this is the request that stalls.
+        assert all(
+            c.kwargs['timeout'] == DEFAULT_TIMEOUT
+            for c in mock_qwen.post.call_args_list
+        )
+
+    def test_the_warmup_does_not_set_the_pace(self, mock_qwen):
+        # Its words took a model load to say: counted, they would loosen the
+        # adaptive timeout of the fragments that follow.
+        encoder = QwenEncoder()
+        encoder.warmup([QwenVoice(voice_id='Ryan')])
+
+        assert encoder._estimator.samples == 0
+
+    def test_the_encode_gets_a_tight_timeout(self, mock_qwen, tmp_path):
+        encoder = QwenEncoder()
+        encoder.warmup([QwenVoice(voice_id='Ryan')])
+
+        encoder.t2s('Hi', QwenVoice(voice_id='Ryan'), tmp_path / 'o.wav')
+
+        assert mock_qwen.post.call_args.kwargs['timeout'] \
+            == (CONNECT_TIMEOUT, WARM_READ_TIMEOUT)
+
+    @pytest.mark.parametrize('timeout', [30.0, 900.0])
+    def test_a_timeout_of_its_own_is_kept(self, mock_qwen, tmp_path, timeout):
+        encoder = QwenEncoder(timeout=timeout)
+        encoder.warmup([QwenVoice(voice_id='Ryan')])
+
+        encoder.t2s('Hi', QwenVoice(voice_id='Ryan'), tmp_path / 'o.wav')
+
+        assert mock_qwen.post.call_args.kwargs['timeout'] \
+            == (CONNECT_TIMEOUT, timeout)
+
+    def test_encode_manifest_warms_up_the_voices_it_will_use(
+        self, qwen_voice, mock_progress_bar, tmp_path
+    ):
+        warmed = []
+
+        class WarmingEncoder(InterruptingEncoder):
+            def warmup(self, voices):
+                warmed.append(voices)
+
+        manifest = Manifest(fragments=[
+            Fragment(text='One', filename='b-00000.wav', voice=qwen_voice),
+            Fragment(text='', filename='b-00001.wav'),
+            Fragment(text='Two', filename='b-00002.wav', voice=qwen_voice),
+        ])
+
+        WarmingEncoder(stop_at='never').encode_manifest(
+            manifest, tmp_path, warmup=True
+        )
+
+        assert warmed == [[qwen_voice]]
+
+
 class InterruptingEncoder(QwenEncoder):
     """Writes real audio, then stops dead partway through the book -- a Ctrl-C
     in the middle of a long encode.
     """
 
-    def __init__(self, stop_at: str) -> None:
+    def __init__(self, stop_at: str, value: int = 0) -> None:
         super().__init__()
         self._stop_at = stop_at
+        self._value = value
 
     def t2s(self, text: str, voice: Voice, filepath: Path) -> None:
         if text == self._stop_at:
             raise KeyboardInterrupt
-        write_wav(filepath, SPEECH, 100)
+        write_wav(filepath, SPEECH, 100, value=self._value)
 
 
 class TestInterruptedEncode():
@@ -429,7 +619,7 @@ class TestInterruptedEncode():
 
         with pytest.raises(KeyboardInterrupt):
             InterruptingEncoder(stop_at='Two').encode_manifest(
-                manifest, tmp_path
+                manifest, tmp_path, silence_files=True
             )
 
         silence = tmp_path / 'b-00001.wav'
@@ -439,6 +629,40 @@ class TestInterruptedEncode():
         assert params == SPEECH
         assert seconds == pytest.approx(0.5)
 
+    def test_normalize_measures_each_take(
+        self, qwen_voice, mock_progress_bar, tmp_path
+    ):
+        # The loudness --normalize levels by is taken as each fragment is
+        # encoded, so concatenation never has to read the book an extra time.
+        manifest = Manifest(fragments=[
+            Fragment(text='One', filename='b-00000.wav', voice=qwen_voice),
+            Fragment(text='', filename='b-00001.wav', silence_duration=500),
+        ])
+
+        InterruptingEncoder(stop_at='never', value=8000).encode_manifest(
+            manifest, tmp_path, normalize=True
+        )
+
+        assert manifest.fragments[0].loudness \
+            == pytest.approx(-12.25, abs=0.01)
+        assert manifest.fragments[1].loudness is None
+
+    def test_trim_records_the_dead_air(
+        self, qwen_voice, mock_progress_bar, tmp_path
+    ):
+        # Found as each take is encoded, and only recorded: the take itself is
+        # left as the server made it.
+        manifest = Manifest(fragments=[
+            Fragment(text='One', filename='b-00000.wav', voice=qwen_voice),
+        ])
+
+        InterruptingEncoder(stop_at='never', value=8000).encode_manifest(
+            manifest, tmp_path, trim=True
+        )
+
+        assert manifest.fragments[0].trim_start == 0
+        assert manifest.fragments[0].trim_end == 0
+
     def test_a_leading_silence_is_still_deferred(
         self, qwen_voice, mock_progress_bar, tmp_path
     ):
@@ -450,9 +674,669 @@ class TestInterruptedEncode():
         ])
 
         QwenEncoder.encode_manifest(
-            InterruptingEncoder(stop_at='never'), manifest, tmp_path
+            InterruptingEncoder(stop_at='never'), manifest, tmp_path,
+            silence_files=True
         )
 
         params, seconds = read_wav(tmp_path / 'b-00000.wav')
         assert params == SPEECH
         assert seconds == pytest.approx(0.5)
+
+    def test_each_take_is_timed(
+        self, qwen_voice, mock_progress_bar, tmp_path
+    ):
+        # Only the fragments that were synthesized: a silence costs nothing,
+        # and would drag every percentile down.
+        manifest = Manifest(fragments=[
+            Fragment(text='One', filename='b-00000.wav', voice=qwen_voice),
+            Fragment(text='', filename='b-00001.wav', silence_duration=500),
+            Fragment(text='Three', filename='b-00002.wav', voice=qwen_voice),
+        ])
+        report = EncodeReport()
+
+        InterruptingEncoder(stop_at='never').encode_manifest(
+            manifest, tmp_path, report=report
+        )
+
+        assert [f.index for f in report.fragments] == [0, 2]
+        assert [f.chars for f in report.fragments] == [3, 5]
+        assert report.fragments[1].filename == 'b-00002.wav'
+        assert all(f.seconds >= 0 for f in report.fragments)
+
+    def test_a_stale_silence_file_is_removed(
+        self, qwen_voice, mock_progress_bar, tmp_path
+    ):
+        # Re-encoding without --silence-files: a silence left by an earlier
+        # run would be copied in ahead of the one made up from the manifest,
+        # at whatever length that run asked for.
+        stale = tmp_path / 'b-00001.wav'
+        write_wav(stale, SPEECH, 2000)
+        manifest = Manifest(fragments=[
+            Fragment(text='One', filename='b-00000.wav', voice=qwen_voice),
+            Fragment(text='', filename='b-00001.wav', silence_duration=500),
+        ])
+
+        InterruptingEncoder(stop_at='never').encode_manifest(
+            manifest, tmp_path
+        )
+
+        assert not stale.exists()
+        assert manifest.fragments[1].silence_duration == 500
+
+
+class SleepingEncoder(QwenEncoder):
+    """Takes a tenth of a second per character of text, the way a server takes
+    longer over a longer fragment, and remembers the order it was asked in.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.started: list[str] = []
+
+    def t2s(self, text: str, voice: Voice, filepath: Path) -> None:
+        self.started.append(text)
+        sleep(len(text) / 10)
+        write_wav(filepath, SPEECH, 100)
+
+
+def submission_order(
+    encoder: QwenEncoder, texts: list[str], voice: Voice, tmp_path: Path,
+    workers: int
+) -> list[str]:
+    """The texts in the order `encode_manifest()` hands them to its workers."""
+    manifest = Manifest(fragments=[
+        Fragment(text=t, filename=f'b-{i:05d}.wav', voice=voice)
+        for i, t in enumerate(texts)
+    ])
+    submitted: list[str] = []
+
+    class RecordingPool(ThreadPoolExecutor):
+        def submit(self, fn, batch, *args, **kwargs):
+            submitted.extend(job.fragment.text for job in batch)
+            return super().submit(fn, batch, *args, **kwargs)
+
+    with patch('zaphodvox.encoder.ThreadPoolExecutor', RecordingPool):
+        encoder.encode_manifest(manifest, tmp_path, workers=workers)
+    return submitted
+
+
+def makespan(seconds: list[float], workers: int) -> float:
+    """When the last of the given requests would finish, each started in turn
+    on whichever worker is free first -- as a thread pool runs them."""
+    free = [0.0] * workers
+    for s in seconds:
+        heapq.heapreplace(free, free[0] + s)
+    return max(free)
+
+
+class TestConcurrentEncode():
+    def test_the_longest_fragments_start_first(
+        self, qwen_voice, mock_progress_bar, tmp_path
+    ):
+        # What runs when is up to the threads, so it is the order they are
+        # handed out in that is checked. Ties keep their book order.
+        submitted = submission_order(
+            SleepingEncoder(), ['a', 'bb', 'c', 'd', 'long'], qwen_voice,
+            tmp_path, workers=2
+        )
+
+        assert submitted == ['long', 'bb', 'a', 'c', 'd']
+
+    def test_longest_first_finishes_sooner(
+        self, qwen_voice, mock_progress_bar, tmp_path
+    ):
+        # Six short lines and a long one at the end, on two workers, each
+        # taking a tenth of a second a character. In book order the long one
+        # starts last and runs on alone: 0.3 + 0.8 seconds. Handed out first,
+        # the short ones fill in beside it: 0.8. Timed on paper rather than
+        # by the clock, so a busy machine cannot make it flaky.
+        texts = ['a', 'b', 'c', 'd', 'e', 'f', 'longline']
+        submitted = submission_order(
+            InterruptingEncoder(stop_at='never'), texts, qwen_voice, tmp_path,
+            workers=2
+        )
+
+        def seconds(order: list[str]) -> float:
+            return makespan([len(t) / 10 for t in order], workers=2)
+
+        assert seconds(texts) == pytest.approx(1.1)
+        assert seconds(submitted) == pytest.approx(0.8)
+
+    def test_every_fragment_is_encoded_in_its_place(
+        self, qwen_voice, mock_progress_bar, tmp_path
+    ):
+        # Finished out of order, but each to its own file, so the manifest and
+        # the book come out the same as one at a time.
+        manifest = Manifest(fragments=[
+            Fragment(text='', filename='b-00000.wav', silence_duration=500),
+            Fragment(text='One', filename='b-00001.wav', voice=qwen_voice),
+            Fragment(text='Three', filename='b-00002.wav', voice=qwen_voice),
+        ])
+        report = EncodeReport()
+
+        SleepingEncoder().encode_manifest(
+            manifest, tmp_path, silence_files=True, report=report, workers=2
+        )
+
+        assert all(f.encoded is not None for f in manifest.fragments)
+        assert [f.filename for f in manifest.fragments] \
+            == ['b-00000.wav', 'b-00001.wav', 'b-00002.wav']
+        assert sorted(f.index for f in report.fragments) == [1, 2]
+        # The leading silence still waited for speech to copy a format from.
+        params, seconds = read_wav(tmp_path / 'b-00000.wav')
+        assert params == SPEECH
+        assert seconds == pytest.approx(0.5)
+
+    def test_the_run_is_timed_by_the_wall_clock(
+        self, qwen_voice, mock_progress_bar, tmp_path
+    ):
+        # Three fragments side by side: each takes its time, but the run takes
+        # about as long as one of them, not as long as all three.
+        manifest = Manifest(fragments=[
+            Fragment(text='abcd', filename=f'b-{i:05d}.wav', voice=qwen_voice)
+            for i in range(3)
+        ])
+        report = EncodeReport()
+
+        SleepingEncoder().encode_manifest(
+            manifest, tmp_path, report=report, workers=3
+        )
+
+        assert report.finished is not None
+        assert sum(f.seconds for f in report.fragments) >= 1.2
+        assert 0.4 <= report.seconds < 1.0
+
+    def test_a_failure_stops_the_encode(
+        self, qwen_voice, mock_progress_bar, tmp_path
+    ):
+        manifest = Manifest(fragments=[
+            Fragment(text='One', filename='b-00000.wav', voice=qwen_voice),
+            Fragment(text='Two', filename='b-00001.wav', voice=qwen_voice),
+        ])
+
+        with pytest.raises(KeyboardInterrupt):
+            InterruptingEncoder(stop_at='Two').encode_manifest(
+                manifest, tmp_path, workers=2
+            )
+
+        assert manifest.fragments[1].encoded is None
+
+
+class CountingEncoder(QwenEncoder):
+    """Writes real audio, numbered by how many requests it has taken."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.requests: list[str] = []
+
+    def t2s(self, text: str, voice: Voice, filepath: Path) -> None:
+        self.requests.append(text)
+        write_wav(filepath, SPEECH, 100, value=1000 * len(self.requests))
+
+
+class TestCoalescing():
+    @pytest.fixture
+    def seeded_voice(self):
+        return QwenVoice(voice_id='Ryan', seed=7)
+
+    def divided(self, voice):
+        return Manifest(fragments=[
+            Fragment(text='* * *', filename='b-00000.wav', voice=voice),
+            Fragment(text='Once', filename='b-00001.wav', voice=voice),
+            Fragment(text='* * *', filename='b-00002.wav', voice=voice),
+            Fragment(text='* * *', filename='b-00003.wav', voice=voice),
+        ])
+
+    @pytest.mark.parametrize('workers', [1, 2])
+    def test_a_repeat_is_synthesized_once(
+        self, seeded_voice, mock_progress_bar, tmp_path, workers
+    ):
+        manifest = self.divided(seeded_voice)
+        encoder = CountingEncoder()
+        report = EncodeReport()
+
+        encoder.encode_manifest(
+            manifest, tmp_path, report=report, workers=workers
+        )
+
+        assert sorted(encoder.requests) == ['* * *', 'Once']
+        assert report.coalesced == 2
+        assert len(report.fragments) == 2
+        # The copies are files of their own, the same audio as the first.
+        first = (tmp_path / 'b-00000.wav').read_bytes()
+        assert (tmp_path / 'b-00002.wav').read_bytes() == first
+        assert (tmp_path / 'b-00003.wav').read_bytes() == first
+        assert all(f.encoded is not None for f in manifest.fragments)
+
+    def test_the_copy_carries_the_measurements(
+        self, seeded_voice, mock_progress_bar, tmp_path
+    ):
+        manifest = self.divided(seeded_voice)
+
+        CountingEncoder().encode_manifest(manifest, tmp_path, normalize=True)
+
+        assert manifest.fragments[2].loudness is not None
+        assert manifest.fragments[2].loudness \
+            == manifest.fragments[0].loudness
+
+    def test_an_unseeded_voice_is_synthesized_every_time(
+        self, qwen_voice, mock_progress_bar, tmp_path
+    ):
+        # Each take is a fresh draw; reusing one would change the book.
+        encoder = CountingEncoder()
+
+        encoder.encode_manifest(self.divided(qwen_voice), tmp_path)
+
+        assert len(encoder.requests) == 4
+
+    def test_a_different_voice_is_a_different_key(self, seeded_voice):
+        encoder = QwenEncoder()
+        other = QwenVoice(voice_id='Ryan', seed=8)
+
+        assert encoder.synthesis_key('Hi', seeded_voice) \
+            == encoder.synthesis_key('Hi', QwenVoice(voice_id='Ryan', seed=7))
+        assert encoder.synthesis_key('Hi', seeded_voice) \
+            != encoder.synthesis_key('Hi', other)
+        assert encoder.synthesis_key('Hi', seeded_voice) \
+            != encoder.synthesis_key('Ho', seeded_voice)
+
+
+class BatchingEncoder(QwenEncoder):
+    """Reads each line of a batched request as half a second of sound, with the
+    long stop the request asks for between them -- or, told to ignore the
+    stops, runs them all together. Told to `hesitate`, it reads the first line
+    with a pause in the middle, longer than the stops.
+    """
+
+    def __init__(self, pauses: bool = True, hesitate: bool = False) -> None:
+        super().__init__()
+        self.requests: list[str] = []
+        self.filepaths: list[Path] = []
+        self._pauses = pauses
+        self._hesitate = hesitate
+
+    def t2s(self, text: str, voice: Voice, filepath: Path) -> None:
+        self.requests.append(text)
+        self.filepaths.append(filepath)
+        stop = ' . ' * (len(BATCH_BREAK) - 1)
+        spans = [(100, 0)]
+        for i, line in enumerate(text.split(stop)):
+            if i == 0 and self._hesitate:
+                spans += [(200, 8000), (900, 0), (300, 8000)]
+            else:
+                spans += [(500, 8000)]
+            spans += [(600 if self._pauses else 0, 0)]
+        write_speech(filepath, spans[:-1] + [(100, 0)])
+
+    def t2s_batch(self, texts, voice, filepaths):
+        # A server without a batch endpoint.
+        return None
+
+
+class TestBatching():
+    def manifest(self, voice, voice_2):
+        return Manifest(fragments=[
+            Fragment(text='Hi.', filename='b-00000.wav', voice=voice),
+            Fragment(text='', filename='b-00001.wav', silence_duration=500),
+            Fragment(text='Yes.', filename='b-00002.wav', voice=voice),
+            Fragment(text='No.', filename='b-00003.wav', voice=voice),
+            Fragment(text='Who?', filename='b-00004.wav', voice=voice_2),
+            Fragment(
+                text='A line much too long to batch.', filename='b-00005.wav',
+                voice=voice_2
+            ),
+        ])
+
+    @pytest.mark.parametrize('workers', [1, 2])
+    def test_short_lines_share_a_request(
+        self, qwen_voice, qwen_voice_2, mock_progress_bar, tmp_path, workers
+    ):
+        manifest = self.manifest(qwen_voice, qwen_voice_2)
+        encoder = BatchingEncoder()
+        report = EncodeReport()
+
+        encoder.encode_manifest(
+            manifest, tmp_path, report=report, workers=workers, batch_chars=12
+        )
+
+        # The three short lines in one voice together; a change of voice, and
+        # a line too long to batch, each start a request of their own.
+        assert len(encoder.requests) == 3
+        assert report.batched == 2
+        for i in (0, 2, 3):
+            _, seconds = read_wav(tmp_path / f'b-{i:05d}.wav')
+            assert seconds == pytest.approx(0.9, abs=0.31)
+        assert all(f.encoded is not None for f in manifest.fragments)
+        assert sorted(f.index for f in report.fragments) == [0, 2, 3, 4, 5]
+        assert {p.suffix for p in encoder.filepaths} == {'.wav'}
+
+    def test_a_take_that_cannot_be_split_is_made_again_one_by_one(
+        self, qwen_voice, qwen_voice_2, mock_progress_bar, tmp_path
+    ):
+        # The server ran the lines together: better three more requests than
+        # three fragments cut in the wrong places.
+        encoder = BatchingEncoder(pauses=False)
+        report = EncodeReport()
+
+        encoder.encode_manifest(
+            self.manifest(qwen_voice, qwen_voice_2), tmp_path, report=report,
+            batch_chars=12
+        )
+
+        assert encoder.requests[1:4] == ['Hi.', 'Yes.', 'No.']
+        assert report.batched == 0
+
+    def test_a_take_cut_in_the_wrong_places_is_made_again_one_by_one(
+        self, qwen_voice, qwen_voice_2, mock_progress_bar, tmp_path
+    ):
+        # The first line's own pause is longer than the stops, so the take
+        # splits into as many pieces as lines -- but not at the lines.
+        encoder = BatchingEncoder(hesitate=True)
+        report = EncodeReport()
+
+        encoder.encode_manifest(
+            self.manifest(qwen_voice, qwen_voice_2), tmp_path, report=report,
+            batch_chars=12
+        )
+
+        assert encoder.requests[1:4] == ['Hi.', 'Yes.', 'No.']
+        assert report.batched == 0
+        for i in (0, 2, 3):
+            assert (tmp_path / f'b-{i:05d}.wav').is_file()
+
+    def test_off_by_default(
+        self, qwen_voice, qwen_voice_2, mock_progress_bar, tmp_path
+    ):
+        encoder = BatchingEncoder()
+
+        encoder.encode_manifest(
+            self.manifest(qwen_voice, qwen_voice_2), tmp_path
+        )
+
+        assert len(encoder.requests) == 5
+
+
+def tone(ms: int) -> bytes:
+    """A `wav` of `ms` of sound, with no gaps in it to split at."""
+    out = BytesIO()
+    with wave.open(out, 'wb') as w:
+        w.setnchannels(SPEECH.channels)
+        w.setsampwidth(SPEECH.sample_width)
+        w.setframerate(SPEECH.frame_rate)
+        w.writeframes((8000).to_bytes(2, 'little', signed=True) * (24 * ms))
+    return out.getvalue()
+
+
+class StandInServer(ThreadingHTTPServer):
+    """A local stand-in for the Qwen3-TTS server: reads each text as 100 ms of
+    sound per character, and, if it `batches`, has a batch endpoint.
+    """
+
+    def __init__(
+        self, batches: bool, batch_endpoint: bool = True, missing: int = 404
+    ) -> None:
+        super().__init__(('127.0.0.1', 0), StandInHandler)
+        self.batches = batches
+        self.batch_endpoint = batch_endpoint
+        self.missing = missing
+        self.requests: list[tuple[str, str, bytes]] = []
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    server: StandInServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def reply(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.server.requests.append(('GET', self.path, b''))
+        if self.path == '/v1/capabilities' and self.server.batches:
+            self.reply(200, b'{"batch": true}', 'application/json')
+        else:
+            self.reply(404, b'{}', 'application/json')
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.requests.append(('POST', self.path, body))
+        if self.path == '/v1/audio/speech/batch' \
+                and self.server.batch_endpoint:
+            if self.headers['Content-Type'].startswith('multipart/'):
+                field = re.search(
+                    rb'name="items"\r\n\r\n(.*?)\r\n--', body, re.DOTALL
+                )
+                assert field is not None
+                items = json.loads(field.group(1))
+            else:
+                items = json.loads(body)['items']
+            audio = [
+                b64encode(tone(100 * len(item['input']))).decode()
+                for item in items
+            ]
+            self.reply(
+                200, json.dumps({'audio': audio}).encode(), 'application/json'
+            )
+        elif self.path == '/v1/audio/speech' \
+                and json.loads(body).get('stream'):
+            # Raw PCM, sent in pieces that do not line up with the frames.
+            pcm = tone(100 * len(json.loads(body)['input']))[44:]
+            self.send_response(200)
+            self.send_header('Content-Type', 'audio/pcm')
+            self.send_header('Content-Length', str(len(pcm)))
+            self.end_headers()
+            for i in range(0, len(pcm), 1001):
+                self.wfile.write(pcm[i:i + 1001])
+                self.wfile.flush()
+        elif self.path == '/v1/audio/speech':
+            self.reply(200, tone(100), 'audio/wav')
+        else:
+            self.reply(self.server.missing, b'{}', 'application/json')
+
+
+@pytest.fixture
+def stand_in():
+    servers = []
+
+    def start(batches: bool = True, **kwargs) -> StandInServer:
+        server = StandInServer(batches, **kwargs)
+        Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+class TestBatchEndpoint():
+    def lines(self, voice, *texts):
+        return Manifest(fragments=[
+            Fragment(text=t, filename=f'b-{i:05d}.wav', voice=voice)
+            for i, t in enumerate(texts)
+        ])
+
+    def test_short_lines_go_in_one_batch_request(
+        self, stand_in, qwen_voice, mock_progress_bar, tmp_path
+    ):
+        server = stand_in()
+        report = EncodeReport()
+
+        QwenEncoder(server.url).encode_manifest(
+            self.lines(qwen_voice, 'Hi.', 'Yes.', 'No.'), tmp_path,
+            report=report, batch_chars=20
+        )
+
+        assert [(m, p) for m, p, _ in server.requests] == [
+            ('GET', '/v1/capabilities'),
+            ('POST', '/v1/audio/speech/batch'),
+        ]
+        items = json.loads(server.requests[1][2])['items']
+        assert [item['input'] for item in items] == ['Hi.', 'Yes.', 'No.']
+        assert items[0]['voice'] == 'Ryan'
+        # Each result in its own file, whole: nothing was cut.
+        for i, chars in enumerate([3, 4, 3]):
+            _, seconds = read_wav(tmp_path / f'b-{i:05d}.wav')
+            assert seconds == pytest.approx(chars / 10)
+        assert report.batched == 2
+        assert report.fragments[1].duration == pytest.approx(0.4)
+
+    def test_the_server_is_asked_once(
+        self, stand_in, qwen_voice, qwen_voice_2, mock_progress_bar, tmp_path
+    ):
+        server = stand_in()
+        manifest = self.lines(qwen_voice, 'Hi.', 'Yes.', 'No.', 'Why?')
+        manifest.fragments[2].voice = qwen_voice_2
+        manifest.fragments[3].voice = qwen_voice_2
+
+        QwenEncoder(server.url).encode_manifest(
+            manifest, tmp_path, batch_chars=20
+        )
+
+        paths = [p for _, p, _ in server.requests]
+        assert paths.count('/v1/capabilities') == 1
+        assert paths.count('/v1/audio/speech/batch') == 2
+
+    def test_a_clone_uploads_its_reference_once(
+        self, stand_in, mock_progress_bar, tmp_path
+    ):
+        server = stand_in()
+        (tmp_path / 'ref.wav').write_bytes(tone(100))
+        voice = QwenVoice(ref_audio='ref.wav', ref_text='hello')
+        voice.anchor(tmp_path)
+
+        QwenEncoder(server.url).encode_manifest(
+            self.lines(voice, 'Hi.', 'Yes.'), tmp_path, batch_chars=20
+        )
+
+        _, path, body = server.requests[1]
+        assert path == '/v1/audio/speech/batch'
+        assert body.count(b'name="voice_file"') == 1
+        assert b'"ref_text": "hello"' in body
+        _, seconds = read_wav(tmp_path / 'b-00001.wav')
+        assert seconds == pytest.approx(0.4)
+
+    def test_without_a_batch_endpoint_each_line_is_a_request(
+        self, stand_in, qwen_voice, mock_progress_bar, tmp_path
+    ):
+        # The server says nothing of batching. The lines are read together
+        # instead, but the take has no pauses to split it at -- so, in the
+        # end, a request per line.
+        server = stand_in(batches=False)
+
+        QwenEncoder(server.url).encode_manifest(
+            self.lines(qwen_voice, 'Hi.', 'Yes.', 'No.'), tmp_path,
+            batch_chars=20
+        )
+
+        posts = [json.loads(b)['input'] for m, _, b in server.requests
+                 if m == 'POST']
+        assert posts[1:] == ['Hi.', 'Yes.', 'No.']
+        assert all(
+            (tmp_path / f'b-{i:05d}.wav').is_file() for i in range(3)
+        )
+
+    def test_a_missing_endpoint_is_not_asked_again(
+        self, stand_in, qwen_voice, qwen_voice_2, mock_progress_bar, tmp_path
+    ):
+        server = stand_in(batch_endpoint=False)
+        manifest = self.lines(qwen_voice, 'Hi.', 'Yes.', 'No.', 'Why?')
+        manifest.fragments[2].voice = qwen_voice_2
+        manifest.fragments[3].voice = qwen_voice_2
+
+        QwenEncoder(server.url).encode_manifest(
+            manifest, tmp_path, batch_chars=20
+        )
+
+        paths = [p for _, p, _ in server.requests]
+        assert paths.count('/v1/audio/speech/batch') == 1
+        assert all(
+            (tmp_path / f'b-{i:05d}.wav').is_file() for i in range(4)
+        )
+
+    def test_not_implemented_falls_back_at_once(
+        self, stand_in, qwen_voice, mock_progress_bar, no_backoff, tmp_path
+    ):
+        # A 501 from the batch endpoint is the server saying it has none, not
+        # that it is down: no retries, no waiting, and no breaker tripped.
+        server = stand_in(batch_endpoint=False, missing=501)
+        encoder = QwenEncoder(server.url)
+
+        encoder.encode_manifest(
+            self.lines(qwen_voice, 'Hi.', 'Yes.', 'No.'), tmp_path,
+            batch_chars=20
+        )
+
+        paths = [p for _, p, _ in server.requests]
+        assert paths.count('/v1/audio/speech/batch') == 1
+        no_backoff.assert_not_called()
+        assert encoder._breaker.failures == 0
+        assert all(
+            (tmp_path / f'b-{i:05d}.wav').is_file() for i in range(3)
+        )
+
+
+class TestStreaming():
+    def test_the_audio_is_written_as_it_arrives(
+        self, stand_in, qwen_voice, tmp_path
+    ):
+        server = stand_in()
+        chunks = []
+        encoder = QwenEncoder(
+            server.url, stream=True,
+            on_chunk=lambda filepath, frames: chunks.append((filepath, frames))
+        )
+        filepath = tmp_path / 'b-00000.wav'
+
+        transfer = encoder.t2s('Hello', qwen_voice, filepath)
+
+        payload = json.loads(server.requests[0][2])
+        assert payload['stream'] is True
+        assert payload['response_format'] == 'pcm'
+        assert read_wav(filepath) == (SPEECH, pytest.approx(0.5))
+        # Handed on whole frames only, and all of them.
+        assert chunks and all(f == filepath for f, _ in chunks)
+        assert all(len(frames) % 2 == 0 for _, frames in chunks)
+        assert b''.join(frames for _, frames in chunks) \
+            == tone(500)[44:]
+        assert transfer.received == 24000
+        assert transfer.duration == pytest.approx(0.5)
+        assert transfer.transfer >= 0
+
+    def test_a_clone_asks_for_a_stream_too(self, mock_qwen, tmp_path):
+        # (`mock_qwen` stubs out `write_bytes`.)
+        with open(tmp_path / 'ref.wav', 'wb') as ref:
+            ref.write(b'RIFF')
+        voice = QwenVoice(ref_audio='ref.wav', ref_text='hello')
+        voice.anchor(tmp_path)
+        mock_qwen.post.return_value.iter_content.return_value = [b'\0\0']
+
+        with patch('zaphodvox.qwen.encoder.wave.open'):
+            QwenEncoder(stream=True).t2s('Hi', voice, tmp_path / 'out.wav')
+
+        data = mock_qwen.post.call_args.kwargs['data']
+        assert data['stream'] == 'true'
+        assert data['response_format'] == 'pcm'
+        assert mock_qwen.post.call_args.kwargs['stream'] is True
+
+    def test_only_wav_can_be_streamed(self):
+        with pytest.raises(ValueError, match='wav'):
+            QwenEncoder(audio_format='mp3', stream=True)
+
+    def test_from_args(self):
+        encoder, _ = QwenEncoder.from_args(
+            parse_args(['--qwen-stream', 'test.txt'])
+        )
+
+        assert isinstance(encoder, QwenEncoder)
+        assert encoder._stream is True
@@ -1,12 +1,55 @@
+from unittest.mock import patch
+
 import pytest
+import requests
 
 from zaphodvox.http import (
+    ADAPTIVE_FLOOR,
+    ADAPTIVE_MARGIN,
+    ADAPTIVE_SAMPLES,
+    BACKOFF_MAX,
     CONNECT_TIMEOUT,
     DEFAULT_READ_TIMEOUT,
+    MAX_ATTEMPTS,
+    MAX_RETRY_AFTER,
+    WARM_READ_TIMEOUT,
+    CircuitBreaker,
+    TimeoutEstimator,
+    backoff,
+    is_outage,
+    is_retryable,
     request_timeout,
+    retry_after,
+    retrying,
+    warm_timeout,
 )
 
 
+def http_error(status: int, **headers: str) -> requests.HTTPError:
+    """The error `raise_for_status()` raises for a response."""
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(
+        {k.replace('_', '-'): v for k, v in headers.items()}
+    )
+    return requests.HTTPError(f'{status}', response=response)
+
+
+def run(fail: list[BaseException], breaker=None) -> int:
+    """Runs a request that raises each of `fail` in turn, then succeeds, under
+    the retry policy. Returns the attempts it took."""
+    errors = iter(fail)
+    attempts = 0
+    for attempt in retrying(breaker):
+        with attempt:
+            attempts += 1
+            if (error := next(errors, None)) is not None:
+                raise error
+    if breaker is not None:
+        breaker.success()
+    return attempts
+
+
 class TestRequestTimeout():
     def test_none_is_the_default_read_timeout(self):
         assert request_timeout(None) == (CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT)
@@ -34,3 +77,202 @@ class TestRequestTimeout():
         # longer than the ~2s of steady-state generation. Time it out and the
         # retry aborts legitimate work five times over and then fails the job.
         assert DEFAULT_READ_TIMEOUT >= 300.0
+
+
+class TestWarmTimeout():
+    def test_a_warm_server_is_held_to_a_tighter_read_timeout(self):
+        assert warm_timeout((CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT)) \
+            == (CONNECT_TIMEOUT, WARM_READ_TIMEOUT)
+
+    def test_a_timeout_that_was_asked_for_is_kept(self):
+        # Tighter, looser or none at all, each was asked for on the command
+        # line -- looser most likely for a server known to be slow.
+        assert warm_timeout((CONNECT_TIMEOUT, 30.0)) == (CONNECT_TIMEOUT, 30.0)
+        assert warm_timeout((CONNECT_TIMEOUT, 900.0)) \
+            == (CONNECT_TIMEOUT, 900.0)
+        assert warm_timeout(None) is None
+
+
+class TestTimeoutEstimator():
+    CEILING = (CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT)
+
+    def _estimator(self, rate: float) -> TimeoutEstimator:
+        estimator = TimeoutEstimator()
+        for _ in range(ADAPTIVE_SAMPLES):
+            estimator.observe(100, 100 / rate)
+        return estimator
+
+    def test_the_configured_timeout_until_there_is_an_estimate(self):
+        estimator = TimeoutEstimator()
+        for _ in range(ADAPTIVE_SAMPLES - 1):
+            estimator.observe(100, 1.0)
+
+        assert estimator.timeout(100, self.CEILING) == self.CEILING
+
+    def test_sized_to_the_text(self):
+        # A server doing 20 characters a second is given four times what 1,000
+        # characters should take.
+        estimator = self._estimator(20.0)
+
+        assert estimator.timeout(1000, self.CEILING) \
+            == (CONNECT_TIMEOUT, ADAPTIVE_MARGIN * 50.0)
+
+    def test_a_short_line_gets_the_floor(self):
+        assert self._estimator(20.0).timeout(5, self.CEILING) \
+            == (CONNECT_TIMEOUT, ADAPTIVE_FLOOR)
+
+    def test_never_more_than_the_configured_timeout(self):
+        assert self._estimator(1.0).timeout(10000, self.CEILING) \
+            == self.CEILING
+
+    def test_waiting_forever_is_kept(self):
+        assert self._estimator(20.0).timeout(100, None) is None
+
+    def test_one_slow_response_does_not_swing_it(self):
+        estimator = self._estimator(20.0)
+
+        estimator.observe(100, 100.0)
+
+        assert estimator.rate is not None
+        assert estimator.rate > 15.0
+
+
+class TestIsRetryable():
+    def test_a_rejected_request_is_not_retried(self):
+        # The server will only say the same thing again.
+        assert not is_retryable(http_error(400))
+        assert not is_retryable(http_error(422))
+
+    def test_transient_failures_are_retried(self):
+        assert is_retryable(http_error(429))
+        assert is_retryable(http_error(408))
+        assert is_retryable(http_error(503))
+        assert is_retryable(requests.ConnectionError('refused'))
+        assert is_retryable(requests.ReadTimeout('slow'))
+        assert is_retryable(Exception('who knows'))
+
+
+class TestIsOutage():
+    def test_a_server_that_is_down_or_overwhelmed(self):
+        assert is_outage(requests.ConnectionError('refused'))
+        assert is_outage(requests.ConnectTimeout('no answer'))
+        assert is_outage(http_error(503))
+        assert is_outage(http_error(429))
+
+    def test_a_bad_request_says_nothing_about_the_server(self):
+        assert not is_outage(http_error(400))
+        assert not is_outage(Exception('who knows'))
+
+
+class TestRetryAfter():
+    def test_seconds(self):
+        assert retry_after(http_error(503, Retry_After='7')) == 7.0
+
+    def test_a_date(self):
+        error = http_error(503, Retry_After='Wed, 21 Oct 2015 07:28:00 GMT')
+
+        # Long past, so there is nothing to wait for.
+        assert retry_after(error) == 0.0
+
+    def test_is_capped(self):
+        error = http_error(503, Retry_After='86400')
+
+        assert retry_after(error) == MAX_RETRY_AFTER
+
+    def test_absent_or_unreadable(self):
+        assert retry_after(http_error(503)) is None
+        assert retry_after(http_error(503, Retry_After='soon')) is None
+        assert retry_after(Exception('no response')) is None
+
+
+class TestBackoff():
+    def test_grows_exponentially_with_full_jitter(self):
+        with patch('zaphodvox.http.random.uniform', side_effect=max) as u:
+            waits = [backoff(attempt) for attempt in range(1, 5)]
+
+        assert waits == [1.0, 2.0, 4.0, 8.0]
+        # Drawn from the whole interval, so failures that happened together
+        # do not all come back together.
+        assert all(call.args[0] == 0 for call in u.call_args_list)
+
+    def test_is_capped(self):
+        with patch('zaphodvox.http.random.uniform', side_effect=max):
+            assert backoff(20) == BACKOFF_MAX
+
+
+class TestRetrying():
+    def test_backs_off_between_attempts(self, no_backoff):
+        assert run([Exception('boom')] * 2) == 3
+
+        assert no_backoff.call_count == 2
+
+    def test_gives_up_after_max_attempts(self):
+        with pytest.raises(Exception, match='boom'):
+            run([Exception('boom')] * MAX_ATTEMPTS)
+
+    def test_a_rejected_request_fails_at_once(self, no_backoff):
+        with pytest.raises(requests.HTTPError, match='422'):
+            run([http_error(422)])
+
+        no_backoff.assert_not_called()
+
+    def test_retry_after_is_honored(self, no_backoff):
+        run([http_error(429, Retry_After='42')])
+
+        no_backoff.assert_called_once_with(42.0)
+
+
+class TestCircuitBreaker():
+    def test_opens_after_outages_in_a_row(self):
+        breaker = CircuitBreaker(threshold=3)
+
+        breaker.failure(requests.ConnectionError())
+        breaker.failure(Exception('not an outage'))
+        breaker.failure(requests.ConnectionError())
+        assert not breaker.is_open
+        breaker.failure(http_error(503))
+
+        assert breaker.is_open
+
+    def test_a_success_closes_it(self):
+        breaker = CircuitBreaker(threshold=1)
+        breaker.failure(requests.ConnectionError())
+
+        breaker.success()
+
+        assert not breaker.is_open
+        assert breaker.failures == 0
+
+    def test_the_cooldown_doubles(self):
+        breaker = CircuitBreaker(threshold=1, cooldown=10, max_cooldown=30)
+        pauses = []
+        for _ in range(4):
+            breaker.failure(requests.ConnectionError())
+            pauses.append(breaker.pause())
+
+        assert pauses == [10, 20, 30, 30]
+
+    def test_waits_out_an_outage_past_max_attempts(self, no_backoff):
+        # Setup: a server restarting, that refuses connections for longer than
+        # the attempts a request would normally get.
+        breaker = CircuitBreaker(threshold=2, cooldown=10, max_cooldown=10)
+        down = [requests.ConnectionError('refused')] * (MAX_ATTEMPTS + 3)
+
+        # Run
+        attempts = run(down, breaker)
+
+        # Verify: paused rather than gave up, and closed again once it was
+        # back.
+        assert attempts == MAX_ATTEMPTS + 4
+        assert no_backoff.call_args_list[-1].args == (10,)
+        assert not breaker.is_open
+
+    def test_gives_up_once_out_of_patience(self):
+        breaker = CircuitBreaker(threshold=1, patience=60)
+        clock = iter(range(0, 10000, 25))
+
+        with patch('zaphodvox.http.monotonic', lambda: next(clock)):
+            with pytest.raises(requests.ConnectionError):
+                run([requests.ConnectionError('refused')] * 100, breaker)
+
+        assert breaker.is_open
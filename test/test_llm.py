@@ -1,13 +1,26 @@
+import io
 import json
-from unittest.mock import patch
+from time import sleep
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
 
 from zaphodvox.http import CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT
 from zaphodvox.llm import (
+    Completion,
+    CompletionError,
+    LLMCache,
     LLMClient,
+    LLMUsage,
+    MAX_CHUNK_TOKENS,
+    PROOF_SYSTEM,
+    TokenCounter,
     _chunk_lines,
     _parse_findings,
     proofread,
 )
+from zaphodvox.proof import LineIndex
 from zaphodvox.text import end_of_sentence
 
 
@@ -18,7 +31,7 @@ def _completion(content: str) -> dict:
 class TestLLM():
     def test_chunk_lines_breaks_on_sentence_end(self):
         lines = [f'Sentence number {i} is here.' for i in range(6)]
-        chunks = _chunk_lines(lines, chunk_chars=50)
+        chunks = _chunk_lines(lines, budget=50)
         # Every chunk ends on a sentence-ending line.
         assert all(end_of_sentence(cl[-1]) for _, cl in chunks)
         # Chunking is lossless.
@@ -33,13 +46,13 @@ class TestLLM():
             'The towel is the most', 'massively useful thing.',
             'A hitchhiker needs one', 'above all other things.',
         ]
-        chunks = _chunk_lines(lines, chunk_chars=20)
+        chunks = _chunk_lines(lines, budget=20)
         for _, chunk_lines in chunks:
             last = chunk_lines[-1].strip()
             assert not last or end_of_sentence(last)
 
     def test_chunk_lines_groups_small(self):
-        chunks = _chunk_lines(['short.', 'lines.', 'here.'], chunk_chars=1000)
+        chunks = _chunk_lines(['short.', 'lines.', 'here.'], budget=1000)
         assert len(chunks) == 1
         assert chunks[0] == (1, ['short.', 'lines.', 'here.'])
 
@@ -64,14 +77,14 @@ class TestLLM():
 
     def test_client_complete_json(self):
         with patch('zaphodvox.llm.requests') as mock_requests:
-            response = mock_requests.post.return_value.__enter__.return_value
+            response = mock_requests.Session.return_value.post.return_value.__enter__.return_value
             response.json.return_value = _completion('{"findings": []}')
 
             client = LLMClient('http://host:1234/', model='qwen')
             out = client.complete_json('sys', 'usr', {'name': 's', 'schema': {}})
 
             assert out == '{"findings": []}'
-            args, kwargs = mock_requests.post.call_args
+            args, kwargs = mock_requests.Session.return_value.post.call_args
             assert args[0] == 'http://host:1234/v1/chat/completions'
             body = kwargs['json']
             assert body['model'] == 'qwen'
@@ -80,7 +93,7 @@ class TestLLM():
 
     def test_proofread(self):
         with patch('zaphodvox.llm.requests') as mock_requests:
-            response = mock_requests.post.return_value.__enter__.return_value
+            response = mock_requests.Session.return_value.post.return_value.__enter__.return_value
             response.json.return_value = _completion(json.dumps({'findings': [
                 {'line': 1, 'category': 'homophone', 'excerpt': 'x',
                  'message': 'y', 'suggestion': 'z'}]}))
@@ -92,6 +105,433 @@ class TestLLM():
             assert findings[0].source == 'llm'
 
 
+def first_line_findings(system, user, schema) -> Completion:
+    """A stand-in LLM that flags the first line of every chunk."""
+    line = int(user.split(':')[0])
+    return Completion(json.dumps({'findings': [
+        {'line': line, 'category': 'c', 'excerpt': 'x', 'message': 'm'}
+    ]}), 0.5, 100, 10)
+
+
+class TestConcurrentProofread():
+    def test_findings_come_back_in_line_order(self):
+        # Each chunk's completion reports its own first line -- and the early
+        # chunks are the slowest to come back, so they finish last.
+        lines = [f'Sentence number {i} is here.' for i in range(400)]
+
+        def complete(system, user, schema):
+            sleep(0.05 if int(user.split(':')[0]) < 200 else 0)
+            return first_line_findings(system, user, schema)
+
+        client = LLMClient('http://host:1234')
+        with (
+            patch.object(client, 'complete', side_effect=complete),
+            patch('zaphodvox.llm.ProgressBar') as bar,
+        ):
+            sequential = proofread('\n'.join(lines), client)
+            concurrent = proofread('\n'.join(lines), client, workers=4)
+
+        assert len(sequential) > 4
+        assert [f.line for f in concurrent] == [f.line for f in sequential]
+        assert [f.line for f in concurrent] == sorted(f.line for f in concurrent)
+        # Every chunk is counted, once.
+        assert bar.return_value.__enter__.return_value.next.call_count \
+            == 2 * len(sequential)
+
+    def test_a_failed_chunk_fails_the_pass(self):
+        client = LLMClient('http://host:1234')
+        with (
+            patch.object(
+                client, 'complete', side_effect=RuntimeError('down')
+            ),
+            patch('zaphodvox.llm.ProgressBar'),
+            pytest.raises(RuntimeError, match='down'),
+        ):
+            proofread('one line', client, workers=2)
+
+
+class TestCache():
+    def paragraphs(self, count: int) -> list[str]:
+        # Each paragraph is a chunk of its own.
+        return [f'Paragraph {i}. ' + 'Words and words. ' * 130 for i in
+                range(count)]
+
+    def test_an_unchanged_manuscript_is_not_sent_again(self, tmp_path):
+        client = LLMClient('http://host:1234', 'qwen')
+        text = '\n'.join(self.paragraphs(4))
+        with (
+            patch.object(
+                client, 'complete', side_effect=first_line_findings
+            ) as complete,
+            patch('zaphodvox.llm.ProgressBar'),
+        ):
+            first = proofread(text, client, cache=LLMCache(tmp_path))
+            cache = LLMCache(tmp_path)
+            second = proofread(text, client, cache=cache)
+
+        assert complete.call_count == 4
+        assert (cache.hits, cache.misses) == (4, 0)
+        assert second == first
+
+    def test_only_changed_chunks_are_sent(self, tmp_path):
+        # A line added at the top changes the first chunk, and moves the rest
+        # down a line -- their findings with them.
+        client = LLMClient('http://host:1234', 'qwen')
+        paragraphs = self.paragraphs(4)
+        with (
+            patch.object(
+                client, 'complete', side_effect=first_line_findings
+            ) as complete,
+            patch('zaphodvox.llm.ProgressBar'),
+        ):
+            proofread('\n'.join(paragraphs), client, cache=LLMCache(tmp_path))
+            cache = LLMCache(tmp_path)
+            edited = ['Chapter One'] + paragraphs
+            findings = proofread('\n'.join(edited), client, cache=cache)
+            fresh = proofread('\n'.join(edited), client)
+
+        assert (cache.hits, cache.misses) == (3, 1)
+        assert complete.call_count == 4 + 1 + 4
+        assert findings == fresh
+
+    def test_another_model_misses(self, tmp_path):
+        cache = LLMCache(tmp_path)
+        lines = ['Their were four.']
+
+        assert cache.key(LLMClient(model='a'), lines) \
+            != cache.key(LLMClient(model='b'), lines)
+        assert cache.key(LLMClient(model='a'), lines) \
+            == cache.key(LLMClient(model='a'), lines)
+
+    def test_another_server_misses(self, tmp_path):
+        cache = LLMCache(tmp_path)
+        lines = ['Their were four.']
+
+        assert cache.key(LLMClient('http://a:1234', 'm'), lines) \
+            != cache.key(LLMClient('http://b:1234', 'm'), lines)
+
+    def test_without_a_model_the_loaded_one_is_asked_for(self, tmp_path):
+        # Whatever the server has loaded answers; another model loaded later
+        # does not get the first one's answers.
+        cache = LLMCache(tmp_path)
+        lines = ['Their were four.']
+
+        def loaded(model: str):
+            client = LLMClient('http://host:1234')
+            response = client._session.get = MagicMock()
+            response.return_value.__enter__.return_value.json.return_value = {
+                'data': [{'id': model}]
+            }
+            return client, response
+
+        client_a, get = loaded('qwen')
+        key_a = cache.key(client_a, lines)
+        client_b, _ = loaded('llama')
+
+        assert client_a.served_model == 'qwen'
+        assert key_a != cache.key(client_b, lines)
+        # Asked the once.
+        assert get.call_count == 1
+        assert get.call_args.args[0] == 'http://host:1234/v1/models'
+
+    def test_a_server_that_cannot_say_serves_an_unnamed_model(self):
+        client = LLMClient('http://host:1234')
+        client._session.get = MagicMock(side_effect=requests.ConnectionError('down'))
+
+        assert client.served_model == ''
+
+    def test_a_damaged_entry_misses(self, tmp_path):
+        cache = LLMCache(tmp_path)
+        (tmp_path / 'k.json').write_text('{"start": 1, "cont')
+
+        assert cache.get('k', 1) is None
+        assert cache.misses == 1
+
+
+class TestLineIndex():
+    def sentences(self) -> list[str]:
+        # Short lines, so every chunk is many of them: chunked afresh, a line
+        # added near the top would move every boundary after it.
+        return [f'Sentence number {i} is here.' for i in range(400)]
+
+    def test_only_changed_chunks_are_sent(self):
+        client = LLMClient('http://host:1234', 'qwen')
+        lines = self.sentences()
+        index = LineIndex()
+        usage = LLMUsage()
+        with (
+            patch.object(
+                client, 'complete', side_effect=first_line_findings
+            ) as complete,
+            patch('zaphodvox.llm.ProgressBar'),
+        ):
+            first = proofread('\n'.join(lines), client, index=index)
+            edited = lines[:10] + ['A new sentence.'] + lines[10:]
+            second = proofread(
+                '\n'.join(edited), client, usage=usage, index=index
+            )
+
+        assert len(first) > 2
+        assert complete.call_count == len(first) + 1
+        assert usage.unchanged == len(first) - 1
+        # The first chunk was sent again; the rest kept their findings, a
+        # line further down.
+        assert [f.line for f in second] \
+            == [1] + [f.line + 1 for f in first[1:]]
+        assert index.chunks[1][0] == first[1].line + 1
+
+    def test_another_model_sends_everything(self):
+        text = '\n'.join(self.sentences())
+        index = LineIndex()
+        with (
+            patch.object(
+                LLMClient, 'complete', side_effect=first_line_findings
+            ) as complete,
+            patch('zaphodvox.llm.ProgressBar'),
+        ):
+            first = proofread(text, LLMClient(model='a'), index=index)
+            proofread(text, LLMClient(model='b'), index=index)
+
+        assert complete.call_count == 2 * len(first)
+
+
+def events(*deltas: str, finish: str = 'stop', usage=None) -> list[str]:
+    """The server-sent events of a streamed completion of the given deltas."""
+    # As a server sends them: UTF-8, not `\u` escapes.
+    lines = [
+        'data: ' + json.dumps(
+            {'choices': [{'delta': {'content': d}}]}, ensure_ascii=False
+        )
+        for d in deltas
+    ]
+    lines.append('data: ' + json.dumps(
+        {'choices': [{'delta': {}, 'finish_reason': finish}]}
+    ))
+    if usage:
+        lines.append('data: ' + json.dumps({'choices': [], 'usage': usage}))
+    return lines + ['', 'data: [DONE]']
+
+
+class TestStreaming():
+    def test_a_streamed_completion_is_put_back_together(self):
+        with patch('zaphodvox.llm.requests') as mock_requests:
+            post = mock_requests.Session.return_value.post
+            response = post.return_value.__enter__.return_value
+            response.iter_lines.return_value = events(
+                '{"find', 'ings": ', '[]}',
+                usage={'prompt_tokens': 50, 'completion_tokens': 6}
+            )
+
+            completion = LLMClient('http://host:1234', stream=True) \
+                .complete('s', 'u', {})
+
+            assert completion.content == '{"findings": []}'
+            assert completion.completion_tokens == 6
+            assert post.call_args.kwargs['stream'] is True
+            assert post.call_args.kwargs['json']['stream'] is True
+
+    def test_a_streamed_answer_is_read_as_utf8(self):
+        # A real response, as `requests` makes it of an event stream with no
+        # charset: left to itself it would read the body as Latin-1.
+        answer = json.dumps(
+            {'findings': [{'excerpt': 'don’t — café'}]}, ensure_ascii=False
+        )
+        response = requests.Response()
+        response.status_code = 200
+        response.headers['Content-Type'] = 'text/event-stream'
+        response.encoding = requests.utils.get_encoding_from_headers(
+            response.headers
+        )
+        response.raw = io.BytesIO(
+            '\n'.join(events(answer[:20], answer[20:])).encode('utf-8')
+        )
+
+        with patch('zaphodvox.llm.requests') as mock_requests:
+            post = mock_requests.Session.return_value.post
+            post.return_value.__enter__.return_value = response
+
+            completion = LLMClient('http://host:1234', stream=True) \
+                .complete('s', 'u', {})
+
+        assert completion.content == answer
+
+    def test_a_rambling_answer_is_given_up_on_at_once(self):
+        # The model has started explaining itself rather than answering; the
+        # rest of its essay is never read.
+        def rambling():
+            yield from events('Sure! Here')[:1]
+            raise AssertionError('read on')
+
+        with patch('zaphodvox.llm.requests') as mock_requests:
+            post = mock_requests.Session.return_value.post
+            response = post.return_value.__enter__.return_value
+            response.iter_lines.side_effect = [
+                rambling(), events('{"findings": []}'),
+            ]
+
+            completion = LLMClient('http://host:1234', stream=True) \
+                .complete('s', 'u', {})
+
+            assert completion.content == '{"findings": []}'
+            assert post.call_count == 2
+
+    def test_a_truncated_stream_is_asked_for_again(self):
+        # The connection dropped mid-object: no finish, no `[DONE]`.
+        with patch('zaphodvox.llm.requests') as mock_requests:
+            post = mock_requests.Session.return_value.post
+            response = post.return_value.__enter__.return_value
+            response.iter_lines.side_effect = [
+                events('{"findings": [')[:1],
+                events('{"findings": []}'),
+            ]
+
+            completion = LLMClient('http://host:1234', stream=True) \
+                .complete('s', 'u', {})
+
+            assert completion.content == '{"findings": []}'
+            assert post.call_count == 2
+
+    def test_an_answer_out_of_tokens_is_an_error(self):
+        with patch('zaphodvox.llm.requests') as mock_requests:
+            post = mock_requests.Session.return_value.post
+            response = post.return_value.__enter__.return_value
+            response.json.return_value = {'choices': [{
+                'message': {'content': '{"findings": [{"li'},
+                'finish_reason': 'length',
+            }]}
+
+            with pytest.raises(CompletionError, match='cut short'):
+                LLMClient('http://host:1234').complete('s', 'u', {})
+            assert post.call_count == 3
+
+
+class TestUsage():
+    def test_every_chunk_goes_through_one_session(self):
+        with patch('zaphodvox.llm.requests') as mock_requests:
+            response = mock_requests.Session.return_value.post.return_value \
+                .__enter__.return_value
+            response.json.return_value = _completion('{"findings": []}')
+            client = LLMClient('http://host:1234')
+            client.complete('s', 'one', {})
+            client.complete('s', 'two', {})
+
+        mock_requests.Session.assert_called_once()
+        assert mock_requests.Session.return_value.post.call_count == 2
+
+    def test_usage_is_recorded_per_chunk(self):
+        client = LLMClient('http://host:1234')
+        text = '\n'.join(
+            f'Paragraph {i}. ' + 'Words and words. ' * 130 for i in range(3)
+        )
+        usage = LLMUsage()
+        with (
+            patch.object(
+                client, 'complete', side_effect=first_line_findings
+            ),
+            patch('zaphodvox.llm.ProgressBar'),
+        ):
+            proofread(text, client, usage=usage)
+
+        assert [c.start for c in usage.chunks] == [1, 2, 3]
+        assert usage.prompt_tokens == 300
+        assert usage.completion_tokens == 30
+        assert usage.tokens_per_second == 20.0
+
+    def test_unreported_usage_has_no_rate(self):
+        with patch('zaphodvox.llm.requests') as mock_requests:
+            response = mock_requests.Session.return_value.post.return_value \
+                .__enter__.return_value
+            response.json.return_value = _completion('{"findings": []}')
+
+            completion = LLMClient('http://host:1234').complete('s', 'u', {})
+
+        assert completion.completion_tokens is None
+        assert LLMUsage().tokens_per_second is None
+
+
+class TestTokenBudget():
+    def words(self, text: str) -> int:
+        # A tokenizer of the simplest kind: a token a word.
+        return len(text.split())
+
+    def test_an_estimate_rounds_up(self):
+        assert TokenCounter(chars_per_token=4.0).count('12345') == 2
+
+    def test_a_tokenizer_counts_exactly(self):
+        assert TokenCounter(tokenizer=self.words).count('one two three') == 3
+
+    def test_observed_usage_calibrates_the_ratio(self):
+        counter = TokenCounter()
+        counter.observe(3000, None)
+        assert not counter.calibrated
+
+        counter.observe(3000, 1000)
+        counter.observe(1000, 250)
+
+        assert counter.calibrated
+        assert counter.chars_per_token == 3.2
+
+    def test_the_budget_is_a_share_of_the_context(self):
+        counter = TokenCounter(tokenizer=lambda text: 100)
+
+        assert counter.budget(4196) == 2048
+        assert counter.budget(1_000_000) == MAX_CHUNK_TOKENS
+        with pytest.raises(ValueError, match='no room'):
+            counter.budget(200)
+
+    def test_chunks_fill_the_context(self):
+        # Forty sentences of ten words (plus a line number each): a small
+        # model gets them in several chunks, a large one in one.
+        lines = [f'Sentence {i} has ten words in it, more or less.'
+                 for i in range(40)]
+        client = LLMClient('http://host:1234')
+        counter = TokenCounter(tokenizer=self.words)
+
+        def chunk_ends(context: int) -> list[int]:
+            with (
+                patch.object(
+                    client, 'complete', side_effect=first_line_findings
+                ),
+                patch('zaphodvox.llm.ProgressBar'),
+            ):
+                return [f.line for f in proofread(
+                    '\n'.join(lines), client, context=context,
+                    counter=counter
+                )]
+
+        assert chunk_ends(4096) == [1]
+        small = chunk_ends(self.words(PROOF_SYSTEM) + 200)
+        # Chunks of 100 tokens: ten lines of eleven, the first to reach it.
+        assert small == [1, 11, 21, 31]
+
+    def test_the_ratio_is_measured_once_and_kept(self, tmp_path):
+        client = LLMClient('http://host:1234', 'qwen')
+        text = '\n'.join(
+            f'Paragraph {i}. ' + 'Words and words. ' * 130 for i in range(3)
+        )
+
+        def complete(system, user, schema):
+            # The server makes three characters of every token.
+            return first_line_findings(system, user, schema)._replace(
+                prompt_tokens=(len(system) + len(user)) // 3
+            )
+
+        cache = LLMCache(tmp_path)
+        with (
+            patch.object(client, 'complete', side_effect=complete),
+            patch('zaphodvox.llm.ProgressBar'),
+        ):
+            proofread(text, client, cache=cache, context=8192)
+            ratio = cache.load_ratio(client)
+            cache.save_ratio(client, 2.0)
+            proofread(text, client, cache=cache, context=8192)
+
+        assert ratio == pytest.approx(3.0, abs=0.01)
+        # Not measured again: the chunks stay where they were.
+        assert cache.load_ratio(client) == 2.0
+        assert cache.load_ratio(LLMClient('http://host:1234', 'b')) is None
+
+
 class TestTimeout():
     """The proofreading pass has the same hang to avoid as the encoders, and a
     local LLM is if anything slower to first token than a TTS server.
@@ -99,21 +539,21 @@ class TestTimeout():
 
     def test_a_completion_times_out(self):
         with patch('zaphodvox.llm.requests') as mock_requests:
-            response = mock_requests.post.return_value.__enter__.return_value
+            response = mock_requests.Session.return_value.post.return_value.__enter__.return_value
             response.json.return_value = _completion('{"findings": []}')
 
             LLMClient('http://host:1234').complete_json('s', 'u', {})
 
-            assert mock_requests.post.call_args.kwargs['timeout'] \
+            assert mock_requests.Session.return_value.post.call_args.kwargs['timeout'] \
                 == (CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT)
 
     def test_a_given_read_timeout_is_used(self):
         with patch('zaphodvox.llm.requests') as mock_requests:
-            response = mock_requests.post.return_value.__enter__.return_value
+            response = mock_requests.Session.return_value.post.return_value.__enter__.return_value
             response.json.return_value = _completion('{"findings": []}')
 
             LLMClient('http://host:1234', timeout=30.0) \
                 .complete_json('s', 'u', {})
 
-            assert mock_requests.post.call_args.kwargs['timeout'] \
+            assert mock_requests.Session.return_value.post.call_args.kwargs['timeout'] \
                 == (CONNECT_TIMEOUT, 30.0)
@@ -10,8 +10,12 @@ from zaphodvox.http import CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT
 from zaphodvox.main import main, parse_voice_ids
 from zaphodvox.paths import resolve_ref
 from zaphodvox.qwen.encoder import DEFAULT_URL
+from zaphodvox.scoring import SPEAKING_RATE
 
 from fake_encoder import FakeEncoder  # noqa: F401
+from test_audio import SPEECH, write_wav
+from test_scoring import voice as voice_samples
+from test_scoring import write as write_samples
 
 DEFAULT_TIMEOUT = (CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT)
 """The `(connect, read)` timeout every request carries unless told otherwise."""
@@ -108,6 +112,7 @@ class TestMain():
             '--encode',
             '--concat',
             '--silence-duration=42',
+            '--silence-files',
             '--indexes=0, 2,4 ',
             'test-manifest.json'
         ]
@@ -584,6 +589,62 @@ class TestAudition():
             'ryan-audition.json', 'w', **WRITE_KW
         )
 
+    def test_an_interrupted_audition_is_adoptable_as_far_as_it_got(
+        self, mock_qwen, tmp_path, monkeypatch
+    ):
+        # The index is written as each candidate lands, so a sweep stopped
+        # partway still lists -- and only lists -- the takes that exist.
+        monkeypatch.chdir(tmp_path)
+        response = mock_qwen.post.return_value
+        mock_qwen.post.side_effect = [response, KeyboardInterrupt]
+
+        with pytest.raises(SystemExit):
+            main(['--encoder=qwen', '--voice-id=Ryan', '--audition=0-2',
+                  AUDITION_TEXT])
+
+        index = json.loads((tmp_path / 'ryan-audition.json').read_text())
+        assert [c['seed'] for c in index] == [0]
+        assert index[0]['filename'] == 'ryan-audition-00.wav'
+
+    def test_candidates_are_scored_and_ranked(
+        self, tmp_path, monkeypatch, capsys
+    ):
+        # Seed 1 comes back clipped, seed 2 clean: the index carries each
+        # take's score, and the take to try first is the clean one.
+        monkeypatch.chdir(tmp_path)
+
+        def t2s(self, text, voice, filepath):
+            samples = voice_samples(len(text) / SPEAKING_RATE)
+            write_samples(filepath, samples * (8 if voice.seed == 1 else 1))
+
+        monkeypatch.setattr('zaphodvox.qwen.encoder.QwenEncoder.t2s', t2s)
+
+        main(['--encoder=qwen', '--voice-id=Ryan', '--audition=1-2',
+              AUDITION_TEXT])
+
+        index = json.loads((tmp_path / 'ryan-audition.json').read_text())
+        clipped, clean = (c['score'] for c in index)
+        assert clipped['clipping'] > 0.1
+        assert clean['score'] > clipped['score']
+        assert '--adopt 2 ' in capsys.readouterr().out
+
+    def test_candidates_are_auditioned_concurrently(
+        self, mock_qwen, tmp_path, monkeypatch
+    ):
+        # With --workers the sweep runs several at a time; the index still
+        # comes out in seed order, whatever order the takes landed in.
+        monkeypatch.chdir(tmp_path)
+
+        main(['--encoder=qwen', '--voice-id=Ryan,Serena', '--audition=0-2',
+              '--workers=3', AUDITION_TEXT])
+
+        assert mock_qwen.post.call_count == 6
+        index_fp, = tmp_path.glob('*-audition.json')
+        index = json.loads(index_fp.read_text())
+        assert [(c['voice']['voice_id'], c['seed']) for c in index] == [
+            (v, seed) for v in ('Ryan', 'Serena') for seed in range(3)
+        ]
+
     def test_clone_audition_is_named_for_the_reference_clip(
         self, mock_qwen, tmp_path, monkeypatch
     ):
@@ -703,6 +764,10 @@ class TestAudition():
         # The reference is never really on disk here, so satisfy the pre-encode
         # existence check (covered for real in test_voice_library.py).
         monkeypatch.setattr(Path, 'is_file', lambda self: True)
+        # Nor are the candidates, which would otherwise be scored.
+        monkeypatch.setattr(
+            'zaphodvox.main.score_candidate', lambda filepath, text: None
+        )
         sys_args = [
             '--encoder=qwen',
             '--voice-ref-audio=narrator.wav',
@@ -1200,6 +1265,55 @@ class TestProof():
         assert report['source_file'] == 'book.txt'
         assert any(f['text'] == 'jumpd' for f in report['findings'])
 
+    def test_proof_several_files(self, tmp_path, monkeypatch):
+        # Each file gets its own report, and its own wordlist, just as alone.
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / 'one.txt').write_text('The fox jumpd.\n')
+        (tmp_path / 'two.txt').write_text('Zaphod waved.\n')
+        (tmp_path / 'two.dict').write_text('zaphod\n')
+
+        main(['--proof', '--workers=2', 'one.txt', 'two.txt'])
+
+        one = json.loads((tmp_path / 'one-proof.json').read_text())
+        two = json.loads((tmp_path / 'two-proof.json').read_text())
+        assert one['source_file'] == 'one.txt'
+        assert [f['text'] for f in one['findings']] == ['jumpd']
+        assert two['source_file'] == 'two.txt'
+        assert two['findings'] == []
+
+    def test_proof_files_around_the_options(self, tmp_path, monkeypatch):
+        # A file before the options and more after them, as a shell history
+        # edited by hand tends to leave them.
+        monkeypatch.chdir(tmp_path)
+        for name in ('a', 'b', 'c'):
+            (tmp_path / f'{name}.txt').write_text('The fox jumpd.\n')
+
+        main(['a.txt', '--proof', 'b.txt', '--workers=2', 'c.txt'])
+
+        for name in ('a', 'b', 'c'):
+            report = json.loads((tmp_path / f'{name}-proof.json').read_text())
+            assert report['source_file'] == f'{name}.txt'
+
+    def test_proof_spell_budget(self, tmp_path, monkeypatch, capfd):
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / 'book.txt').write_text('The quick brown fox jumpd.\n')
+
+        main(['--proof', '--spell-budget=0', 'book.txt'])
+
+        report = json.loads((tmp_path / 'book-proof.json').read_text())
+        assert report['unsuggested'] == 1
+        assert '1 unknown word(s) left without' in capfd.readouterr()[0]
+
+    def test_only_proof_takes_several_files(self, capfd):
+        with pytest.raises(SystemExit) as se:
+            main(['--plan', 'one.txt', 'two.txt'])
+        assert se.value.code == 1
+        assert 'Only --proof takes more' in capfd.readouterr()[0]
+
+        with pytest.raises(SystemExit):
+            main(['--proof', '--basename=x', 'one.txt', 'two.txt'])
+        assert '--basename and --proof-out' in capfd.readouterr()[0]
+
     def test_proof_does_not_build_a_voice(self, tmp_path, monkeypatch):
         # Proofing is read-only and never synthesizes, so it has no business
         # validating voice arguments. It started doing exactly that the moment
@@ -1258,7 +1372,7 @@ class TestProof():
         )}}]}
 
         with patch('zaphodvox.llm.requests') as mock_requests:
-            response = mock_requests.post.return_value.__enter__.return_value
+            response = mock_requests.Session.return_value.post.return_value.__enter__.return_value
             response.json.return_value = completion
             main(['--proof', '--llm-url', 'http://host:1234', 'book.txt'])
 
@@ -1266,6 +1380,34 @@ class TestProof():
         assert any(f['source'] == 'llm' for f in report['findings'])
         assert report['summary'].get('proofread') == 1
 
+    def test_proof_with_llm_reuses_earlier_answers(
+        self, tmp_path, monkeypatch, capfd
+    ):
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / 'book.txt').write_text('Their were four of them.\n')
+        completion = {'choices': [{'message': {'content': json.dumps(
+            {'findings': []}
+        )}}]}
+
+        with patch('zaphodvox.llm.requests') as mock_requests:
+            response = mock_requests.Session.return_value.post.return_value.__enter__.return_value
+            response.json.return_value = completion
+            main(['--proof', '--llm-url', 'http://host:1234', 'book.txt'])
+            main(['--proof', '--llm-url', 'http://host:1234', 'book.txt'])
+            main([
+                '--proof', '--llm-url', 'http://host:1234', '--no-llm-cache',
+                'book.txt'
+            ])
+
+        assert mock_requests.Session.return_value.post.call_count == 2
+        out = capfd.readouterr()[0]
+        assert 'LLM cache: 0 of 1 chunk(s) reused' in out
+        # The second pass finds the chunk unchanged since the report, before
+        # it ever gets to the cache.
+        assert 'LLM: 1 chunk(s) unchanged since the last report' in out
+        assert out.count('LLM: 1 completion(s)') == 2
+        assert (tmp_path / 'book-proof.lines.json').exists()
+
 
 class TestTextEncoding():
     """Round-trips real files through the CLI.
@@ -1450,3 +1592,111 @@ class TestInterruptedEncode():
                 ])
 
         assert (tmp_path / 'book-manifest.json').is_file()
+
+
+class TestReport():
+    """An encode says where its time went: a summary on the console, and
+    with `--report` the fragment-by-fragment detail. Real files.
+    """
+
+    TEXT = 'Line one.\nLine two.\n'
+
+    def _encode(self, tmp_path, monkeypatch, *args: str) -> None:
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / 'book.txt').write_text(self.TEXT, encoding='utf-8')
+
+        def t2s(self, text, voice, filepath):
+            filepath.write_bytes(b'audio')
+        with patch('zaphodvox.qwen.encoder.QwenEncoder.t2s', t2s):
+            main([
+                '--encoder=qwen', '--voice-id=Ryan', '--encode', *args,
+                'book.txt'
+            ])
+
+    def test_the_summary_is_printed(
+        self, tmp_path, monkeypatch, capsys, mock_progress_bar
+    ):
+        self._encode(tmp_path, monkeypatch)
+
+        out = capsys.readouterr().out
+        assert '2 fragment(s)' in out
+        assert 'p95' in out
+        assert 'Slowest fragments' in out
+        # The file only when asked for.
+        assert not (tmp_path / 'book-report.json').exists()
+
+    def test_report_writes_json(
+        self, tmp_path, monkeypatch, mock_progress_bar
+    ):
+        self._encode(tmp_path, monkeypatch, '--report')
+
+        report = json.loads(
+            (tmp_path / 'book-report.json').read_text(encoding='utf-8')
+        )
+        assert report['encoder'] == 'qwen'
+        assert [f['filename'] for f in report['fragments']] \
+            == ['book-00000.wav', 'book-00001.wav']
+
+    def test_report_out_writes_csv(
+        self, tmp_path, monkeypatch, mock_progress_bar
+    ):
+        self._encode(tmp_path, monkeypatch, '--report-out=timings.csv')
+
+        lines = (tmp_path / 'timings.csv').read_text(
+            encoding='utf-8'
+        ).splitlines()
+        assert lines[0].startswith('index,filename,chars,seconds')
+        assert len(lines) == 3
+
+
+class TestNormalize():
+    """Levelling is measured once and kept: a book encoded before there were
+    measurements is measured by the first `--normalize`, and the manifest keeps
+    what it found. Real files.
+    """
+
+    def test_concat_keeps_the_measurements_it_takes(
+        self, tmp_path, monkeypatch, mock_progress_bar
+    ):
+        # Setup: an encoded book whose manifest predates --normalize.
+        monkeypatch.chdir(tmp_path)
+        write_wav(tmp_path / 'book-00000.wav', SPEECH, 500, value=8000)
+        write_wav(tmp_path / 'book-00001.wav', SPEECH, 500, value=4000)
+        (tmp_path / 'book-manifest.json').write_text(json.dumps({
+            'fragments': [
+                {'text': 'Loud.', 'filename': 'book-00000.wav'},
+                {'text': 'Quiet.', 'filename': 'book-00001.wav'},
+            ]
+        }), encoding='utf-8')
+
+        # Run
+        main([
+            '--concat', '--normalize', '--basename=book', 'book-manifest.json'
+        ])
+
+        # Verify
+        assert (tmp_path / 'book.wav').is_file()
+        manifest = json.loads(
+            (tmp_path / 'book-manifest.json').read_text(encoding='utf-8')
+        )
+        loudness = [f['loudness'] for f in manifest['fragments']]
+        assert loudness == pytest.approx([-12.25, -18.27], abs=0.01)
+
+    @pytest.mark.parametrize('flag', ['--normalize', '--trim'])
+    def test_an_mp3_encode_is_refused_before_it_starts(
+        self, flag, tmp_path, monkeypatch, capfd, mock_qwen
+    ):
+        # Not once the whole book has been synthesized and is waiting to be
+        # concatenated.
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / 'book.txt').write_text('Hello there.\n')
+
+        with pytest.raises(SystemExit) as se:
+            main([
+                '--encode', '--concat', flag, '--qwen-audio-format=mp3',
+                'book.txt'
+            ])
+
+        assert se.value.code == 1
+        assert 'need wav fragments, not mp3' in capfd.readouterr()[0]
+        mock_qwen.post.assert_not_called()
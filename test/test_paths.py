@@ -1,8 +1,15 @@
 from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 
-from zaphodvox.paths import abspath, rebase_ref, resolve_ref
+from zaphodvox.paths import (
+    abspath,
+    atomic_write,
+    cache_dir,
+    rebase_ref,
+    resolve_ref,
+)
 
 
 @pytest.fixture
@@ -38,6 +45,50 @@ class TestAbspath():
         assert abspath(tmp_path / 'lib') == tmp_path / 'lib'
 
 
+class TestCacheDir():
+    def test_the_environment_variable_wins(self, tmp_path, monkeypatch):
+        monkeypatch.setenv('ZAPHODVOX_CACHE_DIR', str(tmp_path / 'fast'))
+        monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'xdg'))
+
+        assert cache_dir() == tmp_path / 'fast'
+
+    def test_xdg_cache_home(self, tmp_path, monkeypatch):
+        monkeypatch.delenv('ZAPHODVOX_CACHE_DIR')
+        monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'xdg'))
+
+        assert cache_dir() == tmp_path / 'xdg' / 'zaphodvox'
+
+    def test_defaults_to_the_home_directory(self, fake_home, monkeypatch):
+        monkeypatch.delenv('ZAPHODVOX_CACHE_DIR')
+        monkeypatch.delenv('XDG_CACHE_HOME', raising=False)
+
+        assert cache_dir() == fake_home / '.cache' / 'zaphodvox'
+
+
+class TestAtomicWrite():
+    def test_text_and_bytes(self, tmp_path):
+        atomic_write(tmp_path / 'new' / 'a.json', '{"é": 1}')
+        atomic_write(tmp_path / 'b.bin', b'\x00\x01')
+
+        assert (tmp_path / 'new' / 'a.json').read_text(encoding='utf-8') \
+            == '{"é": 1}'
+        assert (tmp_path / 'b.bin').read_bytes() == b'\x00\x01'
+
+    def test_a_failed_write_leaves_nothing_behind(self, tmp_path):
+        # The old file is untouched, and the temporary one is cleaned up.
+        path = tmp_path / 'a.json'
+        path.write_text('old')
+
+        with (
+            patch('zaphodvox.paths.os.replace', side_effect=OSError('full')),
+            pytest.raises(OSError, match='full'),
+        ):
+            atomic_write(path, 'new')
+
+        assert path.read_text() == 'old'
+        assert [p.name for p in tmp_path.iterdir()] == ['a.json']
+
+
 class TestResolveRef():
     def test_relative_resolves_against_base_dir(self):
         resolved = resolve_ref('narrator.wav', Path('voices'))
@@ -20,3 +20,19 @@ class TestProgressBar():
         mock_progress().advance.assert_called_once()
         mock_panel.assert_not_called()
         mock_live.assert_called_once()
+
+    @patch('zaphodvox.progress.Live')
+    @patch('zaphodvox.progress.Panel')
+    @patch('zaphodvox.progress.Progress')
+    def test_status(self, mock_progress, mock_panel, mock_live):
+        # Setup
+        mock_progress().add_task.return_value = 1234
+
+        # Run
+        with ProgressBar('Test', total=10) as bar:
+            bar.status('1.50× real time')
+
+        # Verify
+        mock_progress().update.assert_called_once_with(
+            1234, status='1.50× real time'
+        )
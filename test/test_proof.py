@@ -1,9 +1,15 @@
+from unittest.mock import patch
+
 from zaphodvox.dictionary import build_speller
 from zaphodvox.proof import (
+    LineIndex,
+    SuggestionCache,
+    _suggest,
     check_repeated_chars,
     check_spelling,
     check_unusual_chars,
     check_whitespace,
+    fingerprint_lines,
     proof_text,
 )
 
@@ -47,8 +53,120 @@ class TestProof():
         assert 'tab' in texts
         assert any('blank lines' in text for text in texts)
 
+    def test_the_checks_share_a_line(self):
+        # One pass over each line finds everything: a word hard against a
+        # zero-width space, a run, or a quote is still a word, and the
+        # characters around it are still checked.
+        speller = build_speller('en')
+        lines = ["Teh's\u200bcat\t***'teh'  ", 'x']
+
+        report = proof_text('\n'.join(lines), speller)
+
+        found = {(f.type, f.text): f for f in report.findings}
+        assert found[('spelling', 'Teh')].lines == [1, 1]
+        assert found[('repeated-char', '***')].line == 1
+        assert found[('unusual-char', 'U+200B')].line == 1
+        assert {text for _, text in found} >= {'tab', 'trailing whitespace'}
+
     def test_proof_text_summary(self):
         speller = build_speller('en')
         report = proof_text('teh dog ****\n', speller)
         assert report.summary.get('spelling') == 1
         assert report.summary.get('repeated-char') == 1
+
+
+class TestParallelProof():
+    def manuscript(self) -> str:
+        # Everything each check looks for, scattered so that every range of
+        # lines has some, and a word first written capitalized.
+        lines = []
+        for i in range(200):
+            lines += [
+                f'Teh dog {i} jumpd over the fence ****  ',
+                'a \ufffd here\tand teh cat.',
+                '', '', '', '',
+                'Zaphod waved.',
+            ]
+        return '\n'.join(lines + ['', '', '', ''])
+
+    def test_the_report_is_the_same_as_from_one_process(self):
+        speller = build_speller('en')
+        text = self.manuscript()
+
+        one = proof_text(text, speller)
+        three = proof_text(text, speller, workers=3)
+
+        assert three == one
+        teh = next(f for f in three.findings if f.text == 'Teh')
+        assert teh.line == 1
+        assert teh.count == 400
+
+    def test_a_blank_run_across_ranges_is_one_run(self):
+        # Cut into ranges of a line or two, every run of blank lines straddles
+        # a boundary; the run at the very end is not reported, as ever.
+        speller = build_speller('en')
+        text = 'one\n\n\n\n\ntwo\n\n\n'
+
+        report = proof_text(text, speller, workers=2)
+
+        runs = [f for f in report.findings if 'blank lines' in f.text]
+        assert [(f.line, f.text) for f in runs] == [(2, '4 blank lines')]
+
+
+class TestSuggestions():
+    def test_suggestions_are_kept_for_the_next_run(self, tmp_path):
+        speller = build_speller('en')
+        text = 'The fox jumpd over teh dog.'
+        path = tmp_path / 'spelling.json'
+
+        with patch('zaphodvox.proof._suggest', wraps=_suggest) as suggest:
+            first = proof_text(text, speller, cache=SuggestionCache(path))
+            second = proof_text(text, speller, cache=SuggestionCache(path))
+
+        assert [c.args[1] for c in suggest.call_args_list] \
+            == [['jumpd', 'teh'], []]
+
+        assert second == first
+        assert 'the' in SuggestionCache(path).get('teh')
+
+    def test_a_spent_budget_leaves_words_unsuggested(self, tmp_path):
+        # Every unknown word is still reported; the next run, with time to
+        # spare, suggests for the ones this one did not get to.
+        speller = build_speller('en')
+        text = 'The fox jumpd over teh dog.'
+        cache = SuggestionCache(tmp_path / 'spelling.json')
+
+        report = proof_text(text, speller, cache=cache, budget=0)
+
+        assert [f.text for f in report.findings] == ['jumpd', 'teh']
+        assert all(f.suggestions == [] for f in report.findings)
+        assert report.unsuggested == 2
+        assert cache.get('teh') is None
+
+        report = proof_text(text, speller, cache=cache)
+
+        assert report.unsuggested is None
+        assert 'the' in report.findings[1].suggestions
+
+    def test_a_damaged_cache_is_ignored(self, tmp_path):
+        path = tmp_path / 'spelling.json'
+        path.write_text('{"teh": ["th')
+
+        assert SuggestionCache(path).get('teh') is None
+
+
+class TestLineIndex():
+    def test_unchanged_lines_are_followed(self):
+        index = LineIndex(fingerprints=fingerprint_lines(['a', 'b', 'c', 'd']))
+
+        moved = index.moved(fingerprint_lines(['a', 'new', 'b', 'd']))
+
+        # `c` was removed, so it has gone nowhere.
+        assert moved == {1: 1, 2: 3, 4: 4}
+
+    def test_a_damaged_index_is_ignored(self, tmp_path):
+        path = tmp_path / 'book-proof.lines.json'
+        path.write_text('{"fingerprints": ["ab')
+
+        assert LineIndex.read(path) == LineIndex()
+        assert LineIndex.read(tmp_path / 'missing.json') == LineIndex()
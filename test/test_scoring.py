@@ -0,0 +1,89 @@
+import wave
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from zaphodvox.scoring import SPEAKING_RATE, score_candidate
+
+RATE = 24000
+
+
+def write(filepath: Path, samples: np.ndarray) -> Path:
+    """Writes floating-point samples as a 16-bit mono `wav`."""
+    ints = np.clip(np.rint(samples * 32768), -32768, 32767).astype('<i2')
+    with wave.open(str(filepath), 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(RATE)
+        w.writeframes(ints.tobytes())
+    return filepath
+
+
+def voice(seconds: float) -> np.ndarray:
+    """Something like speech: a gliding 150 Hz voice with its harmonics,
+    broken into syllables by short pauses."""
+    t = np.arange(int(RATE * seconds)) / RATE
+    f0 = 150 * (1 + 0.05 * np.sin(2 * np.pi * 0.5 * t))
+    phase = 2 * np.pi * np.cumsum(f0) / RATE
+    harmonics = sum(np.sin(k * phase) / k for k in range(1, 6))
+    return 0.2 * harmonics * (np.sin(2 * np.pi * 2 * t) > -0.3)
+
+
+TEXT = 'x' * int(4 * SPEAKING_RATE)
+"""Text that should take four seconds to read."""
+
+
+class TestScoreCandidate():
+    def test_a_clean_take(self, tmp_path):
+        score = score_candidate(write(tmp_path / 'c.wav', voice(4)), TEXT)
+
+        assert score is not None
+        assert score.duration == pytest.approx(4.0)
+        assert score.rate == pytest.approx(1.0)
+        assert score.clipping == 0.0
+        assert score.flatness < 0.05
+        assert score.score > 0.8
+
+    def test_each_flaw_costs(self, tmp_path):
+        rng = np.random.default_rng(0)
+        clean = score_candidate(write(tmp_path / 'c.wav', voice(4)), TEXT)
+        flaws = {
+            'clipped': voice(4) * 8,
+            'hissy': voice(4) + rng.normal(0, 0.05, RATE * 4),
+            'dragging': voice(8),
+            'mostly silent': np.concatenate([voice(1), np.zeros(RATE * 3)]),
+        }
+
+        scores = {
+            flaw: score_candidate(write(tmp_path / 'f.wav', samples), TEXT)
+            for flaw, samples in flaws.items()
+        }
+
+        assert clean is not None
+        for flaw, score in scores.items():
+            assert score is not None
+            assert score.score < clean.score / 2, flaw
+        assert scores['clipped'].clipping > 0.1
+        assert scores['hissy'].noise_floor > -60
+        assert scores['dragging'].rate == pytest.approx(2.0)
+        assert scores['mostly silent'].silence > 0.7
+
+    def test_noise_is_not_a_voice(self, tmp_path):
+        noise = np.random.default_rng(0).normal(0, 0.2, RATE * 4)
+
+        score = score_candidate(write(tmp_path / 'n.wav', noise), TEXT)
+
+        assert score is not None
+        assert score.flatness > 0.3
+        assert score.pitch_jitter > 1.0
+
+    def test_an_unreadable_take_is_not_scored(self, tmp_path):
+        (tmp_path / 'junk.wav').write_text('not audio', encoding='utf-8')
+
+        assert score_candidate(tmp_path / 'junk.wav', TEXT) is None
+
+    def test_a_take_too_short_to_measure(self, tmp_path):
+        assert score_candidate(
+            write(tmp_path / 's.wav', voice(0.01)), TEXT
+        ) is None
@@ -0,0 +1,93 @@
+import csv
+import io
+from datetime import datetime, timedelta
+
+import pytest
+
+from zaphodvox.timing import SLOWEST, EncodeReport, Transfer
+
+
+def report_of(seconds: list[float]) -> EncodeReport:
+    """A report of fragments of ten characters that took the given seconds."""
+    report = EncodeReport(encoder='fake')
+    for index, s in enumerate(seconds):
+        report.add(index, f'b-{index:05d}.wav', 10, s)
+    return report
+
+
+class TestEncodeReport():
+    def test_percentiles(self):
+        report = report_of([float(s) for s in range(1, 101)])
+
+        p50, p95, p99 = report.percentiles('seconds')
+
+        assert p50 == pytest.approx(50.5)
+        assert p95 == pytest.approx(95.05)
+        assert p99 == pytest.approx(99.01)
+
+    def test_an_unmeasured_field_has_no_percentiles(self):
+        # An encoder that does not report its transfers still gets timed; it
+        # just has nothing to say about the first byte.
+        assert report_of([1.0, 2.0]).percentiles('ttfb') is None
+
+    def test_chars_per_second(self):
+        report = report_of([2.0, 0.0])
+
+        assert report.fragments[0].chars_per_second == 5.0
+        assert report.fragments[1].chars_per_second == 0.0
+
+    def test_the_transfer_and_its_retries_are_kept(self):
+        report = EncodeReport()
+
+        report.add(0, 'b-00000.wav', 10, 3.0, Transfer(1.5, 0.25, 4800, 3))
+        report.add(1, 'b-00001.wav', 10, 1.0, Transfer(0.5, 0.25, 4800))
+
+        assert report.fragments[0].ttfb == 1.5
+        assert report.fragments[0].received == 4800
+        assert report.retries == 2
+
+    def test_real_time_factor(self):
+        # Three seconds of audio and one, side by side in two seconds of the
+        # run: four seconds of audio in two. A fragment whose audio could not
+        # be measured adds nothing to it.
+        report = EncodeReport(started=datetime(2024, 1, 1, 12, 0, 0))
+        report.add(0, 'a', 10, 2.0, Transfer(1.0, 0.1, 1, duration=3.0))
+        report.add(1, 'b', 10, 2.0, Transfer(1.0, 0.1, 1, duration=1.0))
+        report.add(2, 'c', 10, 2.0, Transfer(1.0, 0.1, 1))
+        report.finished = datetime(2024, 1, 1, 12, 0, 2)
+
+        assert report.fragments[0].real_time_factor == 1.5
+        assert report.fragments[2].real_time_factor is None
+        assert report.seconds == 2.0
+        assert report.real_time_factor == 2.0
+
+    def test_no_measured_audio_has_no_real_time_factor(self):
+        report = report_of([1.0])
+        report.finished = report.started + timedelta(seconds=1)
+
+        assert report.real_time_factor is None
+
+    def test_nothing_finished_takes_no_time(self):
+        report = EncodeReport()
+        report.add(0, 'a', 10, 2.0, Transfer(1.0, 0.1, 1, duration=3.0))
+
+        assert report.seconds == 0.0
+        assert report.real_time_factor is None
+
+    def test_slowest(self):
+        report = report_of([1.0, 9.0, 3.0, 7.0, 2.0, 8.0, 5.0])
+
+        slowest = report.slowest()
+
+        assert len(slowest) == SLOWEST
+        assert [f.index for f in slowest] == [1, 5, 3, 6, 2]
+
+    def test_csv_has_a_row_per_fragment(self):
+        report = report_of([1.0, 2.0])
+
+        rows = list(csv.DictReader(io.StringIO(report.to_csv())))
+
+        assert [r['filename'] for r in rows] == ['b-00000.wav', 'b-00001.wav']
+        assert rows[1]['chars_per_second'] == '5.0'
+        # Unmeasured, rather than a misleading zero.
+        assert rows[0]['ttfb'] == ''
@@ -1,4 +1,5 @@
 import json
+from datetime import timedelta
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
@@ -624,6 +625,7 @@ class TestAuditionByNameRoundTrip():
         with patch('zaphodvox.qwen.encoder.requests') as requests:
             response = MagicMock()
             response.content = b'RIFFcandidate'
+            response.elapsed = timedelta(seconds=0.25)
             requests.post.return_value.__enter__.return_value = response
             yield requests
 